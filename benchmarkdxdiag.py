@@ -0,0 +1,460 @@
+#/usr/bin/python3
+# benchmarkdxdiag.py
+# timing checks for the DXDiagFile parser
+# by Derek French
+# v0.8
+# 0.8 - cold construction also forgets the remembered driver decodes, so every cold run rebuilds them
+# 0.7 - section index benchmark also times the largest report against the number of sections parsed
+# 0.6 - DecodeDriverVersions() with its memo warm, against the plain decoders
+# 0.5 - memory held by the __slots__ report records against the dictionaries they replaced
+# 0.4 - full benchmark suite: construction, each section parser, driver decodes and the CLI end to end,
+#       saved as JSON and compared against a stored baseline; never touches the network
+# 0.3 - byte-level report read vs. text-mode open for UTF-8 and UTF-16 reports
+# 0.2 - streaming mode peak memory benchmark
+# 0.1 - section index benchmark: parse time vs. report size and sections parsed
+
+# imports
+from dxdiagfile import ClearDriverDecodes, DXDiagFile, DecodeAMDDriverVersion, DecodeDriverVersions, DecodeNVIDIADriverVersion
+from dxdiagfile import ReadReportText
+from dxdiagfile import PARSED_SECTIONS, SECTION_DISPLAYDEVICES, SECTION_DRIVES, SECTION_DXDIAGNOTES, SECTION_SOUNDDEVICES
+from dxdiagfile import SECTION_SYSTEMINFORMATION
+from drivertables import driverTableRegistry, driverTableUpdater, ENV_OFFLINE
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# constants
+VERSION = "0.8"
+REPEAT_COUNT = 5
+FILLER_LINE_COUNTS = [0, 10000, 40000, 160000]
+QUICK_FILLER_LINE_COUNTS = [0, 10000]
+# (display count, drive count) pairs for the end-to-end runs
+HARDWARE_COUNTS = [(1, 1), (8, 30)]
+DECODE_ROUNDS = 20
+# records of each type held at once for the record memory comparison
+RECORD_COUNT = 10000
+# a result this much worse than the baseline counts as a regression
+BASELINE_TOLERANCE = 0.25
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPORT_HEAD = """------------------
+System Information
+------------------
+      Time of this report: 12/3/2023, 00:00:00
+             Machine name: DESKTOP-Bench
+         Operating System: Windows 11 Home 64-bit (10.0, Build 22000) (22000.co_release.210604-1628)
+                 Language: English (Regional Setting: English)
+      System Manufacturer: Micro-Star International
+             System Model: System Product Name
+                Processor: AMD Ryzen 7 4800H with Radeon Graphics (16 CPUs), ~2.9GHz
+                   Memory: 16384MB RAM
+                Page File: 9733MB used, 14741MB available
+          DirectX Version: DirectX 12
+         User DPI Setting: 96 DPI (100 percent)
+
+------------
+DxDiag Notes
+------------
+      Display Tab 1: No problems found.
+        Sound Tab 1: No problems found.
+
+---------------
+Display Devices
+---------------
+"""
+REPORT_DISPLAY = """           Card name: NVIDIA GeForce RTX 3080
+        Manufacturer: NVIDIA
+    Dedicated Memory: 10067 MB
+        Current Mode: 2560 x 1080 (32 bit) (59Hz)
+        Monitor Name: Generic PnP Monitor
+       Monitor Model: LG ULTRAWIDE
+ Driver File Version: 31.00.0015.4617 (English)
+ PanelFitter Stretch: n/a
+
+"""
+REPORT_SOUND = """-------------
+Sound Devices
+-------------
+            Description: Headphones (Arctis 5 Game)
+
+---------------------
+Sound Capture Devices
+---------------------
+            Description: Headset Earphone (Arctis 5 Chat)
+
+-------------------
+DirectInput Devices
+-------------------
+"""
+REPORT_DRIVES = """------------------------
+Disk & DVD/CD-ROM Drives
+------------------------
+"""
+REPORT_DRIVE = """      Drive: {0}:
+ Free Space: 32.6 GB
+Total Space: 102.0 GB
+File System: NTFS
+      Model: Samsung SSD 850 EVO 500GB
+
+"""
+REPORT_TAIL = """--------------
+System Devices
+--------------
+"""
+REPORT_FILLER_LINE = "     Name: PCI Express Root Port, Device ID: PCI\\VEN_1022&DEV_1483&SUBSYS_14531022&REV_00\n"
+
+# functions
+def BuildReport(fillerLineCount: int, displayCount: int = 1, driveCount: int = 1) -> str:
+  """
+  Build a report with fillerLineCount device lines, split between "DirectInput Devices"
+  (before the drives section) and "System Devices" (after it) like a real report
+  """
+  reportParts = [REPORT_HEAD, REPORT_DISPLAY * displayCount, REPORT_SOUND]
+  reportParts.append(REPORT_FILLER_LINE * (fillerLineCount // 2))
+  reportParts.append(REPORT_DRIVES)
+  for driveNumber in range(driveCount):
+    # C: to Z:, then around again
+    reportParts.append(REPORT_DRIVE.format(chr(ord("C") + driveNumber % 24)))
+  reportParts.append(REPORT_TAIL)
+  reportParts.append(REPORT_FILLER_LINE * (fillerLineCount - fillerLineCount // 2))
+  return "".join(reportParts)
+# end BuildReport()
+
+def WriteReport(folder: str, fillerLineCount: int, encoding: str = "utf-8", displayCount: int = 1, driveCount: int = 1) -> str:
+  """
+  Write a BuildReport() report to folder and return its file name
+  """
+  reportFileName = os.path.join(folder, f"DxDiag_{fillerLineCount}_{displayCount}_{driveCount}_{encoding}.txt")
+  if not os.path.exists(reportFileName):
+    with open(reportFileName, "w", encoding=encoding) as fh:
+      fh.write(BuildReport(fillerLineCount, displayCount, driveCount))
+  return reportFileName
+# end WriteReport()
+
+def LineCount(fillerLineCount: int, displayCount: int = 1, driveCount: int = 1) -> int:
+  return BuildReport(0, displayCount, driveCount).count("\n") + fillerLineCount
+# end LineCount()
+
+def BestTime(function, *args) -> float:
+  """
+  Return the best wall time in seconds of REPEAT_COUNT calls to function(*args)
+  """
+  bestTime = None
+  for _ in range(REPEAT_COUNT):
+    startTime = time.perf_counter()
+    function(*args)
+    elapsedTime = time.perf_counter() - startTime
+    if bestTime is None or elapsedTime < bestTime:
+      bestTime = elapsedTime
+  return bestTime
+# end BestTime()
+
+def PeakMemory(function, *args) -> int:
+  """
+  Return the peak traced memory in bytes allocated while calling function(*args)
+  """
+  tracemalloc.start()
+  function(*args)
+  _, peakMemory = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return peakMemory
+# end PeakMemory()
+
+def HeldMemory(function, *args) -> int:
+  """
+  Return the traced memory in bytes still held by the result of function(*args)
+  """
+  tracemalloc.start()
+  heldResult = function(*args)
+  heldMemory, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del heldResult
+  return heldMemory
+# end HeldMemory()
+
+def AddResult(results, name: str, value: float, unit: str) -> None:
+  """
+  Record one measurement; unit is "s" or "bytes" (lower is better) or "ops/s" (higher is better)
+  """
+  results[name] = {"value": value, "unit": unit}
+# end AddResult()
+
+def ScanOnce(reportFileName: str) -> None:
+  """
+  Read the report and strip every line once; the floor for any line based parser
+  """
+  with open(reportFileName, "r") as fh:
+    for fileLine in fh.readlines():
+      fileLine.strip()
+# end ScanOnce()
+
+def BenchmarkSectionIndex(folder: str, fillerLineCounts, results) -> None:
+  """
+  Compare a full DXDiagFile parse against a single read-and-strip pass.
+  The section index finds every header in one pass and each parser only walks
+  its own section, so the ratio stays flat (and under 1) as the report grows
+  instead of adding a scan of the file for every section parsed.
+  Then parse the largest report with one section, two sections and so on up to all
+  of them; the time should barely move, as each added section only costs its own lines.
+  """
+  print(f"{'lines':>10} {'one scan (ms)':>14} {'DXDiagFile (ms)':>16} {'ratio':>6}")
+  for fillerLineCount in fillerLineCounts:
+    reportFileName = WriteReport(folder, fillerLineCount)
+    scanTime = BestTime(ScanOnce, reportFileName)
+    parseTime = BestTime(DXDiagFile, reportFileName)
+    lineCount = LineCount(fillerLineCount)
+    AddResult(results, f"parse.whole.lines={lineCount}", parseTime, "s")
+    print(f"{lineCount:>10} {scanTime * 1000:>14.2f} {parseTime * 1000:>16.2f} {parseTime / scanTime:>6.2f}")
+  print()
+  print(f"{'sections':>10} {'DXDiagFile (ms)':>16} {'vs one':>7}")
+  oneSectionTime = None
+  for sectionCount in range(1, len(PARSED_SECTIONS) + 1):
+    sectionTime = BestTime(lambda: DXDiagFile(reportFileName, sections=PARSED_SECTIONS[:sectionCount]))
+    if oneSectionTime is None:
+      oneSectionTime = sectionTime
+    AddResult(results, f"parse.sections={sectionCount}.lines={lineCount}", sectionTime, "s")
+    print(f"{sectionCount:>10} {sectionTime * 1000:>16.2f} {sectionTime / oneSectionTime:>7.2f}")
+# end BenchmarkSectionIndex()
+
+def BenchmarkConstruction(folder: str, results) -> None:
+  """
+  Time DXDiagFile construction cold (driver tables not loaded yet) against warm (tables already resident)
+  """
+  reportFileName = WriteReport(folder, 0)
+  def ColdConstruction():
+    # the remembered decodes are keyed on the table file, which hasn't changed, so they have to go as well
+    driverTableRegistry.Clear()
+    ClearDriverDecodes()
+    DXDiagFile(reportFileName)
+  coldTime = BestTime(ColdConstruction)
+  warmTime = BestTime(DXDiagFile, reportFileName)
+  AddResult(results, "construct.cold", coldTime, "s")
+  AddResult(results, "construct.warm", warmTime, "s")
+  print(f"{'cold (ms)':>10} {'warm (ms)':>10}")
+  print(f"{coldTime * 1000:>10.3f} {warmTime * 1000:>10.3f}")
+# end BenchmarkConstruction()
+
+def BenchmarkSectionParsers(folder: str, results) -> None:
+  """
+  Time each __Parse* method on its own section lines, outside of DXDiagFile construction
+  """
+  reportFileName = WriteReport(folder, 0, displayCount=8, driveCount=30)
+  # a lazy DXDiagFile has the report indexed but nothing parsed, so its private parsers can be driven directly
+  dxDiag = DXDiagFile(reportFileName, lazy=True)
+  sectionParsers = [
+    ("__ParseSystemInformation", SECTION_SYSTEMINFORMATION),
+    ("__ParseDxDiagNotes", SECTION_DXDIAGNOTES),
+    ("__ParseDisplayDevices", SECTION_DISPLAYDEVICES),
+    ("__ParseSoundDevices", SECTION_SOUNDDEVICES),
+    ("__ParseDrives", SECTION_DRIVES)
+  ]
+  print(f"{'parser':>26} {'lines':>6} {'time (us)':>10}")
+  for parserName, sectionName in sectionParsers:
+    sectionLines = getattr(dxDiag, "_DXDiagFile__SectionLines")(sectionName)
+    parser = getattr(dxDiag, "_DXDiagFile" + parserName)
+    parseTime = BestTime(parser, sectionLines)
+    AddResult(results, f"parser.{parserName.strip('_')}", parseTime, "s")
+    print(f"{parserName:>26} {len(sectionLines):>6} {parseTime * 1000000:>10.1f}")
+# end BenchmarkSectionParsers()
+
+def BenchmarkDecodes(results) -> None:
+  """
+  Measure DecodeAMDDriverVersion and DecodeNVIDIADriverVersion calls per second over every known
+  driver version plus a few misses, then the same strings through DecodeDriverVersions(), which after
+  the first round only looks up its memo
+  """
+  amdTable = driverTableRegistry.GetTable("AMD")
+  nvidiaTable = driverTableRegistry.GetTable("NVIDIA")
+  amdStrings = [version + " (English)" for version in amdTable if version != "version"]
+  amdStrings += ["31.00.99999.1 (English)", "27.20.1.1 (English)", "Unknown (Unknown)"]
+  nvidiaStrings = []
+  for version in nvidiaTable:
+    if version == "version":
+      continue
+    major, minor = version.split(".")
+    # 546.17 -> "32.00.0015.4617"
+    nvidiaStrings.append(f"32.00.001{major[0]}.{major[1:]}{minor} (English)")
+  nvidiaStrings += ["31.00.0014.7717 (English)", "Unknown (Unknown)"]
+  print(f"{'decoder':>26} {'decodes/s':>12}")
+  for decoderName, decoder, driverStrings, driverTable in [
+      ("DecodeAMDDriverVersion", DecodeAMDDriverVersion, amdStrings, amdTable),
+      ("DecodeNVIDIADriverVersion", DecodeNVIDIADriverVersion, nvidiaStrings, nvidiaTable)]:
+    def DecodeAll():
+      for _ in range(DECODE_ROUNDS):
+        for driverString in driverStrings:
+          decoder(driverString, driverTable)
+    decodeTime = BestTime(DecodeAll)
+    decodeRate = DECODE_ROUNDS * len(driverStrings) / decodeTime
+    AddResult(results, f"decode.{decoderName}", decodeRate, "ops/s")
+    print(f"{decoderName:>26} {decodeRate:>12.0f}")
+  driverStrings = [("AMD", driverString) for driverString in amdStrings]
+  driverStrings += [("NVIDIA", driverString) for driverString in nvidiaStrings]
+  def DecodeAllBatched():
+    for _ in range(DECODE_ROUNDS):
+      DecodeDriverVersions(driverStrings)
+  decodeTime = BestTime(DecodeAllBatched)
+  decodeRate = DECODE_ROUNDS * len(driverStrings) / decodeTime
+  AddResult(results, "decode.DecodeDriverVersions", decodeRate, "ops/s")
+  print(f"{'DecodeDriverVersions':>26} {decodeRate:>12.0f}")
+# end BenchmarkDecodes()
+
+def BenchmarkStreamingMemory(folder: str, fillerLineCounts, results) -> None:
+  """
+  Compare the peak memory of a whole-file parse against a streaming parse.
+  The streaming parse only ever holds one block of the report and the section it
+  is parsing, so its peak stays flat while the whole-file parse grows with the report.
+  """
+  print(f"{'lines':>10} {'whole file (KB)':>16} {'streaming (KB)':>15}")
+  for fillerLineCount in fillerLineCounts:
+    reportFileName = WriteReport(folder, fillerLineCount)
+    wholeFilePeak = PeakMemory(DXDiagFile, reportFileName)
+    streamingPeak = PeakMemory(DXDiagFile, reportFileName, True)
+    lineCount = LineCount(fillerLineCount)
+    AddResult(results, f"memory.whole.lines={lineCount}", wholeFilePeak, "bytes")
+    AddResult(results, f"memory.streaming.lines={lineCount}", streamingPeak, "bytes")
+    print(f"{lineCount:>10} {wholeFilePeak / 1024:>16.0f} {streamingPeak / 1024:>15.0f}")
+# end BenchmarkStreamingMemory()
+
+def BenchmarkRecordMemory(folder: str, results) -> None:
+  """
+  Compare the memory held by RECORD_COUNT parsed records of each type as __slots__ records
+  and as the plain dictionaries they replaced. Both hold the same field value objects, so
+  the difference is only the per-record overhead.
+  """
+  dxDiag = DXDiagFile(WriteReport(folder, 0, displayCount=1, driveCount=1))
+  print(f"{'record':>14} {'dict (KB)':>10} {'record (KB)':>12} {'saved':>7}")
+  for recordName, record in [
+      ("SystemInfo", dxDiag.systemInformation),
+      ("VideoDisplay", dxDiag.videoDisplays[0]),
+      ("Drive", dxDiag.drives[0])]:
+    recordType = type(record)
+    fieldValues = record.ToDict()
+    dictMemory = HeldMemory(lambda: [dict(fieldValues) for _ in range(RECORD_COUNT)])
+    recordMemory = HeldMemory(lambda: [recordType(**fieldValues) for _ in range(RECORD_COUNT)])
+    AddResult(results, f"records.dict.{recordName}", dictMemory, "bytes")
+    AddResult(results, f"records.slots.{recordName}", recordMemory, "bytes")
+    print(f"{recordName:>14} {dictMemory / 1024:>10.0f} {recordMemory / 1024:>12.0f} {1 - recordMemory / dictMemory:>7.0%}")
+# end BenchmarkRecordMemory()
+
+def ReadTextMode(reportFileName: str, encoding: str) -> None:
+  """
+  Read a report the way DXDiagFile used to, through a text-mode open() (here told the encoding)
+  """
+  with open(reportFileName, "r", encoding=encoding) as fh:
+    fh.read()
+# end ReadTextMode()
+
+def BenchmarkReportRead(folder: str, fillerLineCounts, results) -> None:
+  """
+  Compare the byte-level, BOM-detecting ReadReportText() against a text-mode open() that is
+  already told the right encoding; "utf-16" writes a BOM, as DxDiag does
+  """
+  fillerLineCount = fillerLineCounts[-1]
+  print(f"{'encoding':>10} {'text mode (ms)':>15} {'ReadReportText (ms)':>20}")
+  for encoding in ["utf-8", "utf-16"]:
+    reportFileName = WriteReport(folder, fillerLineCount, encoding)
+    textModeTime = BestTime(ReadTextMode, reportFileName, encoding)
+    readTime = BestTime(ReadReportText, reportFileName)
+    AddResult(results, f"read.{encoding}.lines={LineCount(fillerLineCount)}", readTime, "s")
+    print(f"{encoding:>10} {textModeTime * 1000:>15.2f} {readTime * 1000:>20.2f}")
+# end BenchmarkReportRead()
+
+def RunCLI(reportFileName: str) -> None:
+  """
+  Run parsedxdiag.py on one report in a fresh interpreter, the way a user or script would
+  """
+  cliEnvironment = dict(os.environ)
+  cliEnvironment[ENV_OFFLINE] = "1"
+  subprocess.run([sys.executable, os.path.join(SCRIPT_FOLDER, "parsedxdiag.py"), reportFileName],
+    stdout=subprocess.DEVNULL, check=True, cwd=SCRIPT_FOLDER, env=cliEnvironment)
+# end RunCLI()
+
+def BenchmarkCLI(folder: str, fillerLineCounts, results) -> None:
+  """
+  Time parsedxdiag.py end to end, interpreter start included, across report sizes and display/drive counts
+  """
+  print(f"{'lines':>10} {'displays':>9} {'drives':>7} {'wall time (ms)':>15}")
+  for fillerLineCount in fillerLineCounts:
+    for displayCount, driveCount in HARDWARE_COUNTS:
+      reportFileName = WriteReport(folder, fillerLineCount, displayCount=displayCount, driveCount=driveCount)
+      wallTime = BestTime(RunCLI, reportFileName)
+      lineCount = LineCount(fillerLineCount, displayCount, driveCount)
+      AddResult(results, f"cli.lines={lineCount}.displays={displayCount}.drives={driveCount}", wallTime, "s")
+      print(f"{lineCount:>10} {displayCount:>9} {driveCount:>7} {wallTime * 1000:>15.1f}")
+# end BenchmarkCLI()
+
+def CompareToBaseline(results, baselineFileName: str, tolerance: float) -> int:
+  """
+  Print how each result moved against a saved baseline run, returning the number of regressions
+  """
+  with open(baselineFileName, "r", encoding="utf-8") as fh:
+    baselineResults = json.load(fh)["results"]
+  regressionCount = 0
+  print(f"{'benchmark':<50} {'baseline':>12} {'current':>12} {'change':>8}")
+  for name, result in results.items():
+    if name not in baselineResults:
+      continue
+    baselineValue = baselineResults[name]["value"]
+    currentValue = result["value"]
+    if baselineValue == 0:
+      continue
+    change = currentValue / baselineValue - 1
+    # for throughput a drop is the bad direction
+    worseBy = -change if result["unit"] == "ops/s" else change
+    flag = ""
+    if worseBy > tolerance:
+      flag = " REGRESSION"
+      regressionCount += 1
+    print(f"{name:<50} {baselineValue:>12.6g} {currentValue:>12.6g} {change:>+8.1%}{flag}")
+  return regressionCount
+# end CompareToBaseline()
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="benchmarkdxdiag.py", description="DXDiagFile benchmark suite; runs without network access")
+  parser.add_argument("-o", "--output", metavar="FILE", help="save the results as JSON to FILE")
+  parser.add_argument("-b", "--baseline", metavar="FILE", help="compare the results against a JSON file saved by --output")
+  parser.add_argument("-t", "--tolerance", type=float, default=BASELINE_TOLERANCE,
+    help="fraction worse than the baseline that counts as a regression, default 0.25")
+  parser.add_argument("-q", "--quick", action="store_true", help="only the smaller report sizes")
+  args = parser.parse_args()
+  # the driver decode CSVs are looked up relative to the working directory
+  os.chdir(SCRIPT_FOLDER)
+  # keep the benchmark offline and measuring only the parse
+  driverTableUpdater.offline = True
+  fillerLineCounts = QUICK_FILLER_LINE_COUNTS if args.quick else FILLER_LINE_COUNTS
+  results = {}
+  with tempfile.TemporaryDirectory() as folder:
+    for benchmark in [
+        lambda: BenchmarkSectionIndex(folder, fillerLineCounts, results),
+        lambda: BenchmarkConstruction(folder, results),
+        lambda: BenchmarkSectionParsers(folder, results),
+        lambda: BenchmarkDecodes(results),
+        lambda: BenchmarkStreamingMemory(folder, fillerLineCounts, results),
+        lambda: BenchmarkRecordMemory(folder, results),
+        lambda: BenchmarkReportRead(folder, fillerLineCounts, results),
+        lambda: BenchmarkCLI(folder, fillerLineCounts, results)]:
+      benchmark()
+      print()
+  if args.output is not None:
+    with open(args.output, "w", encoding="utf-8") as fh:
+      json.dump({
+        "benchmarkVersion": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results
+      }, fh, indent=1)
+  if args.baseline is not None:
+    if CompareToBaseline(results, args.baseline, args.tolerance) > 0:
+      return 1
+  return 0
+# end main()
+
+if __name__ == "__main__":
+  sys.exit(main())
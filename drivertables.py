@@ -0,0 +1,639 @@
+#/usr/bin/python3
+# drivertables.py
+# AMD and NVIDIA driver decode tables, kept up to date from GitHub
+# by Derek French
+# v0.8
+# 0.8 - a table's check is only recorded once it finishes or fails, so one cut off by the process exiting is
+#       tried again next run; HTTP protocol errors are recorded in errors like network ones
+# 0.7 - added GoOffline(), which also keeps worker processes offline, spawned ones included
+# 0.6 - added DriverTableRegistry.GetTableKey() for caching results that depend on a table
+# 0.5 - added DriverTableUpdater.refreshSeconds, how long the last check took
+# 0.4 - added DriverTableRegistry.Clear()
+# 0.3 - added the sorted driver release index for nearest release, releases behind and range lookups
+# 0.2 - added the process-wide driver table registry, loaded on first use and reloaded when a table file changes
+# 0.1 - background refresh of both decode tables with a TTL, a hard timeout and conditional requests
+
+# imports
+from types import MappingProxyType
+from urllib import error, request
+import bisect
+import http.client
+import csv
+import json
+import os
+import pickle
+import threading
+import time
+
+# constants
+FILE_DRIVERSAMD = "driverDecodeAMD.csv"
+FILE_DRIVERSNVIDIA = "driverDecodeNvidia.csv"
+URL_DRIVERSBASE = "https://raw.githubusercontent.com/CrushBug/DXDiagParse/main/"
+URL_DRIVERSAMDDECODE = URL_DRIVERSBASE + FILE_DRIVERSAMD
+URL_DRIVERSNVIDIADECODE = URL_DRIVERSBASE + FILE_DRIVERSNVIDIA
+# vendor name -> local decode table file
+DRIVER_TABLES = {
+  "AMD": FILE_DRIVERSAMD,
+  "NVIDIA": FILE_DRIVERSNVIDIA
+}
+# ETag, Last-Modified and last check time of each table, so checks survive between runs
+FILE_DRIVERSUPDATESTATE = "driverDecodeUpdate.json"
+# check GitHub at most once a day
+UPDATE_TTL = 24 * 60 * 60
+# give up on a table download after this many seconds, start to finish
+UPDATE_TIMEOUT = 5.0
+UPDATE_READSIZE = 64 * 1024
+# compiled release indexes are saved beside the tables as driverDecodeAMD.index, etc.
+INDEX_EXTENSION = ".index"
+INDEX_FORMAT = 1
+# set DXDIAGPARSE_OFFLINE=1 to never touch the network
+ENV_OFFLINE = "DXDIAGPARSE_OFFLINE"
+ENV_UPDATETTL = "DXDIAGPARSE_UPDATE_TTL"
+
+# functions
+def GoOffline() -> None:
+  """
+  Never touch the network from this process or from any worker process it starts; spawned workers
+  import this module afresh, so the setting goes through $DXDIAGPARSE_OFFLINE as well as the updater
+  """
+  os.environ[ENV_OFFLINE] = "1"
+  driverTableUpdater.offline = True
+# end GoOffline()
+
+def ReadTableVersion(fileName: str) -> int:
+  """
+  Return the version number from the "version,38" first line of a decode table file, or 0 if it can't be read
+  """
+  try:
+    with open(fileName, "r", encoding="utf-8") as fh:
+      return ParseVersionLine(fh.readline())
+  except OSError:
+    return 0
+# end ReadTableVersion()
+
+def ParseVersionLine(versionLine: str) -> int:
+  """
+  Return the version number from a "version,38" line, or 0 if it isn't one
+  """
+  versionElements = versionLine.strip().split(",")
+  if len(versionElements) < 2 or versionElements[0] != "version":
+    return 0
+  try:
+    return int(versionElements[1].strip('"'))
+  except ValueError:
+    return 0
+# end ParseVersionLine()
+
+def LoadAMDDriverTable(fileName: str):
+  """
+  Load driverDecodeAMD.csv into a dictionary of "31.00.14000.61002": "22.12.2 (WHQL)",... entries
+  """
+  driverVersions = {}
+  with open(fileName, "r") as fhAMD:
+    for driverLine in fhAMD:
+      entry = driverLine.strip().split(",")
+      driverVersions[entry[0]] = entry[1]
+  return driverVersions
+# end LoadAMDDriverTable()
+
+def LoadNVIDIADriverTable(fileName: str):
+  """
+  Load driverDecodeNvidia.csv into a dictionary of "566.45": "Mon Dec 23, 2024",... entries
+  """
+  driverVersions = {}
+  with open(fileName, encoding="utf-8") as csvFile:
+    csvReader = csv.reader(csvFile, dialect="excel", doublequote=True)
+    for row in csvReader:
+      driverVersions[row[0]] = row[1]
+  return driverVersions
+# end LoadNVIDIADriverTable()
+
+# vendor name -> function that loads its decode table file
+DRIVER_TABLE_LOADERS = {
+  "AMD": LoadAMDDriverTable,
+  "NVIDIA": LoadNVIDIADriverTable
+}
+
+def VersionTuple(versionString: str):
+  """
+  Return the tuple of numbers in a dotted version string, "25.9.2" -> (25, 9, 2), or None if it isn't one
+  """
+  try:
+    return tuple(int(number) for number in versionString.strip().split("."))
+  except ValueError:
+    return None
+# end VersionTuple()
+
+def DriverVersionKey(vendorName: str, driverString: str):
+  """
+  Turn a DXDiag "Driver File Version" string into the key the vendor's release index is sorted on
+  AMD: "31.00.14037.1007 (English)" -> (31, 0, 14037, 1007)
+  NVIDIA: "31.00.0015.4617 (English)" -> (546, 17), the same split DecodeNVIDIADriverVersion() makes
+  Returns None for "Unknown" or anything else that can't be read
+  """
+  numbers = driverString.split(" ")[0]    # "31.00.0015.4617"
+  versionKey = VersionTuple(numbers)      # (31, 0, 15, 4617)
+  if versionKey is None or len(versionKey) != 4:
+    return None
+  if vendorName == "NVIDIA":
+    index2 = str(versionKey[2])           # "0015" -> 15 -> "15"
+    index3 = numbers.split(".")[3]        # "4617"
+    if len(index2) < 2 or len(index3) < 3:
+      return None
+    return (int(index2[1:] + index3[:2]), int(index3[2:]))  # (546, 17)
+  return versionKey
+# end DriverVersionKey()
+
+class DriverReleaseIndex:
+  """
+  One vendor's driver releases sorted by version key, so lookups that miss the exact
+  table entry can still find the closest known release with a binary search.
+  Each release is a (versionKey, releaseNumber, description) tuple, for example
+  ((32, 0, 21025, 10016), (25, 9, 1), "25.9.1 WHQL Recommended - 09/08/2025") or
+  ((581, 42), (581, 42), "Tue Sep 30, 2025").
+  """
+
+  def __init__(self, vendorName: str, releases) -> None:
+    self.__vendorName = vendorName
+    self.__releases = sorted(releases)
+    self.__versionKeys = [release[0] for release in self.__releases]
+  # end __init__()
+
+  @classmethod
+  def FromTable(cls, vendorName: str, driverVersions):
+    """
+    Compile a decode table dictionary from the registry into a release index
+    """
+    releases = []
+    for versionString, description in driverVersions.items():
+      versionKey = VersionTuple(versionString)
+      if versionKey is None:
+        # the "version,38" row
+        continue
+      if vendorName == "NVIDIA":
+        releaseNumber = versionKey
+      else:
+        releaseNumber = VersionTuple(description.split(" ")[0]) or ()
+      releases.append((versionKey, releaseNumber, description))
+    return cls(vendorName, releases)
+  # end FromTable()
+
+  def __len__(self) -> int:
+    return len(self.__releases)
+
+  def Find(self, versionKey):
+    """
+    Return the release with exactly versionKey, or None
+    """
+    position = bisect.bisect_left(self.__versionKeys, versionKey)
+    if position < len(self.__versionKeys) and self.__versionKeys[position] == versionKey:
+      return self.__releases[position]
+    return None
+  # end Find()
+
+  def ClosestBefore(self, versionKey):
+    """
+    Return the newest release at or before versionKey, or None if versionKey is older than every release
+    """
+    position = bisect.bisect_right(self.__versionKeys, versionKey)
+    if position == 0:
+      return None
+    return self.__releases[position - 1]
+  # end ClosestBefore()
+
+  def ClosestAfter(self, versionKey):
+    """
+    Return the oldest release at or after versionKey, or None if versionKey is newer than every release
+    """
+    position = bisect.bisect_left(self.__versionKeys, versionKey)
+    if position == len(self.__releases):
+      return None
+    return self.__releases[position]
+  # end ClosestAfter()
+
+  def ReleasesBehind(self, versionKey) -> int:
+    """
+    Return how many known releases are newer than versionKey; 0 means it is the latest or newer
+    """
+    return len(self.__versionKeys) - bisect.bisect_right(self.__versionKeys, versionKey)
+  # end ReleasesBehind()
+
+  def Latest(self):
+    """
+    Return the newest release, or None if the index is empty
+    """
+    if len(self.__releases) == 0:
+      return None
+    return self.__releases[-1]
+  # end Latest()
+
+  def Range(self, lowKey=None, highKey=None):
+    """
+    Return the releases with lowKey <= versionKey < highKey, oldest first; None leaves that end open
+    """
+    lowPosition = 0
+    highPosition = len(self.__versionKeys)
+    if lowKey is not None:
+      lowPosition = bisect.bisect_left(self.__versionKeys, lowKey)
+    if highKey is not None:
+      highPosition = bisect.bisect_left(self.__versionKeys, highKey)
+    return self.__releases[lowPosition:highPosition]
+  # end Range()
+
+  def ReleaseKey(self, releaseNumber: str):
+    """
+    Return the version key of the oldest release numbered releaseNumber or later, for range queries
+    e.g. "25.6" -> the key of 25.6.1, so "older than 25.6.x" is Range(None, ReleaseKey("25.6"))
+    Returns None if every release is older than releaseNumber
+    """
+    releaseTuple = VersionTuple(releaseNumber)
+    if releaseTuple is None:
+      return None
+    laterKeys = [release[0] for release in self.__releases if release[1] >= releaseTuple]
+    if len(laterKeys) == 0:
+      return None
+    return min(laterKeys)
+  # end ReleaseKey()
+
+  def DescribeRelease(self, release) -> str:
+    """
+    Return a release the way the decode functions show it, "Adrenalin 25.9.1 WHQL Recommended - 09/08/2025" or "581.42 - Tue Sep 30, 2025"
+    """
+    versionKey, releaseNumber, description = release
+    if self.__vendorName == "NVIDIA":
+      return f"{versionKey[0]}.{versionKey[1]:02d} - {description}"
+    return "Adrenalin " + description
+  # end DescribeRelease()
+
+  @property
+  def releases(self):
+    """
+    Return the list of (versionKey, releaseNumber, description) releases, oldest first
+    """
+    return list(self.__releases)
+
+  @property
+  def vendorName(self) -> str:
+    return self.__vendorName
+# end class DriverReleaseIndex
+
+class DriverTableRegistry:
+  """
+  Holds one read-only copy of each driver decode table for the whole process.
+  A table is loaded the first time it is asked for, and loaded again only when its
+  file's modification time, size or version row changes, such as after an update.
+  """
+
+  def __init__(self, tables=None, folder: str = "") -> None:
+    """
+    tables - dictionary of vendor name to table file name, defaults to DRIVER_TABLES
+    folder - folder holding the table files, defaults to the working folder
+    """
+    self.__tables = dict(DRIVER_TABLES if tables is None else tables)
+    self.__folder = folder
+    self.__lock = threading.Lock()
+    # vendor name -> (file stamp, table version, read-only table)
+    self.__loadedTables = {}
+    # vendor name -> (file stamp, release index)
+    self.__releaseIndexes = {}
+  # end __init__()
+
+  def __LoadTable(self, vendorName: str):
+    """
+    Return the (file stamp, table version, read-only table) entry for vendorName, loading it if its file changed
+    """
+    tablePath = os.path.join(self.__folder, self.__tables[vendorName])
+    try:
+      tableStat = os.stat(tablePath)
+    except OSError:
+      # no table file; decode without one
+      return (None, 0, MappingProxyType({}))
+    fileStamp = (tableStat.st_mtime_ns, tableStat.st_size)
+    loadedTable = self.__loadedTables.get(vendorName)
+    if loadedTable is not None and loadedTable[0] == fileStamp:
+      return loadedTable
+    with self.__lock:
+      # another thread may have loaded it while we waited
+      loadedTable = self.__loadedTables.get(vendorName)
+      if loadedTable is not None and loadedTable[0] == fileStamp:
+        return loadedTable
+      tableVersion = ReadTableVersion(tablePath)
+      driverVersions = DRIVER_TABLE_LOADERS[vendorName](tablePath)
+      loadedTable = (fileStamp, tableVersion, MappingProxyType(driverVersions))
+      self.__loadedTables[vendorName] = loadedTable
+    return loadedTable
+  # end __LoadTable()
+
+  def Clear(self) -> None:
+    """
+    Forget every loaded table and release index, so the next use loads them from disk again
+    """
+    with self.__lock:
+      self.__loadedTables.clear()
+      self.__releaseIndexes.clear()
+  # end Clear()
+
+  def GetTable(self, vendorName: str):
+    """
+    Return the read-only decode table dictionary for vendorName ("AMD" or "NVIDIA")
+    """
+    return self.__LoadTable(vendorName)[2]
+  # end GetTable()
+
+  def GetReleaseIndex(self, vendorName: str):
+    """
+    Return the DriverReleaseIndex for vendorName, compiled from its table the first time it is asked for
+    The compiled index is saved beside the table file and reused until the table file changes
+    """
+    fileStamp, tableVersion, driverVersions = self.__LoadTable(vendorName)
+    releaseIndex = self.__releaseIndexes.get(vendorName)
+    if releaseIndex is not None and releaseIndex[0] == fileStamp:
+      return releaseIndex[1]
+    with self.__lock:
+      indexPath = os.path.join(self.__folder, os.path.splitext(self.__tables[vendorName])[0] + INDEX_EXTENSION)
+      releases = None
+      if fileStamp is not None:
+        releases = self.__ReadIndexFile(indexPath, fileStamp, tableVersion)
+      if releases is not None:
+        releaseIndex = DriverReleaseIndex(vendorName, releases)
+      else:
+        releaseIndex = DriverReleaseIndex.FromTable(vendorName, driverVersions)
+        if fileStamp is not None:
+          self.__WriteIndexFile(indexPath, fileStamp, tableVersion, releaseIndex)
+      self.__releaseIndexes[vendorName] = (fileStamp, releaseIndex)
+    return releaseIndex
+  # end GetReleaseIndex()
+
+  def __ReadIndexFile(self, indexPath: str, fileStamp, tableVersion: int):
+    """
+    Return the sorted releases saved in indexPath, or None if it is missing or was built from a different table file
+    """
+    try:
+      with open(indexPath, "rb") as fh:
+        savedIndex = pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+      return None
+    if not isinstance(savedIndex, dict) or savedIndex.get("format") != INDEX_FORMAT:
+      return None
+    if savedIndex.get("fileStamp") != fileStamp or savedIndex.get("tableVersion") != tableVersion:
+      return None
+    return savedIndex.get("releases")
+  # end __ReadIndexFile()
+
+  def __WriteIndexFile(self, indexPath: str, fileStamp, tableVersion: int, releaseIndex) -> None:
+    """
+    Save the sorted releases to indexPath; a read-only folder just means the index is rebuilt next run
+    """
+    savedIndex = {
+      "format": INDEX_FORMAT,
+      "fileStamp": fileStamp,
+      "tableVersion": tableVersion,
+      "releases": releaseIndex.releases
+    }
+    try:
+      with open(indexPath + ".new", "wb") as fh:
+        pickle.dump(savedIndex, fh, protocol=pickle.HIGHEST_PROTOCOL)
+      os.replace(indexPath + ".new", indexPath)
+    except OSError:
+      pass
+  # end __WriteIndexFile()
+
+  def GetTableVersion(self, vendorName: str) -> int:
+    """
+    Return the version row number of the decode table for vendorName, 0 if there is no table
+    """
+    return self.__LoadTable(vendorName)[1]
+  # end GetTableVersion()
+
+  def GetTableKey(self, vendorName: str):
+    """
+    Return a (file stamp, table version) tuple that changes whenever the table file for vendorName does
+    The file stamp is (modification time in ns, size), or None if there is no table file
+    """
+    fileStamp, tableVersion, _ = self.__LoadTable(vendorName)
+    return (fileStamp, tableVersion)
+  # end GetTableKey()
+# end class DriverTableRegistry
+
+class DriverTableUpdater:
+  """
+  Refreshes the local driver decode table files from GitHub.
+  A refresh checks each table at most once per ttl seconds, sends the saved ETag and
+  Last-Modified so an unchanged table costs a 304, and only replaces a local file when
+  the downloaded table has a higher version number.
+  """
+
+  def __init__(self, baseURL: str = URL_DRIVERSBASE, tables=None, folder: str = "",
+               ttl: float = None, timeout: float = UPDATE_TIMEOUT, offline: bool = None) -> None:
+    """
+    baseURL - URL the table file names are appended to; point it at a local server for testing
+    tables - dictionary of vendor name to table file name, defaults to DRIVER_TABLES
+    folder - folder holding the table files and the update state file, defaults to the working folder
+    ttl - seconds between checks, defaults to $DXDIAGPARSE_UPDATE_TTL or UPDATE_TTL
+    timeout - hard limit in seconds on each table download
+    offline - never touch the network, defaults to $DXDIAGPARSE_OFFLINE
+    """
+    self.__baseURL = baseURL
+    self.__tables = dict(DRIVER_TABLES if tables is None else tables)
+    self.__folder = folder
+    if ttl is None:
+      ttl = float(os.environ.get(ENV_UPDATETTL, UPDATE_TTL))
+    self.__ttl = ttl
+    self.__timeout = timeout
+    if offline is None:
+      offline = os.environ.get(ENV_OFFLINE, "") not in ("", "0")
+    self.__offline = offline
+    self.__lock = threading.Lock()
+    self.__threadLock = threading.Lock()
+    self.__thread = None
+    self.__updatedTables = set()
+    self.__errors = {}
+    self.__refreshSeconds = None
+  # end __init__()
+
+  def __TablePath(self, fileName: str) -> str:
+    return os.path.join(self.__folder, fileName)
+  # end __TablePath()
+
+  def __LoadState(self):
+    """
+    Return the saved update state, a dictionary of vendor name to ETag/Last-Modified/lastChecked
+    """
+    try:
+      with open(self.__TablePath(FILE_DRIVERSUPDATESTATE), "r", encoding="utf-8") as fh:
+        updateState = json.load(fh)
+    except (OSError, ValueError):
+      return {}
+    if not isinstance(updateState, dict):
+      return {}
+    return updateState
+  # end __LoadState()
+
+  def __SaveState(self, updateState) -> None:
+    """
+    Write the update state file, replacing the old one in a single step
+    """
+    stateFileName = self.__TablePath(FILE_DRIVERSUPDATESTATE)
+    try:
+      with open(stateFileName + ".new", "w", encoding="utf-8") as fh:
+        json.dump(updateState, fh, indent=1)
+      os.replace(stateFileName + ".new", stateFileName)
+    except OSError:
+      pass
+  # end __SaveState()
+
+  def __Download(self, url: str, tableState):
+    """
+    Conditionally download url within the hard timeout
+    Returns the table bytes, or None when the server says the table has not changed
+    """
+    deadline = time.monotonic() + self.__timeout
+    tableRequest = request.Request(url)
+    if tableState.get("etag"):
+      tableRequest.add_header("If-None-Match", tableState["etag"])
+    if tableState.get("lastModified"):
+      tableRequest.add_header("If-Modified-Since", tableState["lastModified"])
+    try:
+      response = request.urlopen(tableRequest, timeout=self.__timeout)
+    except error.HTTPError as httpError:
+      if httpError.code == 304:
+        return None
+      raise
+    with response:
+      chunks = []
+      while True:
+        if time.monotonic() > deadline:
+          raise TimeoutError(f"download took longer than {self.__timeout} seconds")
+        chunk = response.read1(UPDATE_READSIZE)
+        if not chunk:
+          break
+        chunks.append(chunk)
+      tableState["etag"] = response.headers.get("ETag", "")
+      tableState["lastModified"] = response.headers.get("Last-Modified", "")
+    return b"".join(chunks)
+  # end __Download()
+
+  def __RefreshTable(self, vendorName: str, fileName: str, tableState) -> bool:
+    """
+    Download one table and replace the local file if the download is a newer version
+    Returns True if the local file was replaced
+    """
+    tablePath = self.__TablePath(fileName)
+    localVersion = ReadTableVersion(tablePath)
+    if localVersion == 0:
+      # nothing usable locally, so a "not modified" answer is no use
+      tableState.pop("etag", None)
+      tableState.pop("lastModified", None)
+    latestTableData = self.__Download(self.__baseURL + fileName, tableState)
+    if latestTableData is None:
+      return False
+    # get the first line, the version line, searching for a byte version of newline
+    newLinePos = latestTableData.find(b"\n")
+    if newLinePos == -1:
+      return False
+    latestVersion = ParseVersionLine(latestTableData[:newLinePos].decode("utf-8", "replace"))
+    if latestVersion <= localVersion:
+      return False
+    # save it out beside the old table, then swap it in so readers never see half a file
+    newTablePath = tablePath + ".new"
+    with open(newTablePath, "wb") as fh:
+      fh.write(latestTableData)
+    os.replace(newTablePath, tablePath)
+    self.__updatedTables.add(vendorName)
+    return True
+  # end __RefreshTable()
+
+  def Refresh(self, force: bool = False):
+    """
+    Check every table whose last check is older than the TTL (or all of them when force is True)
+    Returns the list of vendor names whose table file was replaced
+    Network problems are recorded in errors, never raised
+    """
+    updatedTables = []
+    if self.__offline:
+      return updatedTables
+    refreshStart = time.perf_counter()
+    with self.__lock:
+      updateState = self.__LoadState()
+      now = time.time()
+      dueTables = []
+      for vendorName, fileName in self.__tables.items():
+        tableState = updateState.setdefault(vendorName, {})
+        if force or now - tableState.get("lastChecked", 0) >= self.__ttl:
+          dueTables.append((vendorName, fileName, tableState))
+      for vendorName, fileName, tableState in dueTables:
+        try:
+          if self.__RefreshTable(vendorName, fileName, tableState):
+            updatedTables.append(vendorName)
+          self.__errors.pop(vendorName, None)
+        except (OSError, ValueError, http.client.HTTPException) as refreshError:
+          self.__errors[vendorName] = f"{type(refreshError).__name__}: {refreshError}"
+        # failures count as a check too, so an unreachable GitHub is not retried on every run; a check cut off
+        # by the process exiting is never saved, so the next run tries again
+        tableState["lastChecked"] = time.time()
+        self.__SaveState(updateState)
+      # end for vendorName, fileName, tableState
+      self.__refreshSeconds = time.perf_counter() - refreshStart
+    return updatedTables
+  # end Refresh()
+
+  def StartBackgroundRefresh(self):
+    """
+    Run Refresh() once in a daemon thread and return at once
+    Later calls return the same thread, so at most one refresh runs per updater
+    Returns the thread, or None when offline
+    """
+    if self.__offline:
+      return None
+    with self.__threadLock:
+      if self.__thread is None:
+        self.__thread = threading.Thread(target=self.Refresh, name="DriverTableRefresh", daemon=True)
+        self.__thread.start()
+    return self.__thread
+  # end StartBackgroundRefresh()
+
+  def Wait(self, timeout: float = None) -> None:
+    """
+    Wait up to timeout seconds for a background refresh to finish
+    Short-lived programs call this before exiting, as the daemon refresh thread dies with the process
+    """
+    if self.__thread is not None:
+      self.__thread.join(timeout)
+  # end Wait()
+
+  @property
+  def errors(self):
+    """
+    Return a dictionary of vendor name to the error from its last failed check
+    """
+    return dict(self.__errors)
+
+  @property
+  def offline(self) -> bool:
+    """
+    Return a boolean if the updater never touches the network
+    """
+    return self.__offline
+
+  @offline.setter
+  def offline(self, offline: bool) -> None:
+    self.__offline = offline
+
+  @property
+  def refreshSeconds(self):
+    """
+    Return the seconds the last finished Refresh() took, or None if none has finished
+    """
+    return self.__refreshSeconds
+
+  @property
+  def updatedTables(self):
+    """
+    Return a set of vendor names whose table file was replaced by this updater
+    """
+    return set(self.__updatedTables)
+# end class DriverTableUpdater
+
+# the process-wide registry and updater DXDiagFile uses
+driverTableRegistry = DriverTableRegistry()
+driverTableUpdater = DriverTableUpdater()
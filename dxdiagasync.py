@@ -0,0 +1,292 @@
+#/usr/bin/python3
+# dxdiagasync.py
+# asyncio front end for parsing DXDiag reports inside an event loop, such as a chat bot or a web service
+# by Derek French
+# v0.2
+# 0.2 - ReadReportStream() reads an open file in blocks up to its limit instead of all at once
+# 0.1 - AsyncReportParser: parses files, bytes and streams over a worker pool without blocking the loop, a bounded
+#       number at a time; RefreshDriverTablesAsync() with a timeout; AsCompleted() and ParseReportsAsCompleted()
+
+# imports
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dxdiagbatch import ParseReport, ParseReportFile, StartWorker, WarmDriverTables
+from dxdiagcache import CACHE_MAXBYTES
+from dxdiagfile import DefaultParseLimits, ReadLimitedBytes
+from drivertables import driverTableUpdater
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+
+# constants
+# parses running at once per worker; more wait their turn without holding a worker
+PARSES_PER_WORKER = 2
+# give up waiting on a driver table refresh after this many seconds; the refresh itself carries on
+REFRESH_TIMEOUT = 10.0
+# seconds between checks for newer driver decode data; each check honours the updater's own TTL
+UPDATE_CHECK_INTERVAL = 60 * 60
+STREAM_READSIZE = 64 * 1024
+
+# functions
+async def ReadReportStream(reportStream, maxBytes: int = None) -> bytes:
+  """
+  Read a report from a stream without blocking the event loop, returning its bytes
+  reportStream - an asyncio.StreamReader or anything else with a coroutine read(n), an async iterable of
+                 byte chunks such as an HTTP response body, or an open binary file, which is read in a thread
+  maxBytes - stop after this many bytes plus one, so DXDiagFile can tell the report went past its limit;
+             defaults to the ParseLimits report size
+  """
+  if maxBytes is None:
+    maxBytes = DefaultParseLimits().maxReportBytes
+  readMethod = getattr(reportStream, "read", None)
+  if readMethod is not None and not inspect.iscoroutinefunction(readMethod) and not hasattr(reportStream, "__aiter__"):
+    return await asyncio.get_running_loop().run_in_executor(None, ReadLimitedBytes, reportStream, maxBytes)
+  chunks = []
+  byteCount = 0
+  if readMethod is not None and inspect.iscoroutinefunction(readMethod):
+    while byteCount <= maxBytes:
+      chunk = await readMethod(min(STREAM_READSIZE, maxBytes + 1 - byteCount))
+      if not chunk:
+        break
+      chunks.append(chunk)
+      byteCount += len(chunk)
+  else:
+    async for chunk in reportStream:
+      chunks.append(chunk)
+      byteCount += len(chunk)
+      if byteCount > maxBytes:
+        break
+  return b"".join(chunks)[:maxBytes + 1]
+# end ReadReportStream()
+
+async def RefreshDriverTablesAsync(timeout: float = REFRESH_TIMEOUT, force: bool = False, updater=None):
+  """
+  Check GitHub for newer driver decode tables without blocking the event loop
+  Returns the list of vendor names whose table was replaced, or None if the check took longer than timeout;
+  a check that times out carries on in its daemon thread and its tables are picked up once it finishes
+  Network problems are recorded in the updater's errors, never raised
+  updater - the DriverTableUpdater to use, defaults to the process-wide one
+  """
+  if updater is None:
+    updater = driverTableUpdater
+  loop = asyncio.get_running_loop()
+  refreshFuture = loop.create_future()
+
+  def SetResult(updatedTables) -> None:
+    if not refreshFuture.done():
+      refreshFuture.set_result(updatedTables)
+
+  def RunRefresh() -> None:
+    updatedTables = updater.Refresh(force)
+    try:
+      loop.call_soon_threadsafe(SetResult, updatedTables)
+    except RuntimeError:
+      # the loop closed while the check was running
+      pass
+
+  # a daemon thread rather than the loop's executor, so a slow download never holds up the loop shutting down
+  threading.Thread(target=RunRefresh, name="DriverTableRefresh", daemon=True).start()
+  try:
+    return await asyncio.wait_for(refreshFuture, timeout)
+  except asyncio.TimeoutError:
+    return None
+# end RefreshDriverTablesAsync()
+
+async def ParseReportsAsCompleted(reportInputs, **parserOptions):
+  """
+  Parse many reports over a temporary AsyncReportParser, yielding each ParseReport() result as it finishes
+  reportInputs and parserOptions are as for AsyncReportParser.AsCompleted() and AsyncReportParser()
+  """
+  async with AsyncReportParser(**parserOptions) as reportParser:
+    async for report in reportParser.AsCompleted(reportInputs):
+      yield report
+# end ParseReportsAsCompleted()
+
+# classes
+class AsyncReportParser:
+  """
+  Parses reports for asyncio code. Reading, parsing and driver decoding all happen in a pool of worker
+  processes or threads, so the event loop only waits on futures; file names are even opened in the workers.
+  At most maxConcurrent parses are handed to the pool at once and the rest wait in the loop, so a burst of
+  uploads can't queue up unbounded work. Results are ParseReport() dictionaries, "error" included.
+  Use it with "async with", or call Close() when done.
+  """
+
+  def __init__(self, workerCount: int = 0, useThreads: bool = False, maxConcurrent: int = 0, profile: bool = False,
+               cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES, refreshTimeout: float = REFRESH_TIMEOUT,
+               checkForUpdates: bool = True, executor=None) -> None:
+    """
+    workerCount - number of worker processes or threads, 0 for one per CPU
+    useThreads - parse in threads of this process instead of worker processes
+    maxConcurrent - parses handed to the pool at once, 0 for PARSES_PER_WORKER per worker
+    profile - add each report's DXDiagFile.metrics to its result
+    cacheFolder - reuse and save parsed results in this ReportCache folder
+    refreshTimeout - seconds to wait on a driver table refresh, see RefreshDriverTablesAsync()
+    checkForUpdates - check for newer driver decode data on the first parse and every UPDATE_CHECK_INTERVAL after
+    executor - an executor to parse in instead of starting a pool; it is left running by Close()
+    """
+    self.__workerCount = workerCount if workerCount > 0 else (os.cpu_count() or 1)
+    self.__maxConcurrent = maxConcurrent if maxConcurrent > 0 else self.__workerCount * PARSES_PER_WORKER
+    self.__profile = profile
+    self.__cacheFolder = cacheFolder
+    self.__cacheMaxBytes = cacheMaxBytes
+    self.__refreshTimeout = refreshTimeout
+    self.__checkForUpdates = checkForUpdates
+    self.__nextUpdateCheck = 0.0
+    self.__refreshTask = None
+    self.__parseSlots = None
+    self.__warmTables = None
+    self.__ownExecutor = executor is None
+    if executor is not None:
+      self.__executor = executor
+    elif useThreads:
+      self.__executor = ThreadPoolExecutor(max_workers=self.__workerCount, thread_name_prefix="DXDiagParse")
+    else:
+      self.__executor = ProcessPoolExecutor(max_workers=self.__workerCount, initializer=StartWorker)
+    self.__useThreads = useThreads or not isinstance(self.__executor, ProcessPoolExecutor)
+    self.__closed = False
+  # end __init__()
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, excType, excValue, traceback) -> None:
+    await self.Close()
+
+  async def __RunInPool(self, function, *args):
+    """
+    Run function(*args) in the pool once a parse slot is free, returning its result
+    """
+    if self.__closed:
+      raise RuntimeError("AsyncReportParser is closed")
+    loop = asyncio.get_running_loop()
+    if self.__parseSlots is None:
+      # made on first use, inside the loop that uses it
+      self.__parseSlots = asyncio.Semaphore(self.__maxConcurrent)
+    self.__CheckForUpdates()
+    async with self.__parseSlots:
+      if self.__useThreads:
+        # worker processes load the tables as they start; threads share this process's registry
+        if self.__warmTables is None:
+          self.__warmTables = loop.run_in_executor(self.__executor, WarmDriverTables)
+        await asyncio.shield(self.__warmTables)
+      return await loop.run_in_executor(self.__executor, functools.partial(function, *args))
+  # end __RunInPool()
+
+  def __CheckForUpdates(self) -> None:
+    """
+    Start a driver table refresh in the background once every UPDATE_CHECK_INTERVAL
+    """
+    if not self.__checkForUpdates or driverTableUpdater.offline or time.monotonic() < self.__nextUpdateCheck:
+      return
+    self.__nextUpdateCheck = time.monotonic() + UPDATE_CHECK_INTERVAL
+    # keep a reference so the task isn't dropped before it finishes
+    self.__refreshTask = asyncio.create_task(self.RefreshDriverTables())
+  # end __CheckForUpdates()
+
+  async def Parse(self, reportName: str, reportBytes: bytes = None, reportStream=None):
+    """
+    Parse one report and return its ParseReport() result
+    reportName - path to a DxDiag.txt report, or just the report's name when reportBytes or reportStream is given
+    reportBytes - the raw report, in any encoding the file could be in, such as an upload
+    reportStream - a stream to read the raw report from first, see ReadReportStream()
+    """
+    if reportStream is not None:
+      reportBytes = await ReadReportStream(reportStream)
+    if reportBytes is not None:
+      reportBytes = bytes(reportBytes)
+    return await self.__RunInPool(ParseReport, reportName, False, self.__profile, self.__cacheFolder,
+                                  self.__cacheMaxBytes, reportBytes)
+  # end Parse()
+
+  async def ParseFile(self, fileName: str):
+    """
+    Parse a report file, or every report in a .zip, .gz or .xz archive, returning a list of ParseReport() results
+    """
+    return await self.__RunInPool(ParseReportFile, fileName, False, self.__profile, self.__cacheFolder,
+                                  self.__cacheMaxBytes)
+  # end ParseFile()
+
+  async def AsCompleted(self, reportInputs):
+    """
+    Parse many reports, yielding each ParseReport() result as soon as it finishes, in no particular order
+    reportInputs - an iterable or async iterable of report file names, which may be archives,
+                   and (reportName, reportBytes) pairs
+    Inputs are taken as parse slots free up, so a long or endless async iterable is fine
+    """
+    pendingTasks = set()
+    if hasattr(reportInputs, "__aiter__"):
+      inputIterator = reportInputs.__aiter__()
+      NextInput = inputIterator.__anext__
+    else:
+      inputIterator = iter(reportInputs)
+
+      async def NextInput():
+        try:
+          return next(inputIterator)
+        except StopIteration:
+          raise StopAsyncIteration from None
+
+    inputsLeft = True
+    try:
+      while inputsLeft or len(pendingTasks) > 0:
+        # keep a parse waiting behind each running one, so a slot never sits idle between results
+        while inputsLeft and len(pendingTasks) < self.__maxConcurrent * 2:
+          try:
+            reportInput = await NextInput()
+          except StopAsyncIteration:
+            inputsLeft = False
+            break
+          if isinstance(reportInput, tuple):
+            pendingTasks.add(asyncio.create_task(self.Parse(reportInput[0], reportInput[1])))
+          else:
+            pendingTasks.add(asyncio.create_task(self.ParseFile(reportInput)))
+        # end while inputsLeft
+        if len(pendingTasks) == 0:
+          break
+        doneTasks, pendingTasks = await asyncio.wait(pendingTasks, return_when=asyncio.FIRST_COMPLETED)
+        for doneTask in doneTasks:
+          taskResult = doneTask.result()
+          if isinstance(taskResult, list):
+            for report in taskResult:
+              yield report
+          else:
+            yield taskResult
+      # end while inputsLeft or pendingTasks
+    finally:
+      # the caller stopped early or was cancelled; parses already in a worker still finish there
+      for pendingTask in pendingTasks:
+        pendingTask.cancel()
+  # end AsCompleted()
+
+  async def RefreshDriverTables(self, force: bool = False):
+    """
+    Check for newer driver decode tables, waiting at most refreshTimeout seconds, see RefreshDriverTablesAsync()
+    Workers pick up a replaced table the next time they decode a driver
+    """
+    return await RefreshDriverTablesAsync(self.__refreshTimeout, force)
+  # end RefreshDriverTables()
+
+  async def Close(self) -> None:
+    """
+    Wait for the parses in progress and stop the pool, without blocking the event loop
+    """
+    if self.__closed:
+      return
+    self.__closed = True
+    if self.__refreshTask is not None and not self.__refreshTask.done():
+      self.__refreshTask.cancel()
+    if self.__ownExecutor:
+      await asyncio.get_running_loop().run_in_executor(None, self.__executor.shutdown)
+  # end Close()
+
+  @property
+  def closed(self) -> bool:
+    return self.__closed
+
+  @property
+  def maxConcurrent(self) -> int:
+    return self.__maxConcurrent
+# end class AsyncReportParser
@@ -0,0 +1,279 @@
+#/usr/bin/python3
+# dxdiagbatch.py
+# parse many DXDiag report files at once over a pool of worker processes
+# by Derek French
+# v0.8
+# 0.8 - an archive member looked up in the cache is read only up to the report size limit
+# 0.7 - pool workers start through StartWorker() like the server's; an early stop cancels the chunks not yet started
+# 0.6 - reports inside .zip, .gz and .xz archives are parsed straight from the archive, tagged with archive and member
+# 0.5 - ParseReport() can parse report bytes already in memory; moved the long-lived worker setup here
+# 0.4 - reports can be looked up in and saved to a ReportCache folder instead of always being parsed
+# 0.3 - added profile, which adds each report's DXDiagFile.metrics to its result
+# 0.2 - results can be yielded as each chunk of reports finishes; added NDJSON output
+# 0.1 - batch parsing of directories, globs and file lists
+
+# imports
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from dxdiagcache import CACHE_MAXBYTES, HashReportFile, OpenReportCache
+from dxdiagfile import DefaultParseLimits, DXDiagFile, ReadLimitedBytes
+from drivertables import driverTableRegistry, DRIVER_TABLES
+import fnmatch
+import glob
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import signal
+import time
+import zipfile
+
+# constants
+REPORT_PATTERN = "*.txt"
+CHUNKS_PER_WORKER = 4
+ARCHIVE_EXTENSIONS = (".zip", ".gz", ".xz")
+# folder of the resource forks macOS adds when zipping, which look like reports but aren't
+ARCHIVE_SKIPFOLDER = "__MACOSX/"
+
+# functions
+def ExpandReportPaths(reportInputs, reportPattern: str = REPORT_PATTERN):
+  """
+  turn a list of files, directories and glob patterns into a list of report file names
+  directories are searched recursively for files matching reportPattern
+  names that match nothing are passed through so they are reported as not found
+  """
+  reportFileNames = []
+  seenFileNames = set()
+  for reportInput in reportInputs:
+    if os.path.isdir(reportInput):
+      foundFileNames = []
+      for folder, _, fileNames in os.walk(reportInput):
+        for fileName in fileNames:
+          if fnmatch.fnmatch(fileName.lower(), reportPattern.lower()):
+            foundFileNames.append(os.path.join(folder, fileName))
+      foundFileNames.sort()
+    elif glob.has_magic(reportInput):
+      foundFileNames = sorted(glob.glob(reportInput, recursive=True))
+      foundFileNames = [fileName for fileName in foundFileNames if os.path.isfile(fileName)]
+    else:
+      foundFileNames = [reportInput]
+    for fileName in foundFileNames:
+      if fileName not in seenFileNames:
+        seenFileNames.add(fileName)
+        reportFileNames.append(fileName)
+  return reportFileNames
+# end ExpandReportPaths()
+
+def IsReportArchive(fileName: str) -> bool:
+  """
+  Return True if fileName is a .zip, .gz or .xz archive of reports, going by its extension
+  """
+  return fileName.lower().endswith(ARCHIVE_EXTENSIONS)
+# end IsReportArchive()
+
+def IterArchiveMembers(archiveName: str, reportPattern: str = REPORT_PATTERN):
+  """
+  yield (memberName, binary file object) for each report in a .zip, .gz or .xz archive, read straight from the archive
+  a .zip can hold any number of reports, picked out by reportPattern like the files of a directory;
+  a .gz or .xz holds the one report named by dropping the extension
+  each file object is closed once the next member is asked for
+  """
+  if archiveName.lower().endswith(".zip"):
+    with zipfile.ZipFile(archiveName) as reportArchive:
+      for memberInfo in reportArchive.infolist():
+        if memberInfo.is_dir() or memberInfo.filename.startswith(ARCHIVE_SKIPFOLDER):
+          continue
+        if not fnmatch.fnmatch(os.path.basename(memberInfo.filename).lower(), reportPattern.lower()):
+          continue
+        with reportArchive.open(memberInfo) as memberFile:
+          yield memberInfo.filename, memberFile
+    return
+  openArchive = gzip.open if archiveName.lower().endswith(".gz") else lzma.open
+  # "DxDiag.gz" is as likely as "DxDiag.txt.gz", so the name isn't checked against reportPattern
+  memberName = os.path.basename(archiveName)[:-3]
+  with openArchive(archiveName, "rb") as memberFile:
+    yield memberName, memberFile
+# end IterArchiveMembers()
+
+def ReadFileList(fileListName: str):
+  """
+  Return the report file names listed one per line in fileListName, skipping blank lines
+  """
+  with open(fileListName, "r") as fh:
+    return [line.strip() for line in fh if line.strip() != ""]
+# end ReadFileList()
+
+def ParseReport(fileName: str, streaming: bool = False, profile: bool = False,
+                cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES, reportBytes: bytes = None,
+                reportFile=None):
+  """
+  Parse one report file and return DXDiagFile.ToDict() with an added "error" entry
+  "error" is "" on success; anything that goes wrong is recorded there instead of raised
+  profile - also add DXDiagFile.metrics as a "metrics" entry
+  cacheFolder - look the report up in this ReportCache folder first, and save it there once parsed
+  reportBytes - parse these bytes, such as an upload, instead of reading fileName, which just names the report
+  reportFile - parse the report from this open binary file object, such as an archive member, instead of reading fileName
+  """
+  try:
+    cacheKey = None
+    if cacheFolder is not None and (reportBytes is not None or reportFile is not None or os.path.isfile(fileName)):
+      lookupStart = time.perf_counter()
+      if reportFile is not None:
+        # the cache key is a hash of the report, so it has to be read in first; past the size limit plus
+        # one byte nothing more is parsed, so nothing more is hashed either
+        reportBytes = ReadLimitedBytes(reportFile, DefaultParseLimits().maxReportBytes)
+        reportFile = None
+      reportCache = OpenReportCache(cacheFolder, cacheMaxBytes)
+      if reportBytes is not None:
+        reportHash, byteCount = hashlib.sha256(reportBytes).hexdigest(), len(reportBytes)
+      else:
+        reportHash, byteCount = HashReportFile(fileName)
+      cacheKey = reportCache.ReportKey(reportHash)
+      report = reportCache.Get(cacheKey)
+      lookupSeconds = time.perf_counter() - lookupStart
+      if report is not None:
+        # the same bytes may have been cached under another file name
+        report["filename"] = fileName
+        report["error"] = ""
+        if profile:
+          report["metrics"] = {
+            "timings": {"cacheLookup": lookupSeconds},
+            "sectionTimings": {},
+            "counters": {"bytesRead": byteCount, "linesScanned": 0}
+          }
+        return report
+    dxDiag = DXDiagFile(fileName, streaming, reportBytes=reportBytes, reportFile=reportFile)
+    report = dxDiag.ToDict()
+    if cacheKey is not None and report["valid"] is True:
+      reportCache.Put(cacheKey, report)
+    if profile:
+      report["metrics"] = dxDiag.metrics
+      if cacheKey is not None:
+        report["metrics"]["timings"]["cacheLookup"] = lookupSeconds
+  except Exception as parseError:
+    reportFound = reportBytes is not None or reportFile is not None or os.path.exists(fileName)
+    report = {"filename": fileName, "found": reportFound, "valid": False}
+    report["error"] = f"{type(parseError).__name__}: {parseError}"
+    return report
+  if report["found"] is False:
+    report["error"] = "report file not found"
+  elif report["valid"] is False:
+    report["error"] = "failed to read report file; check report file encoding"
+  else:
+    report["error"] = ""
+  return report
+# end ParseReport()
+
+def ParseArchive(archiveName: str, streaming: bool = False, profile: bool = False,
+                 cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES, reportPattern: str = REPORT_PATTERN):
+  """
+  Parse every report in a .zip, .gz or .xz archive without extracting it, returning a list of ParseReport() results
+  each result gets "archive" and "member" entries, and a "filename" of the two joined with "/"
+  an archive that can't be read, or has no reports in it, gives one failed result with an empty "member"
+  """
+  reports = []
+  archiveError = ""
+  try:
+    for memberName, memberFile in IterArchiveMembers(archiveName, reportPattern):
+      report = ParseReport(f"{archiveName}/{memberName}", streaming, profile, cacheFolder, cacheMaxBytes,
+                           reportFile=memberFile)
+      report["archive"] = archiveName
+      report["member"] = memberName
+      reports.append(report)
+  except Exception as readError:
+    archiveError = f"{type(readError).__name__}: {readError}"
+  if archiveError == "" and len(reports) == 0:
+    archiveError = f"no reports matching {reportPattern} in archive"
+  if archiveError != "":
+    report = {"filename": archiveName, "found": os.path.exists(archiveName), "valid": False, "error": archiveError}
+    report["archive"] = archiveName
+    report["member"] = ""
+    reports.append(report)
+  return reports
+# end ParseArchive()
+
+def ParseReportFile(fileName: str, streaming: bool = False, profile: bool = False,
+                    cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES):
+  """
+  Parse a report file, or every report in an archive, returning a list of ParseReport() results
+  """
+  if IsReportArchive(fileName) and os.path.isfile(fileName):
+    return ParseArchive(fileName, streaming, profile, cacheFolder, cacheMaxBytes)
+  return [ParseReport(fileName, streaming, profile, cacheFolder, cacheMaxBytes)]
+# end ParseReportFile()
+
+def WarmDriverTables() -> None:
+  """
+  Load every driver decode table and release index, so a worker's first report doesn't pay for it
+  """
+  for vendorName in DRIVER_TABLES:
+    driverTableRegistry.GetTable(vendorName)
+    driverTableRegistry.GetReleaseIndex(vendorName)
+# end WarmDriverTables()
+
+def StartWorker() -> None:
+  """
+  Set up a long-lived worker process: Ctrl+C reaches the whole process group, but shutting down is
+  left to the process that owns the pool, so workers ignore SIGINT and finish the report they are on
+  """
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  WarmDriverTables()
+# end StartWorker()
+
+def ParseReportChunk(fileNames, streaming: bool = False, profile: bool = False,
+                     cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES):
+  """
+  Parse a list of report files in one worker call, returning the list of ParseReport() results
+  """
+  reports = []
+  for fileName in fileNames:
+    reports.extend(ParseReportFile(fileName, streaming, profile, cacheFolder, cacheMaxBytes))
+  return reports
+# end ParseReportChunk()
+
+def ParseReports(fileNames, workerCount: int = 0, streaming: bool = False, ordered: bool = True, profile: bool = False,
+                 cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES):
+  """
+  Parse report files over workerCount processes, yielding each ParseReport() result
+  an archive yields a result for each report in it, see ParseArchive()
+  workerCount - number of worker processes; 0 uses one per CPU, 1 parses in this process
+  ordered - yield in fileNames order; otherwise yield each chunk of results as soon as it finishes
+  profile - add each report's DXDiagFile.metrics to its result
+  cacheFolder - ReportCache folder shared by every worker, None for no cache
+  """
+  if workerCount <= 0:
+    workerCount = os.cpu_count() or 1
+  workerCount = min(workerCount, len(fileNames))
+  if workerCount <= 1:
+    for fileName in fileNames:
+      yield from ParseReportFile(fileName, streaming, profile, cacheFolder, cacheMaxBytes)
+    return
+  # hand each worker a few chunks of files so the pool is not dominated by per-file messaging
+  chunkSize = max(1, len(fileNames) // (workerCount * CHUNKS_PER_WORKER))
+  executor = ProcessPoolExecutor(max_workers=workerCount, initializer=StartWorker)
+  try:
+    if ordered:
+      fileCount = len(fileNames)
+      for reports in executor.map(ParseReportFile, fileNames, [streaming] * fileCount, [profile] * fileCount,
+                                  [cacheFolder] * fileCount, [cacheMaxBytes] * fileCount, chunksize=chunkSize):
+        yield from reports
+      return
+    chunkFutures = []
+    for chunkStart in range(0, len(fileNames), chunkSize):
+      chunkFutures.append(executor.submit(ParseReportChunk, fileNames[chunkStart:chunkStart + chunkSize], streaming, profile,
+                                          cacheFolder, cacheMaxBytes))
+    for chunkFuture in as_completed(chunkFutures):
+      yield from chunkFuture.result()
+  finally:
+    # workers ignore Ctrl+C, so drop the chunks not started yet; the ones in progress still finish
+    executor.shutdown(wait=True, cancel_futures=True)
+# end ParseReports()
+
+def WriteJSONRecord(report, outputFile) -> None:
+  """
+  Write one report as a single line of JSON (an NDJSON record) and flush it
+  so a downstream reader sees each report as soon as it is done
+  """
+  outputFile.write(json.dumps(report, ensure_ascii=False) + "\n")
+  outputFile.flush()
+# end WriteJSONRecord()
@@ -0,0 +1,250 @@
+#/usr/bin/python3
+# dxdiagcache.py
+# on-disk cache of parsed DXDiag reports, keyed by the report bytes and the driver decode tables
+# by Derek French
+# v0.5
+# 0.5 - CACHE_FORMAT 4; the parse limits in effect are part of the cache key
+# 0.4 - fields added with dxdiagfile.RegisterField() are part of the cache key
+# 0.3 - CACHE_FORMAT 3, for the diagnostics now in DXDiagFile.ToDict()
+# 0.2 - CACHE_FORMAT 2, for the fingerprint now in DXDiagFile.ToDict()
+# 0.1 - content-addressed cache of DXDiagFile.ToDict() results with size-bounded LRU eviction
+
+# imports
+from drivertables import driverTableRegistry, DRIVER_TABLES
+from dxdiagfile import DefaultParseLimits, fieldSchema
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+# constants
+CACHE_FOLDER = "dxdiagCache"
+CACHE_MAXBYTES = 64 * 1024 * 1024
+CACHE_EXTENSION = ".json.z"
+# bump when the shape or content of DXDiagFile.ToDict() changes, so older entries stop matching
+CACHE_FORMAT = 4
+CACHE_READSIZE = 1024 * 1024
+
+# functions
+def HashReportFile(fileName: str):
+  """
+  Return the (SHA-256 hex digest, size in bytes) of a report file
+  """
+  reportHash = hashlib.sha256()
+  byteCount = 0
+  with open(fileName, "rb") as fh:
+    while True:
+      reportBytes = fh.read(CACHE_READSIZE)
+      if not reportBytes:
+        break
+      reportHash.update(reportBytes)
+      byteCount += len(reportBytes)
+  return reportHash.hexdigest(), byteCount
+# end HashReportFile()
+
+def DriverTablesKey() -> str:
+  """
+  Return a string that changes whenever any driver decode table file changes
+  """
+  tableKeys = []
+  for vendorName in sorted(DRIVER_TABLES):
+    tableKeys.append(f"{vendorName}={driverTableRegistry.GetTableKey(vendorName)!r}")
+  return ";".join(tableKeys)
+# end DriverTablesKey()
+
+class ReportCache:
+  """
+  Keeps parsed reports on disk as zlib-compressed JSON, one file per entry, named by a hash of
+  the report bytes, the driver decode table file stamps and versions, the parse limits, any registered fields
+  and CACHE_FORMAT.
+  A changed decode table gives every report a new key, so stale entries are never returned;
+  they are simply never used again and age out.
+  The least recently used entries are removed once the folder holds more than maxBytes.
+  Several processes can share one folder; each keeps its own view of the folder size, so the
+  limit is only approximate while they run.
+  """
+
+  def __init__(self, folder: str = CACHE_FOLDER, maxBytes: int = CACHE_MAXBYTES) -> None:
+    """
+    folder - folder holding the cache entries, created if missing
+    maxBytes - size the folder is trimmed back to, least recently used entries first
+    """
+    self.__folder = folder
+    self.__maxBytes = maxBytes
+    self.__lock = threading.Lock()
+    self.__hits = 0
+    self.__misses = 0
+    self.__evictions = 0
+    os.makedirs(self.__folder, exist_ok=True)
+    # entry file name -> size, least recently used first; dicts keep insertion order
+    self.__entries = {}
+    self.__totalBytes = 0
+    with self.__lock:
+      self.__ScanFolder()
+      self.__Evict()
+  # end __init__()
+
+  def __ScanFolder(self) -> None:
+    """
+    Rebuild the entry list from the folder, using each file's modification time as its last use
+    """
+    foundEntries = []
+    with os.scandir(self.__folder) as folderEntries:
+      for folderEntry in folderEntries:
+        if folderEntry.name.endswith(CACHE_EXTENSION) and folderEntry.is_file():
+          entryStat = folderEntry.stat()
+          foundEntries.append((entryStat.st_mtime_ns, folderEntry.name, entryStat.st_size))
+    foundEntries.sort()
+    self.__entries = {entryName: entrySize for _, entryName, entrySize in foundEntries}
+    self.__totalBytes = sum(self.__entries.values())
+  # end __ScanFolder()
+
+  def ReportKey(self, reportHash: str) -> str:
+    """
+    Return the cache key for a report with the SHA-256 hex digest reportHash under the current decode tables,
+    parse limits and registered fields
+    """
+    # a report parsed under tighter limits keeps less of itself, so it mustn't answer for one parsed under looser ones
+    parseLimits = DefaultParseLimits()
+    keySource = (f"{CACHE_FORMAT}|{reportHash}|{DriverTablesKey()}|{parseLimits.maxReportBytes},"
+                 f"{parseLimits.maxLineChars},{parseLimits.maxSectionLines}")
+    if fieldSchema.schemaKey != "":
+      keySource += f"|{fieldSchema.schemaKey}"
+    return hashlib.sha256(keySource.encode("utf-8")).hexdigest()
+  # end ReportKey()
+
+  def Get(self, cacheKey: str):
+    """
+    Return the cached report dictionary for cacheKey, or None when there isn't one
+    """
+    entryName = cacheKey + CACHE_EXTENSION
+    entryPath = os.path.join(self.__folder, entryName)
+    try:
+      with open(entryPath, "rb") as fh:
+        report = json.loads(zlib.decompress(fh.read()))
+      # mark it as just used, for this process and any other sharing the folder
+      os.utime(entryPath)
+    except (OSError, ValueError, zlib.error):
+      with self.__lock:
+        self.__misses += 1
+        self.__Forget(entryName)
+      return None
+    with self.__lock:
+      self.__hits += 1
+      entrySize = self.__entries.pop(entryName, None)
+      if entrySize is None:
+        # written by another process
+        entrySize = os.path.getsize(entryPath)
+        self.__totalBytes += entrySize
+      self.__entries[entryName] = entrySize
+    return report
+  # end Get()
+
+  def Put(self, cacheKey: str, report) -> None:
+    """
+    Store the report dictionary under cacheKey, then trim the folder back to maxBytes
+    A cache that can't be written to is not an error; the report just isn't cached
+    """
+    entryName = cacheKey + CACHE_EXTENSION
+    entryPath = os.path.join(self.__folder, entryName)
+    entryBytes = zlib.compress(json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    newEntryPath = f"{entryPath}.{os.getpid()}.{threading.get_ident()}.new"
+    try:
+      with open(newEntryPath, "wb") as fh:
+        fh.write(entryBytes)
+      os.replace(newEntryPath, entryPath)
+    except OSError:
+      try:
+        os.remove(newEntryPath)
+      except OSError:
+        pass
+      return
+    with self.__lock:
+      self.__Forget(entryName)
+      self.__entries[entryName] = len(entryBytes)
+      self.__totalBytes += len(entryBytes)
+      self.__Evict()
+  # end Put()
+
+  def __Forget(self, entryName: str) -> None:
+    """
+    Drop entryName from the entry list; call with the lock held
+    """
+    entrySize = self.__entries.pop(entryName, None)
+    if entrySize is not None:
+      self.__totalBytes -= entrySize
+  # end __Forget()
+
+  def __Evict(self) -> None:
+    """
+    Remove least recently used entries until the folder is within maxBytes; call with the lock held
+    """
+    while self.__totalBytes > self.__maxBytes and len(self.__entries) > 1:
+      entryName = next(iter(self.__entries))
+      self.__Forget(entryName)
+      try:
+        os.remove(os.path.join(self.__folder, entryName))
+        self.__evictions += 1
+      except OSError:
+        # already gone, removed by another process
+        pass
+  # end __Evict()
+
+  def Clear(self) -> None:
+    """
+    Remove every cache entry
+    """
+    with self.__lock:
+      self.__ScanFolder()
+      for entryName in list(self.__entries):
+        try:
+          os.remove(os.path.join(self.__folder, entryName))
+        except OSError:
+          pass
+      self.__entries = {}
+      self.__totalBytes = 0
+  # end Clear()
+
+  @property
+  def entryCount(self) -> int:
+    """
+    Return the number of entries this cache knows of
+    """
+    return len(self.__entries)
+
+  @property
+  def folder(self) -> str:
+    """
+    Return the cache folder
+    """
+    return self.__folder
+
+  @property
+  def stats(self):
+    """
+    Return a dictionary of this cache's hits, misses and evictions, and the bytes it holds
+    """
+    return {
+      "hits": self.__hits,
+      "misses": self.__misses,
+      "evictions": self.__evictions,
+      "totalBytes": self.__totalBytes
+    }
+# end class ReportCache
+
+# one cache per folder per process, so batch workers don't rescan the folder for every report
+reportCaches = {}
+reportCachesLock = threading.Lock()
+
+def OpenReportCache(folder: str = CACHE_FOLDER, maxBytes: int = CACHE_MAXBYTES):
+  """
+  Return this process's ReportCache for folder, creating it on first use
+  """
+  with reportCachesLock:
+    reportCache = reportCaches.get(folder)
+    if reportCache is None:
+      reportCache = ReportCache(folder, maxBytes)
+      reportCaches[folder] = reportCache
+    return reportCache
+# end OpenReportCache()
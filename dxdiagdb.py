@@ -0,0 +1,503 @@
+#/usr/bin/python3
+# dxdiagdb.py
+# SQLite archive of parsed DXDiag reports, filled incrementally and queried through indexes
+# by Derek French
+# v0.4
+# 0.4 - the same file named twice counts once; driver versions with a part over VERSIONKEY_DIGITS digits get no key
+# 0.3 - ingest waits up to UPDATE_TIMEOUT seconds for a driver decode data check under way before exiting
+# 0.2 - files that can't be looked at are counted as unreadable instead of as failed reports; --offline reaches
+#       the parse workers
+# 0.1 - files, reports, systems, displays, drives, sound devices and notes tables; bulk incremental ingest and a query CLI
+
+# imports
+from datetime import datetime, timedelta
+from drivertables import driverTableUpdater, GoOffline, UPDATE_TIMEOUT, VersionTuple
+from dxdiagbatch import ExpandReportPaths, ParseReports, ReadFileList
+from dxdiagcache import CACHE_MAXBYTES
+from dxdiagfleet import CardVendor, OSBuild
+from dxdiagrecords import Drive, SystemInfo, VideoDisplay
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+# constants
+DATABASE_FILE = "dxdiag.db"
+# PRAGMA user_version of the tables below; bump when they change
+SCHEMA_VERSION = 1
+# reports written per transaction while ingesting
+INGEST_BATCHSIZE = 500
+# "Time of this report:" as DxDiag writes it in different locales, e.g. "12/3/2023, 00:00:00"
+REPORT_TIME_FORMATS = (
+  "%m/%d/%Y, %H:%M:%S",
+  "%d.%m.%Y, %H:%M:%S",
+  "%Y-%m-%d, %H:%M:%S",
+  "%Y/%m/%d, %H:%M:%S",
+  "%A, %B %d, %Y, %H:%M:%S"
+)
+# reportDate is stored as text in this form, so it sorts and compares as a date
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# digits each part of a driver version is padded to in driverVersionKey, so the keys sort as text; Windows file
+# versions are four 16-bit numbers, so five digits hold any real one
+VERSIONKEY_DIGITS = 5
+
+# functions
+def RecordColumns(recordType):
+  """
+  Return a dictionary of column name to SQLite type for the fields of a DXDiagRecord type
+  """
+  return {fieldName: "TEXT" if isinstance(defaultValue, str) else "INTEGER"
+          for fieldName, defaultValue in recordType.FIELDS.items()}
+# end RecordColumns()
+
+# columns of each table, in insert order; the systems, displays and drives columns follow their records
+TABLE_COLUMNS = {
+  "files": {"fileId": "INTEGER PRIMARY KEY", "filename": "TEXT NOT NULL UNIQUE", "fileSize": "INTEGER",
+            "fileModified": "INTEGER", "ingestTime": "TEXT", "reportCount": "INTEGER", "failedCount": "INTEGER",
+            "error": "TEXT"},
+  "reports": {"reportId": "INTEGER PRIMARY KEY",
+              "fileId": "INTEGER NOT NULL REFERENCES files(fileId) ON DELETE CASCADE",
+              "filename": "TEXT", "fingerprint": "TEXT", "reportDate": "TEXT", "dxErrorCount": "INTEGER",
+              "diagnostics": "TEXT"},
+  "systems": {"reportId": "INTEGER PRIMARY KEY REFERENCES reports(reportId) ON DELETE CASCADE",
+              **RecordColumns(SystemInfo), "osBuild": "TEXT"},
+  "displays": {"reportId": "INTEGER NOT NULL REFERENCES reports(reportId) ON DELETE CASCADE",
+               "displayNumber": "INTEGER", **RecordColumns(VideoDisplay), "vendor": "TEXT",
+               "driverVersionKey": "TEXT"},
+  "drives": {"reportId": "INTEGER NOT NULL REFERENCES reports(reportId) ON DELETE CASCADE",
+             "driveNumber": "INTEGER", **RecordColumns(Drive)},
+  "soundDevices": {"reportId": "INTEGER NOT NULL REFERENCES reports(reportId) ON DELETE CASCADE",
+                   "deviceNumber": "INTEGER", "description": "TEXT"},
+  "dxNotes": {"reportId": "INTEGER NOT NULL REFERENCES reports(reportId) ON DELETE CASCADE",
+              "noteNumber": "INTEGER", "note": "TEXT"}
+}
+# the numbered tables are keyed on (reportId, number), which also serves the cascading deletes
+TABLE_KEYS = {
+  "displays": "displayNumber",
+  "drives": "driveNumber",
+  "soundDevices": "deviceNumber",
+  "dxNotes": "noteNumber"
+}
+# the columns queries filter and sort on
+TABLE_INDEXES = (
+  ("reports", ("fileId",)),
+  ("reports", ("fingerprint", "reportDate")),
+  ("reports", ("reportDate",)),
+  ("reports", ("dxErrorCount",)),
+  ("systems", ("machineName",)),
+  ("systems", ("osBuild",)),
+  ("displays", ("vendor", "driverVersionKey")),
+  ("displays", ("cardName",)),
+  ("displays", ("driverVersionRaw",))
+)
+
+def SchemaStatements():
+  """
+  Return the CREATE TABLE and CREATE INDEX statements of the archive
+  """
+  schemaStatements = []
+  for tableName, tableColumns in TABLE_COLUMNS.items():
+    columnDefinitions = [f"{columnName} {columnType}" for columnName, columnType in tableColumns.items()]
+    if tableName in TABLE_KEYS:
+      columnDefinitions.append(f"PRIMARY KEY (reportId, {TABLE_KEYS[tableName]})")
+    schemaStatements.append(f"CREATE TABLE IF NOT EXISTS {tableName} ({', '.join(columnDefinitions)})")
+  for tableName, indexColumns in TABLE_INDEXES:
+    indexName = f"{tableName}_{'_'.join(indexColumns)}"
+    schemaStatements.append(f"CREATE INDEX IF NOT EXISTS {indexName} ON {tableName} ({', '.join(indexColumns)})")
+  return schemaStatements
+# end SchemaStatements()
+
+def InsertStatement(tableName: str) -> str:
+  """
+  Return the INSERT statement for a row of every column of tableName
+  """
+  tableColumns = TABLE_COLUMNS[tableName]
+  return f"INSERT INTO {tableName} ({', '.join(tableColumns)}) VALUES ({', '.join('?' * len(tableColumns))})"
+# end InsertStatement()
+
+def ReportDate(reportTime: str):
+  """
+  Return a "Time of this report:" value as DATE_FORMAT text, or None if it isn't in a known format
+  """
+  for timeFormat in REPORT_TIME_FORMATS:
+    try:
+      return datetime.strptime(reportTime.strip(), timeFormat).strftime(DATE_FORMAT)
+    except ValueError:
+      continue
+  return None
+# end ReportDate()
+
+def DriverVersionKey(versionString: str):
+  """
+  Return the dotted numbers at the start of a driver version as text that sorts like the version,
+  "31.00.0015.4617 (English)" -> "00031.00000.00015.04617", or None if it doesn't start with a version
+  A trailing ".x" or ".*" is dropped, so "31.x" -> "00031", and keys below it are every 30.* version
+  A negative part or one longer than VERSIONKEY_DIGITS digits would sort wrongly as text, so that version gets None
+  """
+  numbers = versionString.strip().split(" ")[0]
+  for wildcard in (".x", ".X", ".*"):
+    if numbers.endswith(wildcard):
+      numbers = numbers[:-len(wildcard)]
+  versionTuple = VersionTuple(numbers)
+  if versionTuple is None or min(versionTuple) < 0 or max(versionTuple) >= 10 ** VERSIONKEY_DIGITS:
+    return None
+  return ".".join(f"{number:0{VERSIONKEY_DIGITS}d}" for number in versionTuple)
+# end DriverVersionKey()
+
+# classes
+class ReportDatabase:
+  """
+  Parsed reports kept in a SQLite database: one files row per report file or archive ingested, a
+  reports row per report in it, and systems, displays, drives, soundDevices and dxNotes rows for its details.
+  Ingesting again skips files whose size and modified time haven't changed, and replaces the reports
+  of those that have. Reports are written in bulk, INGEST_BATCHSIZE to a transaction, by one writer
+  at a time; any number of readers can query while it does.
+  reportDate is the report's own "Time of this report:", or the file's modified time when that can't be read.
+  """
+
+  def __init__(self, databaseFileName: str = DATABASE_FILE) -> None:
+    self.__databaseFileName = databaseFileName
+    # transactions are begun and committed explicitly
+    self.__connection = sqlite3.connect(databaseFileName, isolation_level=None)
+    self.__connection.execute("PRAGMA foreign_keys = ON")
+    self.__connection.execute("PRAGMA journal_mode = WAL")
+    self.__connection.execute("PRAGMA synchronous = NORMAL")
+    schemaVersion = self.__connection.execute("PRAGMA user_version").fetchone()[0]
+    if schemaVersion == 0:
+      self.__connection.execute("BEGIN IMMEDIATE")
+      for schemaStatement in SchemaStatements():
+        self.__connection.execute(schemaStatement)
+      self.__connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+      self.__connection.execute("COMMIT")
+    elif schemaVersion != SCHEMA_VERSION:
+      self.__connection.close()
+      raise ValueError(f"{databaseFileName} is a version {schemaVersion} report archive; this is version {SCHEMA_VERSION}")
+  # end __init__()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback) -> None:
+    self.Close()
+
+  def Close(self) -> None:
+    """
+    Close the database connection
+    """
+    self.__connection.close()
+  # end Close()
+
+  def StoredFiles(self):
+    """
+    Return a dictionary of each ingested file name to its (size, modified time in nanoseconds) when ingested
+    """
+    fileRows = self.__connection.execute("SELECT filename, fileSize, fileModified FROM files")
+    return {fileName: (fileSize, fileModified) for fileName, fileSize, fileModified in fileRows}
+  # end StoredFiles()
+
+  def AddFiles(self, fileResults) -> int:
+    """
+    Store the results of parsing some report files in one transaction, replacing anything stored for them before
+    fileResults - (file name, size, modified time in nanoseconds, list of ParseReport() results) for each file;
+                  an archive has a result per report in it
+    Only valid reports are stored; the failures are counted on the file with the first error
+    Returns the number of reports stored
+    """
+    connection = self.__connection
+    ingestTime = datetime.now().strftime(DATE_FORMAT)
+    tableRows = {tableName: [] for tableName in TABLE_COLUMNS}
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+      connection.executemany("DELETE FROM files WHERE filename = ?", [(fileResult[0],) for fileResult in fileResults])
+      # the writer holds the database, so ids can be handed out here and every table inserted in bulk
+      nextFileId = connection.execute("SELECT COALESCE(MAX(fileId), 0) + 1 FROM files").fetchone()[0]
+      nextReportId = connection.execute("SELECT COALESCE(MAX(reportId), 0) + 1 FROM reports").fetchone()[0]
+      for fileName, fileSize, fileModified, reports in fileResults:
+        failedReports = [report for report in reports if not report.get("valid")]
+        fileError = failedReports[0].get("error", "") if len(failedReports) > 0 else ""
+        tableRows["files"].append((nextFileId, fileName, fileSize, fileModified, ingestTime,
+                                   len(reports) - len(failedReports), len(failedReports), fileError))
+        fileDate = datetime.fromtimestamp(fileModified / 1e9).strftime(DATE_FORMAT)
+        for report in reports:
+          if report.get("valid"):
+            self.__AddReportRows(tableRows, nextReportId, nextFileId, report, fileDate)
+            nextReportId += 1
+        nextFileId += 1
+      # end for fileName
+      for tableName, rows in tableRows.items():
+        connection.executemany(InsertStatement(tableName), rows)
+      connection.execute("COMMIT")
+    except BaseException:
+      connection.execute("ROLLBACK")
+      raise
+    return len(tableRows["reports"])
+  # end AddFiles()
+
+  def __AddReportRows(self, tableRows, reportId: int, fileId: int, report, fileDate: str) -> None:
+    """
+    Add the rows of one DXDiagFile.ToDict() result to tableRows, a dictionary of table name to list of rows
+    """
+    systemInformation = report["systemInformation"]
+    reportDate = ReportDate(systemInformation["reportTime"]) or fileDate
+    tableRows["reports"].append((reportId, fileId, report["filename"], report.get("fingerprint", ""), reportDate,
+                                 report["dxErrorCount"], json.dumps(report.get("diagnostics", []), ensure_ascii=False)))
+    tableRows["systems"].append((reportId, *(systemInformation[fieldName] for fieldName in SystemInfo.FIELDS),
+                                 OSBuild(systemInformation["osName"])))
+    for displayNumber, cardData in enumerate(report["videoDisplays"]):
+      tableRows["displays"].append((reportId, displayNumber, *(cardData[fieldName] for fieldName in VideoDisplay.FIELDS),
+                                    CardVendor(cardData["cardManufacturer"]),
+                                    DriverVersionKey(cardData["driverVersionRaw"])))
+    for driveNumber, driveDetails in enumerate(report["drives"]):
+      tableRows["drives"].append((reportId, driveNumber, *(driveDetails[fieldName] for fieldName in Drive.FIELDS)))
+    for deviceNumber, soundDevice in enumerate(report["soundDevices"]):
+      tableRows["soundDevices"].append((reportId, deviceNumber, soundDevice))
+    for noteNumber, dxNote in enumerate(report["dxErrorNotes"]):
+      tableRows["dxNotes"].append((reportId, noteNumber, dxNote))
+  # end __AddReportRows()
+
+  def Ingest(self, reportInputs, workerCount: int = 0, streaming: bool = False, force: bool = False,
+             cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES):
+    """
+    Parse and store report files, archives, directories and glob patterns, skipping the files already
+    stored unchanged unless force is set; files are parsed over workerCount processes, see ParseReports()
+    Returns a dictionary of counts: "files" found, "unreadable" files that couldn't be looked at, "skipped"
+    as unchanged, "ingested", "reports" stored and "failed" reports
+    """
+    ingestCounts = {"files": 0, "unreadable": 0, "skipped": 0, "ingested": 0, "reports": 0, "failed": 0}
+    storedFiles = {} if force else self.StoredFiles()
+    fileStamps = {}
+    seenFiles = set()
+    for fileName in ExpandReportPaths(reportInputs):
+      # stored by full path, so the same file given another way is still skipped
+      fileName = os.path.abspath(fileName)
+      if fileName in seenFiles:
+        continue
+      seenFiles.add(fileName)
+      try:
+        fileStat = os.stat(fileName)
+      except OSError:
+        # gone or not permitted since it was listed; never parsed, so not a failed report
+        ingestCounts["unreadable"] += 1
+        continue
+      ingestCounts["files"] += 1
+      fileStamp = (fileStat.st_size, fileStat.st_mtime_ns)
+      if storedFiles.get(fileName) == fileStamp:
+        ingestCounts["skipped"] += 1
+        continue
+      fileStamps[fileName] = fileStamp
+    # end for fileName
+    fileResults = []
+    batchReportCount = 0
+    # the results of one file, an archive's included, always come one after another
+    currentFileName = None
+    currentReports = []
+    for report in ParseReports(list(fileStamps), workerCount, streaming, ordered=False,
+                               cacheFolder=cacheFolder, cacheMaxBytes=cacheMaxBytes):
+      reportFileName = report.get("archive", report["filename"])
+      if reportFileName != currentFileName:
+        if currentFileName is not None:
+          fileResults.append((currentFileName, *fileStamps[currentFileName], currentReports))
+          batchReportCount += len(currentReports)
+          if batchReportCount >= INGEST_BATCHSIZE:
+            self.__StoreBatch(fileResults, ingestCounts)
+            fileResults = []
+            batchReportCount = 0
+        currentFileName = reportFileName
+        currentReports = []
+      currentReports.append(report)
+      if not report.get("valid"):
+        ingestCounts["failed"] += 1
+    # end for report
+    if currentFileName is not None:
+      fileResults.append((currentFileName, *fileStamps[currentFileName], currentReports))
+    if len(fileResults) > 0:
+      self.__StoreBatch(fileResults, ingestCounts)
+    return ingestCounts
+  # end Ingest()
+
+  def __StoreBatch(self, fileResults, ingestCounts) -> None:
+    """
+    Store a batch of file results with AddFiles() and add them to the Ingest() counts
+    """
+    ingestCounts["reports"] += self.AddFiles(fileResults)
+    ingestCounts["ingested"] += len(fileResults)
+  # end __StoreBatch()
+
+  def Execute(self, sqlText: str, parameters=()):
+    """
+    Run one SQL statement, returning (column names, list of row tuples)
+    """
+    cursor = self.__connection.execute(sqlText, parameters)
+    columnNames = [column[0] for column in cursor.description or ()]
+    return columnNames, cursor.fetchall()
+  # end Execute()
+
+  def SelectReports(self, vendor: str = None, cardName: str = None, driverBelow: str = None, withErrors: bool = False,
+                    since: str = None, machineName: str = None, latestOnly: bool = False):
+    """
+    Return (column names, rows) of the stored reports matching every filter given, newest first
+    vendor - "NVIDIA", "AMD", "Intel" or "Other"; cardName and machineName match anywhere in the name
+    driverBelow - only displays whose raw driver version is below this one, e.g. "31.x" or "31.0.21001"
+    withErrors - only reports with DxDiag errors
+    since - only reports from this DATE_FORMAT date or time on, e.g. "2025-10-01"
+    latestOnly - only the newest report of each machine, by hardware fingerprint
+    With any display filter there is a row per matching display, with its card and driver
+    """
+    selectColumns = ["reports.filename", "systems.machineName", "reports.reportDate", "reports.dxErrorCount"]
+    conditions = []
+    parameters = []
+    withDisplays = vendor is not None or cardName is not None or driverBelow is not None
+    if vendor is not None:
+      conditions.append("displays.vendor = ?")
+      parameters.append(vendor)
+    if cardName is not None:
+      conditions.append("displays.cardName LIKE ?")
+      parameters.append(f"%{cardName}%")
+    if driverBelow is not None:
+      driverVersionKey = DriverVersionKey(driverBelow)
+      if driverVersionKey is None:
+        raise ValueError(f"not a driver version: {driverBelow}")
+      conditions.append("displays.driverVersionKey < ?")
+      parameters.append(driverVersionKey)
+    if withErrors:
+      conditions.append("reports.dxErrorCount > 0")
+    if since is not None:
+      conditions.append("reports.reportDate >= ?")
+      parameters.append(since)
+    if machineName is not None:
+      conditions.append("systems.machineName LIKE ?")
+      parameters.append(f"%{machineName}%")
+    if latestOnly:
+      conditions.append("reports.reportId IN (SELECT reportId FROM (SELECT reportId, ROW_NUMBER() OVER "
+                        "(PARTITION BY fingerprint ORDER BY reportDate DESC, reportId DESC) AS reportRank "
+                        "FROM reports) WHERE reportRank = 1)")
+    sqlText = "FROM reports JOIN systems ON systems.reportId = reports.reportId"
+    orderColumns = ["reports.reportDate DESC", "reports.filename"]
+    if withDisplays:
+      selectColumns += ["displays.cardName", "displays.driverVersionRaw", "displays.driverVersion"]
+      sqlText += " JOIN displays ON displays.reportId = reports.reportId"
+      orderColumns.append("displays.displayNumber")
+    sqlText = f"SELECT {', '.join(selectColumns)} {sqlText}"
+    if len(conditions) > 0:
+      sqlText += f" WHERE {' AND '.join(conditions)}"
+    sqlText += f" ORDER BY {', '.join(orderColumns)}"
+    return self.Execute(sqlText, parameters)
+  # end SelectReports()
+
+  @property
+  def counts(self):
+    """
+    Return a dictionary of the number of rows in each table
+    """
+    return {tableName: self.__connection.execute(f"SELECT COUNT(*) FROM {tableName}").fetchone()[0]
+            for tableName in TABLE_COLUMNS}
+
+  @property
+  def databaseFileName(self) -> str:
+    return self.__databaseFileName
+# end class ReportDatabase
+
+def PrintRows(columnNames, rows, csvOutput: bool = False) -> None:
+  """
+  Print query results as aligned columns, or as CSV with a header row
+  """
+  if csvOutput:
+    csvWriter = csv.writer(sys.stdout)
+    csvWriter.writerow(columnNames)
+    csvWriter.writerows(rows)
+    return
+  textRows = [["" if value is None else str(value) for value in row] for row in rows]
+  columnWidths = [max([len(columnName)] + [len(textRow[i]) for textRow in textRows])
+                  for i, columnName in enumerate(columnNames)]
+  print("  ".join(columnName.ljust(columnWidths[i]) for i, columnName in enumerate(columnNames)).rstrip())
+  for textRow in textRows:
+    print("  ".join(value.ljust(columnWidths[i]) for i, value in enumerate(textRow)).rstrip())
+# end PrintRows()
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="dxdiagdb.py", description="keep parsed DxDiag reports in a SQLite database and query them")
+  parser.add_argument("-d", "--database", default=DATABASE_FILE, metavar="FILE",
+    help=f"the SQLite database, defaults to {DATABASE_FILE}")
+  commands = parser.add_subparsers(dest="command", required=True)
+  ingestParser = commands.add_parser("ingest", help="parse report files and store the ones not stored yet")
+  ingestParser.add_argument("reports", nargs="*", metavar="DxDiag.txt",
+    help="DxDiag report files, .zip/.gz/.xz archives of them, directories or glob patterns")
+  ingestParser.add_argument("-l", "--file-list", metavar="LIST",
+    help="text file listing report files, one per line")
+  ingestParser.add_argument("-w", "--workers", type=int, default=0,
+    help="number of worker processes, defaults to one per CPU")
+  ingestParser.add_argument("-s", "--stream", action="store_true",
+    help="stream each report instead of loading it whole, keeping memory use low")
+  ingestParser.add_argument("--force", action="store_true",
+    help="parse and store every file again, even ones stored unchanged")
+  ingestParser.add_argument("--offline", action="store_true",
+    help="do not check GitHub for updated driver decode data")
+  ingestParser.add_argument("--cache", metavar="DIR",
+    help="reuse the parsed results kept in this cache folder by parsedxdiag.py --cache")
+  queryParser = commands.add_parser("query", help="list the stored reports matching every filter given")
+  queryParser.add_argument("--vendor", choices=("NVIDIA", "AMD", "Intel", "Other"),
+    help="only reports with a video card from this vendor")
+  queryParser.add_argument("--card", metavar="TEXT", help="only reports with a video card whose name contains TEXT")
+  queryParser.add_argument("--driver-below", metavar="VERSION",
+    help="only video cards whose raw driver version is below VERSION, e.g. 31.x")
+  queryParser.add_argument("--errors", action="store_true", help="only reports with DxDiag errors")
+  queryParser.add_argument("--since", metavar="DATE", help="only reports from DATE on, as YYYY-MM-DD")
+  queryParser.add_argument("--days", type=int, metavar="N", help="only reports from the last N days")
+  queryParser.add_argument("--machine", metavar="TEXT", help="only machines whose name contains TEXT")
+  queryParser.add_argument("--latest", action="store_true", help="only the newest report of each machine")
+  queryParser.add_argument("--count", action="store_true", help="print the number of matching rows instead of the rows")
+  queryParser.add_argument("--csv", action="store_true", help="print the rows as CSV")
+  queryParser.add_argument("--sql", metavar="SQL", help="run this SQL statement instead, ignoring the filters")
+  args = parser.parse_args()
+  if args.command == "query" and not os.path.isfile(args.database):
+    print(f"ERROR: Database [{args.database}] not found.")
+    sys.exit(1)
+  try:
+    reportDatabase = ReportDatabase(args.database)
+  except (sqlite3.DatabaseError, ValueError) as databaseError:
+    print(f"ERROR: {databaseError}")
+    sys.exit(1)
+  with reportDatabase:
+    if args.command == "ingest":
+      reportInputs = list(args.reports)
+      if args.file_list is not None:
+        reportInputs += ReadFileList(args.file_list)
+      if len(reportInputs) == 0:
+        print("ERROR: No report files given.")
+        sys.exit(1)
+      if args.offline:
+        GoOffline()
+      # start the driver decode data check once here so workers don't each repeat it
+      driverTableUpdater.StartBackgroundRefresh()
+      ingestCounts = reportDatabase.Ingest(reportInputs, args.workers, args.stream, args.force, args.cache)
+      # the check runs in a daemon thread, so give one under way a chance to finish rather than cut it off
+      driverTableUpdater.Wait(UPDATE_TIMEOUT)
+      print(f"{ingestCounts['files']} files: {ingestCounts['skipped']} unchanged, {ingestCounts['ingested']} ingested "
+            f"with {ingestCounts['reports']} reports, {ingestCounts['failed']} failed reports, "
+            f"{ingestCounts['unreadable']} unreadable files", file=sys.stderr)
+      if ingestCounts["failed"] > 0 or ingestCounts["unreadable"] > 0:
+        sys.exit(1)
+      return
+    try:
+      if args.sql is not None:
+        columnNames, rows = reportDatabase.Execute(args.sql)
+      else:
+        since = args.since
+        if args.days is not None:
+          since = (datetime.now() - timedelta(days=args.days)).strftime(DATE_FORMAT)
+        columnNames, rows = reportDatabase.SelectReports(args.vendor, args.card, args.driver_below, args.errors,
+                                                         since, args.machine, args.latest)
+    except (sqlite3.Error, ValueError) as queryError:
+      print(f"ERROR: {queryError}")
+      sys.exit(1)
+    if args.count:
+      print(len(rows))
+    else:
+      PrintRows(columnNames, rows, args.csv)
+# end main()
+
+if __name__ == "__main__":
+  main()
@@ -2,7 +2,33 @@
 # dxdiagfile.py
 # DXDiag.txt report file class
 # by Derek French
-# v0.16
+# v0.35
+# 0.35 - removed IterReportSections(), unused since streaming moved to IterReportSectionText()
+# 0.34 - reading a report within maxReportBytes only ever holds that many bytes plus one; overlong lines are cut
+#        before they count against a section, so one long line no longer hides the lines after it
+# 0.33 - System Information and Display Devices are read through a declarative field schema, looked up by the text
+#        before each line's first colon; RegisterField() adds fields; each display is filled in as its own record
+# 0.32 - reports are read within ParseLimits on size, line length and lines per section, skipping whatever is past
+#        them; sections that don't parse cleanly give partial results and diagnostics instead of exceptions
+# 0.31 - driver versions are decoded a report at a time through DecodeDriverVersions(), which remembers each
+#        distinct raw string per decode table
+# 0.30 - added fingerprint, a hash of the machine's hardware, also in ToDict()
+# 0.29 - added reportFile, to parse a report from an open binary file object such as an archive member
+# 0.28 - streaming reads the report in blocks and jumps from one "--------" line to the next, so unwanted sections
+#        are never split into lines; indexing stops once the last wanted section is found
+# 0.27 - added reportBytes, to parse a report already in memory such as an upload
+# 0.26 - system information, video displays, drives, sound devices and notes are now __slots__ records from
+#        dxdiagrecords.py that still read like the old dictionaries and strings
+# 0.25 - added metrics: time spent reading, in each section parser, assembling video info, loading driver tables
+#        and starting the update check, plus bytes read and lines scanned; also handed to an optional metricsHook
+# 0.24 - added lazy parsing, where each section is parsed on first use, and restricting parsing to a set of sections
+# 0.23 - detect the report encoding from its BOM or first bytes, so UTF-16 reports parse; large reports are decoded straight from a memory map
+# 0.22 - added driverReleasesBehind and driverClosestRelease to videoDisplays from the driver release index
+# 0.21 - driver decode tables now come from the process-wide registry in drivertables.py, loaded on first decode
+# 0.20 - moved the driver decode data update into drivertables.py; it now runs once in the background instead of in every constructor
+# 0.19 - added ToDict() for handing parsed results between processes
+# 0.18 - added a streaming parse mode that reads the report lazily and only keeps the sections it parses
+# 0.17 - index all the report sections in one pass instead of rescanning the file for each section
 # 0.16 - cleaning up code
 # 0.15 - added checking for encoding readable DxDiag.txt file format first
 # 0.14 - working on adding the decoding of Nvidia driver dates
@@ -11,16 +37,82 @@
 # 0.11 - fixing up file handling and comments
 
 # imports
-import csv
+from drivertables import driverTableRegistry, driverTableUpdater, DriverVersionKey
+from dxdiagrecords import Drive, DriverDecode, DxNote, HardwareFingerprint, SoundDevice, SystemInfo, VideoDisplay
+from collections import namedtuple
+import codecs
+import functools
+import io
+import mmap
 import os
-from urllib import request
+import threading
+import time
 
 # constants
-FILE_DRIVERSAMD = "driverDecodeAMD.csv"
-FILE_DRIVERSAMD_NEW = "driverDecodeAMD_new.csv"
-URL_DRIVERSAMDDECODE = "https://raw.githubusercontent.com/CrushBug/DXDiagParse/main/driverDecodeAMD.csv"
-FILE_DRIVERSNVIDIA = "driverDecodeNvidia.csv"
-URL_DRIVERSNVIDIADECODE = "https://raw.githubusercontent.com/CrushBug/DXDiagParse/main/driverDecodeNvidia.csv"
+# report section headers
+SECTION_SYSTEMINFORMATION = "System Information"
+SECTION_DXDIAGNOTES = "DxDiag Notes"
+SECTION_DISPLAYDEVICES = "Display Devices"
+SECTION_SOUNDDEVICES = "Sound Devices"
+SECTION_SOUNDCAPTUREDEVICES = "Sound Capture Devices"
+SECTION_DRIVES = "Disk & DVD/CD-ROM Drives"
+# section headers are framed by two lines starting with this
+SECTION_RULE = "--------"
+# byte order marks and the encodings they mean; UTF-32 is never written by DxDiag
+REPORT_BOMS = (
+  (codecs.BOM_UTF8, "utf-8-sig"),
+  (codecs.BOM_UTF16_LE, "utf-16-le"),
+  (codecs.BOM_UTF16_BE, "utf-16-be")
+)
+# encoding of reports that are neither UTF-16 nor UTF-8, as saved by DxDiag on older Western Windows
+ENCODING_LEGACY = "cp1252"
+# bytes looked at when guessing the encoding of a report without a BOM
+ENCODING_SNIFFSIZE = 4096
+# reports at least this big are decoded straight from a memory map of the file
+MMAP_THRESHOLD = 1024 * 1024
+# characters read at a time when streaming a report
+STREAM_BLOCKSIZE = 16 * 1024
+# block size for reading a report of unknown size into memory
+READ_BLOCKSIZE = 64 * 1024
+# distinct (vendor, raw driver string, decode table) results remembered by DecodeDriverVersions()
+DECODE_CACHESIZE = 4096
+# default limits on what is read of one report, so a huge, truncated or corrupt file can't run a worker out of memory;
+# real reports are a few MB, with lines of under 300 characters and a few thousand lines in the longest section
+MAX_REPORT_BYTES = 64 * 1024 * 1024
+MAX_LINE_CHARS = 1024
+MAX_SECTION_LINES = 20000
+# environment variables that override the default limits, so they also reach worker processes
+ENV_MAXREPORTBYTES = "DXDIAGPARSE_MAX_REPORT_BYTES"
+ENV_MAXLINECHARS = "DXDIAGPARSE_MAX_LINE_CHARS"
+ENV_MAXSECTIONLINES = "DXDIAGPARSE_MAX_SECTION_LINES"
+# what DXDiagFile reads of a report: bytes of the file, characters of a line and lines of a section; the rest is skipped
+ParseLimits = namedtuple("ParseLimits", ("maxReportBytes", "maxLineChars", "maxSectionLines"),
+                         defaults=(MAX_REPORT_BYTES, MAX_LINE_CHARS, MAX_SECTION_LINES))
+# codec error handler name for DropCutCharacter()
+ERRORS_CUTSHORT = "dxdiagfile.cutshort"
+# the record type filled in from the "key: value" lines of each schema section, see FieldSchema
+SECTION_RECORDTYPES = {
+  SECTION_SYSTEMINFORMATION: SystemInfo,
+  SECTION_DISPLAYDEVICES: VideoDisplay
+}
+# in a section with a record per device, the key whose line starts the next record
+SECTION_RECORDSTARTS = {
+  SECTION_DISPLAYDEVICES: "Card name"
+}
+# one field read from "key: value" lines of a section; value is the text after "key: "
+# fieldName - the record field, or a tuple of fields when converter returns a tuple of values
+# converter - turns the value text into the field value, or None to leave the field alone; the text as it is by default
+# joinWith - add the value on to the field's current value with this in between, instead of replacing it
+FieldRule = namedtuple("FieldRule", ("sectionName", "key", "fieldName", "converter", "joinWith"), defaults=(None, None))
+# the sections DXDiagFile parses, in report order
+PARSED_SECTIONS = (
+  SECTION_SYSTEMINFORMATION,
+  SECTION_DXDIAGNOTES,
+  SECTION_DISPLAYDEVICES,
+  SECTION_SOUNDDEVICES,
+  SECTION_SOUNDCAPTUREDEVICES,
+  SECTION_DRIVES
+)
 
 # functions
 def DecodeAMDDriverVersion(driverString: str, driverVersions) -> str:
@@ -73,392 +165,1019 @@ def DecodeNVIDIADriverVersion(driverString: str, driverVersions) -> str:
       decodedNVIDIAString += ' - ' + driverVersions[decodedNVIDIAString]
   return decodedNVIDIAString
 
-class DXDiagFile:
-  # shared dictionary of AMD and NVIDIA driver versions
-  __driverVersionsAMD = {}
-  __driverVersionsNVIDIA = {}
+def DriverVendor(cardManufacturer: str) -> str:
+  """
+  Return the vendor whose decode table covers a video card manufacturer, "NVIDIA", "AMD" or "" for any other
+  """
+  # Intel Corporation
+  # (Standardgrafikkartentypen)
+  # NVIDIA
+  if cardManufacturer.startswith("NVIDIA"):
+    return "NVIDIA"
+  # Advanced Micro Devices, Inc.
+  if cardManufacturer.startswith("Advanced Micro"):
+    return "AMD"
+  return ""
+# end DriverVendor()
+
+def CPUNameField(value: str) -> str:
+  """
+  Clean up (R) and (TM) and extra spaces in a CPU name, "Intel(R) Core(TM) i7" -> "Intel Core i7"
+  """
+  cpuName = value.replace('(R)', "")
+  cpuName = cpuName.replace('(TM)', "")
+  return " ".join(cpuName.split())
+# end CPUNameField()
+
+def MemorySizeFields(value: str):
+  """
+  Break a "Memory:" value down into (memoryInMB, memoryInGB), "16384MB RAM" -> (16384, 16)
+  """
+  memoryInMB = int(value[:-6])
+  return memoryInMB, round(memoryInMB / 1024)
+# end MemorySizeFields()
+
+def VideoMemoryField(value: str):
+  """
+  Return a "Dedicated Memory:" value in MB, "10067 MB" -> 10067, "n/a" -> 0, or None for anything else
+  """
+  end = value.find(" MB")
+  if end > -1:
+    return int(value[:end])
+  if value == 'n/a':
+    return 0
+  return None
+# end VideoMemoryField()
+
+def SkipValue(skippedValue: str):
+  """
+  Return a field converter that keeps every value but skippedValue, such as a "System manufacturer" placeholder
+  """
+  def KeepValue(value: str):
+    return None if value == skippedValue else value
+  return KeepValue
+# end SkipValue()
+
+# the fields DXDiagFile always reads; RegisterField() adds to them
+FIELD_SCHEMA = (
+  FieldRule(SECTION_SYSTEMINFORMATION, "Time of this report", "reportTime"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Machine name", "machineName"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Operating System", "osName"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Language", "language"),
+  # systemDetails is the manufacturer then the model, leaving out the placeholders of an unbranded board
+  FieldRule(SECTION_SYSTEMINFORMATION, "System Manufacturer", "systemDetails", SkipValue('System manufacturer')),
+  FieldRule(SECTION_SYSTEMINFORMATION, "System Model", "systemDetails", SkipValue('System Product Name'), " "),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Processor", "cpuName", CPUNameField),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Memory", "memoryString"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Memory", ("memoryInMB", "memoryInGB"), MemorySizeFields),
+  FieldRule(SECTION_SYSTEMINFORMATION, "Page File", "pageFile"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "DirectX Version", "directXVersion"),
+  FieldRule(SECTION_SYSTEMINFORMATION, "User DPI Setting", "userDPI"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Card name", "cardName"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Manufacturer", "cardManufacturer"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Dedicated Memory", "VRAM", VideoMemoryField),
+  FieldRule(SECTION_DISPLAYDEVICES, "Current Mode", "displayMode"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Monitor Name", "monitorName"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Monitor Model", "monitorModel"),
+  FieldRule(SECTION_DISPLAYDEVICES, "Driver File Version", "driverVersionRaw")
+)
+
+def RegisterField(sectionName: str, key: str, fieldName, converter=None, joinWith: str = None) -> None:
+  """
+  Read another field from the "key: value" lines of the System Information or Display Devices section,
+  see FieldRule; a name that isn't one of the record's FIELDS is added to it as an extra field, which
+  also shows up in ToDict(). Fields are registered for this process, so register them where worker
+  processes will too, such as in a module they import.
+  e.g. RegisterField(SECTION_DISPLAYDEVICES, "Feature Levels", "featureLevels", lambda value: value.split(","))
+  """
+  fieldSchema.Register(FieldRule(sectionName, key, fieldName, converter, joinWith))
+# end RegisterField()
+
+@functools.lru_cache(maxsize=DECODE_CACHESIZE)
+def _DecodeDriverVersionFor(vendorName: str, driverString: str, tableKey) -> DriverDecode:
+  """
+  Decode one driver string against vendorName's current table; tableKey is only there to key the cache on
+  """
+  try:
+    if vendorName == "NVIDIA":
+      driverVersion = DecodeNVIDIADriverVersion(driverString, driverTableRegistry.GetTable(vendorName))
+    else:
+      driverVersion = DecodeAMDDriverVersion(driverString, driverTableRegistry.GetTable(vendorName))
+  except (IndexError, ValueError):
+    # not the usual "31.00.0015.4617 (English)" form, so leave it as it is
+    driverVersion = driverString
+  # place the driver among the known releases, even when it isn't one of them
+  driverReleasesBehind = None
+  driverClosestRelease = ""
+  driverVersionKey = DriverVersionKey(vendorName, driverString)
+  if driverVersionKey is not None:
+    releaseIndex = driverTableRegistry.GetReleaseIndex(vendorName)
+    if len(releaseIndex) > 0:
+      driverReleasesBehind = releaseIndex.ReleasesBehind(driverVersionKey)
+      closestRelease = releaseIndex.ClosestBefore(driverVersionKey)
+      if closestRelease is not None:
+        driverClosestRelease = releaseIndex.DescribeRelease(closestRelease)
+  return DriverDecode(driverVersion, driverReleasesBehind, driverClosestRelease)
+# end _DecodeDriverVersionFor()
+
+def DecodeDriverVersions(driverStrings):
+  """
+  Decode many raw "Driver File Version" strings at once, returning a list of DriverDecode results in the same order
+  driverStrings - (vendorName, driverString) pairs, e.g. ("NVIDIA", "31.00.0015.4617 (English)"); a vendor
+                  of "" (see DriverVendor()) leaves the string as it is
+  Each distinct string is decoded once per decode table and remembered, up to DECODE_CACHESIZE of them,
+  so a fleet of reports with the same few drivers mostly costs dictionary lookups
+  """
+  # look up each vendor's table key once per call; it changes when the table file is updated
+  tableKeys = {}
+  driverDecodes = []
+  for vendorName, driverString in driverStrings:
+    if vendorName == "":
+      driverDecodes.append(DriverDecode(driverString, None, ""))
+      continue
+    if vendorName not in tableKeys:
+      tableKeys[vendorName] = driverTableRegistry.GetTableKey(vendorName)
+    driverDecodes.append(_DecodeDriverVersionFor(vendorName, driverString, tableKeys[vendorName]))
+  return driverDecodes
+# end DecodeDriverVersions()
+
+def DecodeDriverVersion(vendorName: str, driverString: str) -> DriverDecode:
+  """
+  Decode one raw "Driver File Version" string, see DecodeDriverVersions()
+  """
+  return DecodeDriverVersions(((vendorName, driverString),))[0]
+# end DecodeDriverVersion()
+
+def DriverDecodeStats():
+  """
+  Return a dictionary of how DecodeDriverVersions() has done in this process: "hits", "misses",
+  "hitRate" (0 to 1), "size" (results remembered) and "maxSize"
+  """
+  cacheInfo = _DecodeDriverVersionFor.cache_info()
+  lookupCount = cacheInfo.hits + cacheInfo.misses
+  return {
+    "hits": cacheInfo.hits,
+    "misses": cacheInfo.misses,
+    "hitRate": cacheInfo.hits / lookupCount if lookupCount > 0 else 0.0,
+    "size": cacheInfo.currsize,
+    "maxSize": cacheInfo.maxsize
+  }
+# end DriverDecodeStats()
+
+def ClearDriverDecodes() -> None:
+  """
+  Forget every remembered DecodeDriverVersions() result and reset DriverDecodeStats()
+  """
+  _DecodeDriverVersionFor.cache_clear()
+# end ClearDriverDecodes()
+
+def DefaultParseLimits() -> ParseLimits:
+  """
+  Return the ParseLimits a DXDiagFile gets when it isn't given any: the defaults, each overridden by a
+  positive whole number in DXDIAGPARSE_MAX_REPORT_BYTES, DXDIAGPARSE_MAX_LINE_CHARS or DXDIAGPARSE_MAX_SECTION_LINES
+  """
+  limitValues = []
+  for envName, defaultValue in ((ENV_MAXREPORTBYTES, MAX_REPORT_BYTES), (ENV_MAXLINECHARS, MAX_LINE_CHARS),
+                                (ENV_MAXSECTIONLINES, MAX_SECTION_LINES)):
+    try:
+      limitValue = int(os.environ.get(envName, defaultValue))
+    except ValueError:
+      limitValue = defaultValue
+    limitValues.append(limitValue if limitValue > 0 else defaultValue)
+  return ParseLimits(*limitValues)
+# end DefaultParseLimits()
+
+def DetectReportEncoding(headBytes: bytes, legacyEncoding: str = ENCODING_LEGACY):
+  """
+  Work out the encoding of a report from its first bytes
+  Returns (encoding, BOM length): a BOM wins; otherwise NUL bytes in every other position mean
+  UTF-16 without a BOM, text that decodes as UTF-8 is UTF-8, and anything else is legacyEncoding
+  """
+  for bom, encoding in REPORT_BOMS:
+    if headBytes.startswith(bom):
+      return encoding, len(bom)
+  sniffBytes = headBytes[:ENCODING_SNIFFSIZE]
+  if len(sniffBytes) >= 2:
+    # ASCII text in UTF-16 has a NUL as the high byte of nearly every character
+    halfLength = len(sniffBytes) // 2
+    if sniffBytes[1::2].count(0) > halfLength * 0.9:
+      return "utf-16-le", 0
+    if sniffBytes[0::2].count(0) > halfLength * 0.9:
+      return "utf-16-be", 0
+  try:
+    # the sniffed bytes may end part way through a character, so decode incrementally
+    codecs.getincrementaldecoder("utf-8")().decode(sniffBytes, final=False)
+    return "utf-8", 0
+  except UnicodeDecodeError:
+    return legacyEncoding, 0
+# end DetectReportEncoding()
+
+def ReadReportText(fileName: str, encoding: str = None, legacyEncoding: str = ENCODING_LEGACY, maxBytes: int = None):
+  """
+  Read and decode a whole report in one pass, returning (text, encoding)
+  encoding - force an encoding instead of detecting it
+  maxBytes - only read this much of the file, see DecodeReportBytes()
+  Large files are memory mapped and decoded from the map, so the raw bytes are never copied
+  Line endings are left as they are; the parser copes with both "\n" and "\r\n"
+  """
+  with open(fileName, "rb") as fh:
+    fileSize = os.fstat(fh.fileno()).st_size
+    if fileSize >= MMAP_THRESHOLD:
+      with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as reportMap:
+        return DecodeReportBytes(reportMap, encoding, legacyEncoding, maxBytes)
+    # a byte past maxBytes, so DecodeReportBytes() knows the text is cut short; no more than the file holds,
+    # since read() sets aside all it is asked for up front
+    readSize = -1 if maxBytes is None else min(fileSize, maxBytes) + 1
+    return DecodeReportBytes(fh.read(readSize), encoding, legacyEncoding, maxBytes)
+# end ReadReportText()
+
+def ReadLimitedBytes(binaryFile, maxBytes: int) -> bytes:
+  """
+  Read at most maxBytes plus one byte from an open binary file object of unknown size, such as an archive member
+  or a pipe, in READ_BLOCKSIZE blocks, so a small report never costs a maxBytes buffer; a result longer than
+  maxBytes means there was more
+  """
+  blocks = []
+  bytesLeft = maxBytes + 1
+  while bytesLeft > 0:
+    block = binaryFile.read(min(bytesLeft, READ_BLOCKSIZE))
+    if not block:
+      break
+    blocks.append(block)
+    bytesLeft -= len(block)
+  return b"".join(blocks)
+# end ReadLimitedBytes()
+
+def DecodeReportBytes(reportBytes, encoding: str = None, legacyEncoding: str = ENCODING_LEGACY, maxBytes: int = None):
+  """
+  Decode report bytes (bytes, or any buffer such as a memory map) returning (text, encoding)
+  maxBytes - only decode this many bytes, dropping a character cut in half at the end
+  """
+  bomLength = 0
+  if encoding is None:
+    encoding, bomLength = DetectReportEncoding(reportBytes[:ENCODING_SNIFFSIZE], legacyEncoding)
+  with memoryview(reportBytes) as reportView:
+    textEnd = len(reportView)
+    if maxBytes is not None:
+      textEnd = min(textEnd, maxBytes)
+    with reportView[bomLength:textEnd] as textView:
+      try:
+        return DecodeBuffer(textView, encoding, textEnd == len(reportView)), encoding
+      except UnicodeDecodeError:
+        if encoding != "utf-8" or bomLength > 0:
+          raise
+      # looked like UTF-8 up front but isn't further in
+      return DecodeBuffer(textView, legacyEncoding, textEnd == len(reportView)), legacyEncoding
+# end DecodeReportBytes()
+
+def DecodeBuffer(textBuffer, encoding: str, final: bool = True) -> str:
+  """
+  Decode a buffer; when it isn't final, it may end part way through a character, which is dropped
+  """
+  return str(textBuffer, encoding, "strict" if final else ERRORS_CUTSHORT)
+# end DecodeBuffer()
+
+def DropCutCharacter(decodeError):
+  """
+  Codec error handler for text cut off at a byte limit: drop a character cut in half at the very end, and
+  fail on anything else like "strict" does
+  """
+  if isinstance(decodeError, UnicodeDecodeError) and decodeError.end == len(decodeError.object) and \
+     decodeError.reason in ("unexpected end of data", "truncated data"):
+    return "", decodeError.end
+  raise decodeError
+# end DropCutCharacter()
+
+codecs.register_error(ERRORS_CUTSHORT, DropCutCharacter)
+
+def WrapReportStream(binaryFile, encoding: str = None, legacyEncoding: str = ENCODING_LEGACY, maxBytes: int = None,
+                     closeFile: bool = False):
+  """
+  Wrap an open binary file object for reading line by line, returning (text stream, encoding)
+  The encoding is sniffed without seeking back, so pipes and archive members work too
+  maxBytes - end the stream after this many bytes of the report; the stream's buffer.raw.cutShort says if it was
+  closeFile - close binaryFile along with the text stream, instead of leaving it open
+  """
+  headBytes = binaryFile.read(ENCODING_SNIFFSIZE)
+  bomLength = 0
+  if encoding is None:
+    encoding, bomLength = DetectReportEncoding(headBytes, legacyEncoding)
+  byteStream = io.BufferedReader(ReportByteStream(headBytes[bomLength:], binaryFile, bomLength, maxBytes, closeFile))
+  # the limit can fall part way through a character
+  decodeErrors = "strict" if maxBytes is None else ERRORS_CUTSHORT
+  return io.TextIOWrapper(byteStream, encoding=encoding, errors=decodeErrors), encoding
+# end WrapReportStream()
+
+def OpenReportStream(fileName: str, encoding: str = None, legacyEncoding: str = ENCODING_LEGACY, maxBytes: int = None):
+  """
+  Open a report for reading line by line, returning (text stream, encoding), see WrapReportStream()
+  """
+  fh = open(fileName, "rb")
+  try:
+    return WrapReportStream(fh, encoding, legacyEncoding, maxBytes, closeFile=True)
+  except:
+    fh.close()
+    raise
+# end OpenReportStream()
+
+def CutLongLines(text: str, lineLength: int, maxLineChars: int):
+  """
+  Cut every line of text to maxLineChars plus one character, the extra one showing the line was cut
+  text may carry on a line that already has lineLength characters kept
+  Returns (the cut text, characters kept of its last, unfinished line)
+  """
+  keepChars = maxLineChars + 1
+  textLines = text.split("\n")
+  if lineLength + len(textLines[0]) <= keepChars and max(map(len, textLines)) <= keepChars:
+    if len(textLines) == 1:
+      return text, lineLength + len(text)
+    return text, len(textLines[-1])
+  textLines[0] = textLines[0][:max(keepChars - lineLength, 0)]
+  for i in range(1, len(textLines)):
+    textLines[i] = textLines[i][:keepChars]
+  lastLength = len(textLines[-1]) + (lineLength if len(textLines) == 1 else 0)
+  return "\n".join(textLines), lastLength
+# end CutLongLines()
+
+def IterReportSectionText(reportStream, sectionNames, blockSize: int = STREAM_BLOCKSIZE, maxSectionChars: int = None,
+                          maxLineChars: int = MAX_LINE_CHARS):
+  """
+  read a text stream once in blocks, yielding (sectionName, sectionText) for each section in sectionNames
+  str.find() jumps from one "--------" line to the next, so the lines of the sections that are not wanted
+  are never split out or looked at one by one, and reading stops once every wanted section is done
+  reportStream - an open text stream, such as the one from OpenReportStream()
+  blockSize - characters to read at a time
+  maxSectionChars - stop keeping the text of a section after this many characters, though it is still read past;
+                    a section that was cut short comes back longer than maxSectionChars
+  maxLineChars - lines of a wanted section are cut to this plus one character before they count towards
+                 maxSectionChars, so one huge line can't use it all up; a "--------" header with a line longer
+                 than this isn't taken as a header
+  Only a block and the start of an unfinished header are held beyond the wanted sections, even with no line breaks
+  """
+  remainingSections = set(sectionNames)
+  sectionName = ""
+  # None while inside a section that is not wanted, else the text of the section read so far
+  sectionParts = None
+  sectionSize = 0
+  sectionStart = 0
+  # characters kept so far of the section's unfinished last line
+  lineLength = 0
+  # a leading "\n" lets a "--------" line on the very first line be found like any other
+  reportText = "\n"
+  searchPos = 0
+  endOfStream = False
+
+  def KeepSectionText(sectionText: str) -> None:
+    nonlocal sectionSize, lineLength
+    if maxSectionChars is None or sectionSize <= maxSectionChars:
+      keptText, lineLength = CutLongLines(sectionText, lineLength, maxLineChars)
+      sectionParts.append(keptText)
+      sectionSize += len(keptText)
+
+  while True:
+    ruleStart = reportText.find("\n" + SECTION_RULE, searchPos)
+    if ruleStart > -1:
+      # the rule line, the header line and the line after it all have to be in reportText
+      ruleEnd = reportText.find("\n", ruleStart + 1)
+      headerEnd = reportText.find("\n", ruleEnd + 1) if ruleEnd > -1 else -1
+      closeEnd = reportText.find("\n", headerEnd + 1) if headerEnd > -1 else -1
+      if closeEnd == -1 and headerEnd > -1 and endOfStream:
+        closeEnd = len(reportText)
+      if closeEnd > -1:
+        if not reportText.startswith(SECTION_RULE, headerEnd + 1):
+          # a lone "--------" line, not a header; keep looking after it
+          searchPos = ruleEnd
+          continue
+        # the current section runs up to and including the "\n" before this header
+        if sectionParts is not None:
+          KeepSectionText(reportText[sectionStart:ruleStart + 1])
+          yield sectionName, "".join(sectionParts)
+        if len(remainingSections) == 0:
+          return
+        sectionName = reportText[ruleEnd + 1:headerEnd].strip()
+        sectionParts = None
+        if sectionName in remainingSections:
+          remainingSections.remove(sectionName)
+          sectionParts = []
+          sectionSize = 0
+          lineLength = 0
+        sectionStart = closeEnd + 1
+        searchPos = closeEnd
+        continue
+      # end if the whole header is in reportText
+      if len(reportText) - ruleStart > 3 * (maxLineChars + 1):
+        # three lines this long are no header; look for the next "--------" line after this one
+        searchPos = ruleStart + 1
+        continue
+      keepPos = ruleStart
+    else:
+      # only the last "\n" can still start a header, unless enough follows it to rule that out
+      keepPos = reportText.rfind("\n", searchPos)
+      if keepPos == -1 or len(reportText) - keepPos > len(SECTION_RULE):
+        keepPos = len(reportText)
+    if endOfStream:
+      break
+    # let go of everything before keepPos, keeping only the text of a wanted section
+    if sectionParts is not None:
+      if keepPos > sectionStart:
+        KeepSectionText(reportText[sectionStart:keepPos])
+      sectionStart = max(sectionStart - keepPos, 0)
+    readText = reportStream.read(blockSize)
+    endOfStream = readText == ""
+    reportText = reportText[keepPos:] + readText
+    # keepPos is never before searchPos
+    searchPos = 0
+  # end while True
+  # a header cut off by the end of the report doesn't count, so the last section runs to the end
+  if sectionParts is not None:
+    KeepSectionText(reportText[sectionStart:])
+    yield sectionName, "".join(sectionParts)
+# end IterReportSectionText()
+
+class FieldSchema:
+  """
+  The fields read from the "key: value" lines of each section in SECTION_RECORDTYPES: FIELD_SCHEMA plus
+  any registered, compiled into a dictionary per section from key, the text before a line's first colon,
+  to the rules for it. A line costs one split and one lookup however many fields there are.
+  """
+
+  def __init__(self, fieldRules) -> None:
+    self.__lock = threading.Lock()
+    self.__builtinRules = tuple(fieldRules)
+    self.__registeredRules = ()
+    self.__dispatch = self.__Compile()
+  # end __init__()
+
+  def __Compile(self):
+    """
+    Return {section name: {key: ((field names), converter, joinWith),...}} for every rule, in the order added
+    """
+    dispatch = {sectionName: {} for sectionName in SECTION_RECORDTYPES}
+    for fieldRule in self.__builtinRules + self.__registeredRules:
+      fieldNames = fieldRule.fieldName if isinstance(fieldRule.fieldName, tuple) else (fieldRule.fieldName,)
+      sectionDispatch = dispatch[fieldRule.sectionName]
+      sectionDispatch[fieldRule.key] = sectionDispatch.get(fieldRule.key, ()) + ((fieldNames, fieldRule.converter, fieldRule.joinWith),)
+    return dispatch
+  # end __Compile()
+
+  def Register(self, fieldRule: FieldRule) -> None:
+    """
+    Add a FieldRule after the ones already there, see RegisterField()
+    """
+    if fieldRule.sectionName not in SECTION_RECORDTYPES:
+      raise ValueError(f"fields can only be registered in {' and '.join(SECTION_RECORDTYPES)}, not {fieldRule.sectionName}")
+    if ":" in fieldRule.key:
+      raise ValueError(f"a field key is the text before the first colon, so it can't hold one: {fieldRule.key!r}")
+    with self.__lock:
+      self.__registeredRules += (fieldRule,)
+      self.__dispatch = self.__Compile()
+  # end Register()
+
+  def Reset(self) -> None:
+    """
+    Forget every registered rule, leaving the built-in ones
+    """
+    with self.__lock:
+      self.__registeredRules = ()
+      self.__dispatch = self.__Compile()
+  # end Reset()
+
+  def Dispatch(self, sectionName: str):
+    """
+    Return the compiled rules of sectionName, a dictionary of key to ((field names), converter, joinWith) tuples
+    """
+    return self.__dispatch[sectionName]
+  # end Dispatch()
+
+  @property
+  def registeredRules(self):
+    return self.__registeredRules
+
+  @property
+  def schemaKey(self) -> str:
+    """
+    Return a string that changes with the registered rules, "" when there are none
+    """
+    return ";".join(f"{fieldRule.sectionName}/{fieldRule.key}/{fieldRule.fieldName}/"
+                    f"{getattr(fieldRule.converter, '__qualname__', fieldRule.converter)}/{fieldRule.joinWith}"
+                    for fieldRule in self.__registeredRules)
+# end class FieldSchema
+
+# the fields read in this process
+fieldSchema = FieldSchema(FIELD_SCHEMA)
+
+class ReportByteStream(io.RawIOBase):
+  """
+  A read-only byte stream giving back headBytes, then the rest of binaryFile, up to an optional limit
+  """
+
+  def __init__(self, headBytes: bytes, binaryFile, startPos: int = 0, maxBytes: int = None,
+               closeFile: bool = False) -> None:
+    """
+    headBytes - bytes already read from binaryFile
+    startPos - the offset in the report that headBytes starts at, for tell()
+    maxBytes - end the stream at this offset in the report
+    closeFile - close binaryFile when the stream is closed
+    """
+    self.__headBytes = headBytes
+    self.__headPos = 0
+    self.__binaryFile = binaryFile
+    self.__position = startPos
+    self.__maxBytes = maxBytes
+    self.__closeFile = closeFile
+    self.__cutShort = False
+  # end __init__()
+
+  def close(self) -> None:
+    if self.__closeFile and not self.closed:
+      self.__binaryFile.close()
+    super().close()
+  # end close()
 
-  def __init__(self, reportFileName: str) -> None:
+  def readable(self) -> bool:
+    return True
+
+  def readinto(self, buffer) -> int:
+    readSize = len(buffer)
+    if self.__maxBytes is not None:
+      readSize = min(readSize, self.__maxBytes - self.__position)
+      if readSize <= 0:
+        # at the limit; see if there was more to read, once
+        if not self.__cutShort:
+          self.__cutShort = self.__headPos < len(self.__headBytes) or len(self.__binaryFile.read(1)) > 0
+        return 0
+    if self.__headPos < len(self.__headBytes):
+      readBytes = self.__headBytes[self.__headPos:self.__headPos + readSize]
+      self.__headPos += len(readBytes)
+    else:
+      readBytes = self.__binaryFile.read(readSize)
+    buffer[:len(readBytes)] = readBytes
+    self.__position += len(readBytes)
+    return len(readBytes)
+  # end readinto()
+
+  def tell(self) -> int:
+    return self.__position
+
+  @property
+  def cutShort(self) -> bool:
+    """
+    Return a boolean if the stream stopped at maxBytes with more of the report left unread
+    """
+    return self.__cutShort
+# end class ReportByteStream
+
+class DXDiagFile:
+  def __init__(self, reportFileName: str, streaming: bool = False, encoding: str = None,
+               lazy: bool = False, sections=None, metricsHook=None, reportBytes: bytes = None,
+               reportFile=None, limits: ParseLimits = None) -> None:
+    """
+    reportFileName - path to a DxDiag.txt report, or just the report's name when reportBytes or reportFile is given
+    streaming - read the report line by line, keeping only the sections being parsed, instead of loading it whole
+    encoding - force the report encoding instead of detecting it from the BOM or first bytes
+    lazy - parse each section the first time its property is used instead of up front; ignored when streaming
+    sections - only ever parse these sections, e.g. {SECTION_DISPLAYDEVICES}; the rest stay empty. Defaults to PARSED_SECTIONS
+    metricsHook - called as metricsHook(name, seconds) as each timed step finishes; section parsers are named after their section
+    reportBytes - the raw report, in any encoding the file could be in, to parse instead of reading reportFileName;
+                  streaming is ignored since the whole report is already in memory
+    reportFile - an open binary file object, such as an archive member, to read the report from instead of
+                 reportFileName; it is read from where it is and left open
+    limits - a ParseLimits on how much of the report is read, defaults to DefaultParseLimits(); past a limit the
+             rest is skipped and noted in diagnostics
+    """
+    constructStart = time.perf_counter()
+    if sections is None:
+      sections = PARSED_SECTIONS
+    unknownSections = set(sections) - set(PARSED_SECTIONS)
+    if len(unknownSections) > 0:
+      raise ValueError(f"unknown report sections: {', '.join(sorted(unknownSections))}")
+    self.__wantedSections = set(sections)
+    self.__parsedSections = set()
+    if reportBytes is not None:
+      streaming = False
+    self.__lazy = lazy and not streaming
     self.__filename = reportFileName
-    self.__filecontents = []
+    self.__encoding = encoding
+    self.__filecontents = ""
+    self.__sectionIndex = {}
     self.__found = False
     self.__valid = False
-    # check if the file is in a valid encoding format
-    if os.path.exists(self.__filename):
-      self.__found = True
-    else:
-      # file missing, so just return
-      return
+    self.__limits = limits if limits is not None else DefaultParseLimits()
+    self.__diagnostics = []
+    # metrics
+    self.__metricsHook = metricsHook
+    self.__timings = {}
+    self.__sectionTimings = {}
+    self.__counters = {"bytesRead": 0, "linesScanned": 0}
     # initialize all the details
     self.__AMDDriverVersionsUpdate = False
     # System info results
-    self.__systemInformation = {
-      "reportTime": "",
-      "machineName": "",
-      "osName": "",
-      "language": "",
-      "systemDetails": 'n/a',
-      "cpuName": "",
-      "memoryString": "",
-      "memoryInMB": 0,
-      "memoryInGB": 0,
-      "pageFile": "",
-      "directXVersion": "",
-      "userDPI": ""
-    }
+    self.__systemInformation = SystemInfo()
     # DxDiag Notes
     self.__dxErrorNotes = []
     # Display Devices
     self.__videoDisplays = []
-    # private lists to be assembled into self.__videoDisplays
-    self.__videoCardNames = []
-    self.__videoCardManufacturers = []
-    self.__videoDriverVersions = []
-    self.__videoCardRAM = []
-    self.__videoDisplayModes = []
-    self.__monitorNames = []
-    self.__monitorModels = []
     # Sound Devices
     self.__soundDevices = []
     # Drives
     self.__drives = []
-    # load up the AMD driver decode data
-    self.__LoadAMDDriverVersions()
-    # check for AMD driver decode data update
-    self.__CheckForAMDDriverDataUpdate()
-    # load up the NVIDIA driver decode data
-    self.__LoadNVIDIADriverVersions()
-    # read the entire DXDiag file for easier processing
+    # check if the file is in a valid encoding format
+    if reportBytes is not None or reportFile is not None or os.path.exists(self.__filename):
+      self.__found = True
+    else:
+      # file missing, so just return
+      return
+    # check GitHub for newer driver decode data in the background; a finished update is picked up by the next load
+    stepStart = time.perf_counter()
+    driverTableUpdater.StartBackgroundRefresh()
+    self.__AMDDriverVersionsUpdate = "AMD" in driverTableUpdater.updatedTables
+    self.__RecordTiming("updateCheck", time.perf_counter() - stepStart)
+    # read the entire DXDiag file for easier processing, or parse it as it streams in
     if self.__found is True:
+      maxBytes = self.__limits.maxReportBytes
       try:
-        with open(self.__filename, "r") as fh:
-          self.__filecontents = fh.readlines()
+        if streaming:
+          if reportFile is not None:
+            reportStream, self.__encoding = WrapReportStream(reportFile, encoding, maxBytes=maxBytes)
+          else:
+            reportStream, self.__encoding = OpenReportStream(self.__filename, encoding, maxBytes=maxBytes)
+          with reportStream:
+            self.__ParseFileStreaming(reportStream)
+            self.__counters["bytesRead"] = reportStream.buffer.tell()
+            reportCutShort = reportStream.buffer.raw.cutShort
+        elif reportBytes is not None:
+          stepStart = time.perf_counter()
+          self.__filecontents, self.__encoding = DecodeReportBytes(reportBytes, encoding, maxBytes=maxBytes)
+          self.__counters["bytesRead"] = min(len(reportBytes), maxBytes)
+          reportCutShort = len(reportBytes) > maxBytes
+          self.__RecordTiming("read", time.perf_counter() - stepStart)
+        elif reportFile is not None:
+          stepStart = time.perf_counter()
+          # a byte past the limit shows whether there was more
+          fileBytes = ReadLimitedBytes(reportFile, maxBytes)
+          self.__filecontents, self.__encoding = DecodeReportBytes(fileBytes, encoding, maxBytes=maxBytes)
+          self.__counters["bytesRead"] = min(len(fileBytes), maxBytes)
+          reportCutShort = len(fileBytes) > maxBytes
+          # only the decoded text is needed from here on
+          fileBytes = None
+          self.__RecordTiming("read", time.perf_counter() - stepStart)
+        else:
+          stepStart = time.perf_counter()
+          self.__filecontents, self.__encoding = ReadReportText(self.__filename, encoding, maxBytes=maxBytes)
+          fileSize = os.path.getsize(self.__filename)
+          self.__counters["bytesRead"] = min(fileSize, maxBytes)
+          reportCutShort = fileSize > maxBytes
+          self.__RecordTiming("read", time.perf_counter() - stepStart)
         self.__valid = True
-      except:
+      except Exception as readError:
         # file read problem, so just return
+        self.__AddDiagnostic(f"the report could not be read: {readError}")
         return
-      if self.__valid is True:
+      if reportCutShort:
+        self.__AddDiagnostic(f"the report is over {maxBytes} bytes; only the first {maxBytes} were read")
+      if self.__valid is True and not streaming:
         self.__ParseFile()
+    self.__RecordTiming("construct", time.perf_counter() - constructStart)
   # end __init__()
 
-  def __CheckForAMDDriverDataUpdate(self) -> None:
-    """
-    Check if there is a new version of AMD driver decode data on GitHub
-    """
-    # check local AMD driver data version
-    localAMDdbVersion = int(self.__driverVersionsAMD["version"])
-    # get first line of driverDecodeAMD.csv from GitHub
-    latestDriverAMDFile = request.urlopen(URL_DRIVERSAMDDECODE)
-    latestDriverAMDData = latestDriverAMDFile.read()
-    # get the first line, the version line, searching for a byte version of newline
-    newLinePos = latestDriverAMDData.find(b"\n")
-    if newLinePos > -1:
-      # found, get the version line, converting to a string
-      versionLine = latestDriverAMDData[:newLinePos].decode()
-      # split on comma
-      versionElements = versionLine.split(",")
-      # get the version number
-      latestAMDdbVersion = int(versionElements[1])
-      if latestAMDdbVersion > localAMDdbVersion:
-        print('Updating AMD Driver data from GitHub.')
-        print()
-        # save out latestDriverAMDData as FILE_DRIVERSAMD_NEW
-        if os.path.exists(FILE_DRIVERSAMD_NEW):
-          os.remove(FILE_DRIVERSAMD_NEW)
-        newAMDDriverData = latestDriverAMDData.decode('utf-8')
-        with open(FILE_DRIVERSAMD_NEW, mode="w") as fhAMD:
-          fhAMD.write(newAMDDriverData)
-        # delete the old file and replace it with the new
-        if os.path.exists(FILE_DRIVERSAMD):
-          os.remove(FILE_DRIVERSAMD)
-        os.rename(FILE_DRIVERSAMD_NEW, FILE_DRIVERSAMD)
-        # clear out the AMD driver dictionary and reload it from the updated file
-        self.__driverVersionsAMD.clear()
-        self.__LoadAMDDriverVersions()
-        # clean up the downloaded file
-        if os.path.exists(FILE_DRIVERSAMD_NEW):
-          os.remove(FILE_DRIVERSAMD_NEW)
-  # end __CheckForAMDDriverDataUpdate()
-
-  def __LoadAMDDriverVersions(self) -> None:
-    """
-    Load the driverDecodeAMD.csv file into the __driverVersionsAMD dictionary
-    """
-    if os.path.exists(FILE_DRIVERSAMD):
-      with open(FILE_DRIVERSAMD, "r") as fhAMD:
-        for driverLine in fhAMD:
-          entry = driverLine.strip().split(",")
-          self.__driverVersionsAMD[entry[0]] = entry[1]
-  # end __LoadAMDDriverVersions()
-
-  def __LoadNVIDIADriverVersions(self) -> None:
-    """
-    Load the driverDecodeNvidia.csv file into the __driverVersionsNVIDIA dictionary
-    """
-    if os.path.exists(FILE_DRIVERSNVIDIA):
-      with open(FILE_DRIVERSNVIDIA, encoding="utf-8") as csvFile:
-        # csvDialect = csv.Sniffer().sniff(csvFile.read(1024))
-        # csvFile.seek(0)
-        # csvReader = csv.reader(csvFile, csvDialect, doublequote=True)
-        csvReader = csv.reader(csvFile, dialect="excel", doublequote=True)
-        for row in csvReader:
-          self.__driverVersionsNVIDIA[row[0]] = row[1]
-        # end for row
-      # end with open()
-  # end __LoadNVIDIADriverVersions()
+  def __RecordTiming(self, name: str, seconds: float, sectionName: str = None) -> None:
+    """
+    Add seconds to the timing called name, or to the section timing of sectionName, and tell the metrics hook
+    """
+    if sectionName is None:
+      self.__timings[name] = self.__timings.get(name, 0.0) + seconds
+    else:
+      self.__sectionTimings[sectionName] = self.__sectionTimings.get(sectionName, 0.0) + seconds
+    if self.__metricsHook is not None:
+      self.__metricsHook(name, seconds)
+  # end __RecordTiming()
+
+  def __AddDiagnostic(self, diagnostic: str) -> None:
+    """
+    Note something about the report that was skipped or couldn't be read
+    """
+    self.__diagnostics.append(diagnostic)
+  # end __AddDiagnostic()
+
+  def __IndexSections(self) -> None:
+    """
+    Scan the report text once and record the character range of every section, up to the last wanted one
+    """
+    # a section header is framed by two "--------"... lines:
+    # ------------------
+    # System Information
+    # ------------------
+    # the section body runs from the line after the second "--------" line up to
+    # the first "--------" line of the next section header.
+    # str.find() jumps straight from one "--------" line to the next, so the lines
+    # in between are never looked at one by one
+    # the sections after the last wanted one, such as the long "System Devices" and
+    # "DirectShow Filters" lists at the end of a report, are never scanned at all
+    reportText = self.__filecontents
+    self.__sectionIndex = {}
+    remainingSections = set(self.__wantedSections)
+    sectionName = ""
+    sectionStart = 0
+    # ruleStart is the offset of the next "--------" line, -1 when there are no more
+    if reportText.startswith(SECTION_RULE):
+      ruleStart = 0
+    else:
+      ruleStart = reportText.find("\n" + SECTION_RULE)
+      if ruleStart > -1:
+        ruleStart += 1
+    while ruleStart > -1:
+      headerStart = reportText.find("\n", ruleStart) + 1
+      headerEnd = reportText.find("\n", headerStart)
+      if headerStart == 0 or headerEnd == -1:
+        break
+      if reportText.startswith(SECTION_RULE, headerEnd + 1):
+        # close off the previous section at this header's opening "--------" line
+        if sectionName != "" and sectionName not in self.__sectionIndex:
+          self.__sectionIndex[sectionName] = (sectionStart, ruleStart)
+          remainingSections.discard(sectionName)
+          if len(remainingSections) == 0:
+            return
+        sectionName = reportText[headerStart:headerEnd].strip()
+        # the body starts after the header's closing "--------" line
+        sectionStart = reportText.find("\n", headerEnd + 1) + 1
+        if sectionStart == 0:
+          sectionStart = len(reportText)
+        searchPos = headerEnd + 1
+      else:
+        # a lone "--------" line, not a header; keep looking after it
+        searchPos = headerStart - 1
+      ruleStart = reportText.find("\n" + SECTION_RULE, searchPos)
+      if ruleStart > -1:
+        ruleStart += 1
+    # end while ruleStart
+    # the last section runs to the end of the file
+    if sectionName != "" and sectionName not in self.__sectionIndex:
+      self.__sectionIndex[sectionName] = (sectionStart, len(reportText))
+  # end __IndexSections()
+
+  def __SectionLines(self, sectionName: str):
+    """
+    Return the list of raw lines in the body of sectionName, or an empty list if it is missing
+    """
+    if sectionName not in self.__sectionIndex:
+      return []
+    sectionStart, sectionEnd = self.__sectionIndex[sectionName]
+    return self.__SplitSection(sectionName, self.__filecontents, sectionStart, sectionEnd)
+  # end __SectionLines()
+
+  def __MaxSectionChars(self) -> int:
+    """
+    Return the most characters of one section that are kept: its most lines at their longest
+    """
+    return self.__limits.maxSectionLines * (self.__limits.maxLineChars + 2)
+  # end __MaxSectionChars()
+
+  def __SplitSection(self, sectionName: str, reportText: str, sectionStart: int = 0, sectionEnd: int = None):
+    """
+    Split reportText[sectionStart:sectionEnd] into lines within the section and line limits, noting whatever is dropped
+    Each line is cut to maxLineChars as it is found, so a huge line costs no more than a short one and the
+    lines after it are still read
+    """
+    if sectionEnd is None:
+      sectionEnd = len(reportText)
+    maxSectionLines = self.__limits.maxSectionLines
+    maxLineChars = self.__limits.maxLineChars
+    sectionLines = []
+    longLineCount = 0
+    lineStart = sectionStart
+    # a line past the limit shows the section was cut short
+    while lineStart < sectionEnd and len(sectionLines) <= maxSectionLines:
+      lineEnd = reportText.find("\n", lineStart, sectionEnd)
+      if lineEnd == -1:
+        lineEnd = sectionEnd
+      # a character past the limit shows the line was cut; splitlines() drops a "\r" and splits on any other breaks
+      lineText = reportText[lineStart:min(lineEnd, lineStart + maxLineChars + 1)]
+      for line in lineText.splitlines() or [""]:
+        if len(line) > maxLineChars:
+          line = line[:maxLineChars]
+          longLineCount += 1
+        sectionLines.append(line)
+      lineStart = lineEnd + 1
+    # end while lineStart
+    if len(sectionLines) > maxSectionLines:
+      self.__AddDiagnostic(f"{sectionName}: over {maxSectionLines} lines; only the first {maxSectionLines} were read")
+      del sectionLines[maxSectionLines:]
+    if longLineCount > 0:
+      self.__AddDiagnostic(f"{sectionName}: {longLineCount} lines over {maxLineChars} characters were cut short")
+    return sectionLines
+  # end __SplitSection()
+
+  def __RunSectionParser(self, sectionParser, sectionName: str, sectionLines) -> None:
+    """
+    Hand sectionLines to sectionParser; if it trips over a line, keep what it got that far and note it
+    """
+    try:
+      sectionParser(sectionLines)
+    except (IndexError, ValueError) as parseError:
+      self.__AddDiagnostic(f"{sectionName}: parsing stopped at a line that couldn't be read ({parseError!r})")
+  # end __RunSectionParser()
 
   def __ParseFile(self) -> None:
     """
     Parse the file sections for information
     """
-    self.__ParseSystemInformation()
-    self.__ParseDxDiagNotes()
-    self.__ParseDisplayDevices()
-    # video info is scattered in several lists; pull them all together
-    self.__AssembleVideoInfo()
-    self.__ParseSoundDevices("Sound Devices")
-    self.__ParseSoundDevices("Sound Capture Devices")
-    self.__ParseDrives()
+    # find every section in a single pass, then hand each parser only its own lines
+    stepStart = time.perf_counter()
+    self.__IndexSections()
+    self.__RecordTiming("index", time.perf_counter() - stepStart)
+    if not self.__lazy:
+      self.__ParseSections(PARSED_SECTIONS)
   # end __ParseFile()
 
-  def __ParseSystemInformation(self) -> None:
+  def __ParseSections(self, sectionNames) -> None:
+    """
+    Parse each of sectionNames that is wanted and not parsed yet, from the indexed file contents
+    """
+    if self.__parsedSections >= self.__wantedSections:
+      return
+    sectionParsers = None
+    # go in report order so "Sound Devices" always lands before "Sound Capture Devices"
+    for sectionName in PARSED_SECTIONS:
+      if sectionName not in sectionNames or sectionName in self.__parsedSections:
+        continue
+      if sectionName not in self.__wantedSections:
+        continue
+      if sectionParsers is None:
+        sectionParsers = self.__SectionParsers()
+      self.__parsedSections.add(sectionName)
+      stepStart = time.perf_counter()
+      sectionLines = self.__SectionLines(sectionName)
+      self.__counters["linesScanned"] += len(sectionLines)
+      self.__RunSectionParser(sectionParsers[sectionName], sectionName, sectionLines)
+      self.__RecordTiming(sectionName, time.perf_counter() - stepStart, sectionName)
+      if sectionName == SECTION_DISPLAYDEVICES:
+        # decode the drivers of the displays just parsed
+        self.__AssembleVideoInfo()
+    # end for sectionName
+    if self.__parsedSections >= self.__wantedSections:
+      # the structured fields are all extracted, so let go of the raw text
+      self.__filecontents = ""
+  # end __ParseSections()
+
+  def __ParseFileStreaming(self, reportStream) -> None:
+    """
+    Parse the file sections as they are read, without holding the whole file
+    """
+    sectionParsers = self.__SectionParsers()
+    streamStart = time.perf_counter()
+    parseSeconds = 0.0
+    sectionTexts = IterReportSectionText(reportStream, self.__wantedSections, maxSectionChars=self.__MaxSectionChars(),
+                                         maxLineChars=self.__limits.maxLineChars)
+    for sectionName, sectionText in sectionTexts:
+      stepStart = time.perf_counter()
+      sectionLines = self.__SplitSection(sectionName, sectionText)
+      self.__counters["linesScanned"] += len(sectionLines)
+      self.__RunSectionParser(sectionParsers[sectionName], sectionName, sectionLines)
+      stepSeconds = time.perf_counter() - stepStart
+      parseSeconds += stepSeconds
+      self.__RecordTiming(sectionName, stepSeconds, sectionName)
+    # reading and splitting the stream into sections is whatever the parsers didn't take
+    self.__RecordTiming("read", time.perf_counter() - streamStart - parseSeconds)
+    # decode the drivers of the displays just parsed
+    self.__AssembleVideoInfo()
+    self.__parsedSections = set(self.__wantedSections)
+  # end __ParseFileStreaming()
+
+  def __SectionParsers(self):
+    """
+    Return a dictionary of section name to the method that parses that section
+    """
+    return {
+      SECTION_SYSTEMINFORMATION: self.__ParseSystemInformation,
+      SECTION_DXDIAGNOTES: self.__ParseDxDiagNotes,
+      SECTION_DISPLAYDEVICES: self.__ParseDisplayDevices,
+      SECTION_SOUNDDEVICES: self.__ParseSoundDevices,
+      SECTION_SOUNDCAPTUREDEVICES: self.__ParseSoundDevices,
+      SECTION_DRIVES: self.__ParseDrives
+    }
+  # end __SectionParsers()
+
+  def __ParseFields(self, sectionName: str, sectionLines, records, newRecord=None) -> None:
+    """
+    Fill in records from the "key: value" lines of sectionName through the compiled field schema
+    records - the list of records the section fills in
+    newRecord - for a section with a record per device, makes the record started by its SECTION_RECORDSTARTS
+                line; lines before the first one are skipped
+    """
+    sectionDispatch = fieldSchema.Dispatch(sectionName)
+    recordFields = SECTION_RECORDTYPES[sectionName].FIELDS
+    recordStart = SECTION_RECORDSTARTS.get(sectionName)
+    record = records[-1] if len(records) > 0 else None
+    for fileLine in sectionLines:
+      key, _, value = fileLine.strip().partition(":")
+      fieldRules = sectionDispatch.get(key)
+      if fieldRules is None:
+        continue
+      # the value starts after "key: "
+      value = value[1:]
+      if key == recordStart:
+        record = newRecord()
+        records.append(record)
+      if record is None:
+        continue
+      for fieldNames, converter, joinWith in fieldRules:
+        try:
+          fieldValue = value if converter is None else converter(value)
+        except (OverflowError, ValueError):
+          self.__AddDiagnostic(f"{sectionName}: {key} {value[:40]!r} couldn't be read")
+          continue
+        if fieldValue is None:
+          continue
+        if len(fieldNames) == 1:
+          fieldValue = (fieldValue,)
+        for fieldName, oneValue in zip(fieldNames, fieldValue):
+          if joinWith is not None:
+            oneValue = record.get(fieldName, "") + joinWith + oneValue
+          if fieldName in recordFields:
+            setattr(record, fieldName, oneValue)
+          else:
+            record.SetExtraField(fieldName, oneValue)
+      # end for fieldNames
+    # end for fileLine in sectionLines
+  # end __ParseFields()
+
+  def __ParseSystemInformation(self, sectionLines) -> None:
     """
     Parse the System Information section of the file
     """
     # ------------------
     # System Information
     # ------------------
-    # parse the filecontents for the System Information section
-    foundStart = False
-    foundEnd = False
-    skipNextLine = False
-    for fileLine in self.__filecontents:
-      if skipNextLine:
-        skipNextLine = False
-        continue
-      line = fileLine.strip()
-      if line == "System Information": 
-        foundStart = True
-        skipNextLine = True
-      if foundStart:
-        # the next line after "System Information" is "------------------", so skip it
-        if skipNextLine:
-          continue
-        if line.startswith("Time of this report:"):
-          self.__systemInformation["reportTime"] = line[21:]
-        if line.startswith('Machine name:'):
-          self.__systemInformation["machineName"] = line[14:]
-        if line.startswith('Operating System:'):
-          self.__systemInformation["osName"] = line[18:]
-        if line.startswith('Language:'):
-          self.__systemInformation['language'] = line[10:]
-        if line.startswith('System Manufacturer:'):
-          systemManufacturer = line[21:]
-          if systemManufacturer != 'System manufacturer':
-            self.__systemInformation['systemDetails'] = systemManufacturer
-        if line.startswith('System Model:'):
-          systemModel = line[14:]
-          if systemModel != 'System Product Name':
-            self.__systemInformation['systemDetails'] += " " + systemModel
-        if line.startswith('Processor:'):
-          # clean up (R) and (TM) and extra spaces in the CPU name
-          cpuName = line[11:]
-          cpuName = cpuName.replace('(R)', "")
-          cpuName = cpuName.replace('(TM)', "")
-          cpuName = " ".join(cpuName.split())
-          self.__systemInformation['cpuName'] = cpuName
-        # break memory down into memoryString, memoryInMB (int), memoryInGB (int)
-        if line.startswith('Memory:'):
-          memoryString = line[8:]
-          self.__systemInformation['memoryString'] = memoryString
-          memoryInMB = int(memoryString[:-6])
-          self.__systemInformation['memoryInMB'] = memoryInMB
-          memoryInGB = round(memoryInMB / 1024)
-          self.__systemInformation['memoryInGB'] = memoryInGB
-        if line.startswith('Page File:'):
-          self.__systemInformation['pageFile'] = line[11:]
-        if line.startswith('DirectX Version:'):
-          self.__systemInformation['directXVersion'] = line[17:]
-        if line.startswith('User DPI Setting:'):
-          self.__systemInformation['userDPI'] = line[18:]
-        # stop when we hit the next "--------"... line
-        if line.startswith('--------'):
-          foundEnd = True
-        if foundEnd:
-          break
-      # end if foundStart
-    # end for fileLine in self.__filecontents
+    self.__ParseFields(SECTION_SYSTEMINFORMATION, sectionLines, [self.__systemInformation])
   # end ParseSystemInformation()
 
-  def __ParseDxDiagNotes(self) -> None:
+  def __ParseDxDiagNotes(self, sectionLines) -> None:
     """
     Parse the DxDiag Notes section of the file
     """
     # ------------
     # DxDiag Notes
     # ------------
-    foundStart = False
-    foundEnd = False
-    skipNextLine = False
-    for fileLine in self.__filecontents:
-      if skipNextLine:
-        skipNextLine = False
-        continue
+    for fileLine in sectionLines:
       line = fileLine.strip()
-      if line == "DxDiag Notes": 
-        foundStart = True
-        skipNextLine = True
-      if foundStart:
-        # the next line after "DxDiag Notes" is "------------", so skip it
-        if skipNextLine: continue
-        colonPos = line.find(":")
-        if colonPos > -1:
-          noteLine = line.split(":")
-          if noteLine[1].startswith(" There is a problem"):
-            self.__dxErrorNotes.append(noteLine[1].strip())
-        # stop when we hit the next "--------"... line
-        if line.startswith("--------"):
-          foundEnd = True
-        if foundEnd:
-          break
-      # end if foundStart
-    # end for fileLine in self.__filecontents
+      colonPos = line.find(":")
+      if colonPos > -1:
+        noteLine = line.split(":")
+        if noteLine[1].startswith(" There is a problem"):
+          self.__dxErrorNotes.append(DxNote(noteLine[1].strip()))
+    # end for fileLine in sectionLines
   # end ParseDxDiagNotes()
   
-  def __ParseDisplayDevices(self) -> None:
+  def __ParseDisplayDevices(self, sectionLines) -> None:
     """
     Parse the Display Devices section of the file
     """
     # ---------------
     # Display Devices
     # ---------------
-    foundStart = False
-    foundEnd = False
-    skipNextLine = False
-    monitorNameFound = False
-    monitorModelFound = False
-    for fileLine in self.__filecontents:
-      if skipNextLine:
-        skipNextLine = False
-        continue
-      line = fileLine.strip()
-      if line == "Display Devices": 
-        foundStart = True
-        skipNextLine = True
-      if foundStart:
-        # the next line after "Display Devices" is "------------", so skip it
-        if skipNextLine:
-          continue
-        # need to deal with the situation where the Monitor Name and/or Monitor Model are missing
-        if line.startswith('Card name:'):               #Card name: NVIDIA GeForce RTX 3080
-          videoCardName = line[11:]
-          self.__videoCardNames.append(videoCardName)
-          # this also indicates the start of a new Video section, so reset the Name and Model found flags
-          monitorNameFound = False
-          monitorModelFound = False
-        if line.startswith('Manufacturer:'):            #Manufacturer: NVIDIA
-          videoCardManufacturerName = line[14:]
-          self.__videoCardManufacturers.append(videoCardManufacturerName)
-        if line.startswith('Dedicated Memory:'):        #Dedicated Memory: 10067 MB
-          videoRAM = line[18:]
-          end = videoRAM.find(" MB")
-          if end > -1:
-            self.__videoCardRAM.append(int(videoRAM[:end]))
-          elif videoRAM == 'n/a':
-            self.__videoCardRAM.append(0)
-        if line.startswith('Current Mode:'):            #Current Mode: 2560 x 1440 (32 bit) (144Hz)
-          displayMode = line[14:]
-          self.__videoDisplayModes.append(displayMode)
-        if line.startswith('Monitor Name:'):            #Monitor Name: Dell S2716DG(DisplayPort)
-          monitorNameFound = True
-          monitorName = line[14:]
-          self.__monitorNames.append(monitorName)
-        if line.startswith('Monitor Model:'):           #Monitor Model: Dell S2716DG
-          monitorModelFound = True
-          monitorModel = line[15:]
-          self.__monitorModels.append(monitorModel)
-        if line.startswith('Driver File Version:'):     #Driver File Version: 31.00.0015.2661 (English)
-          videoDriverVersion = line[21:]
-          self.__videoDriverVersions.append(videoDriverVersion)
-        # 'PanelFitter Stretch' is usually one of the last lines in a Video section.
-        # if we have made it here and no Name or Model found, then just add "Unknown"
-        if line.startswith('PanelFitter Stretch:'):
-          if not monitorNameFound:
-            self.__monitorNames.append("Unknown")
-          if not monitorModelFound:
-            self.__monitorModels.append("Unknown")
-        # stop when we hit the next "--------"... line
-        if line.startswith('--------'):
-          foundEnd = True
-        if foundEnd:
-          break
-      # end if foundStart
-    # end for fileLine in self.__filecontents
+    # each "Card name:" line starts the next display
+    self.__ParseFields(SECTION_DISPLAYDEVICES, sectionLines, self.__videoDisplays, self.__NewVideoDisplay)
   # end ParseDisplayDevices(self)
 
+  def __NewVideoDisplay(self) -> VideoDisplay:
+    """
+    Return the record a "Card name:" line starts, with the monitor "Unknown" until its lines turn up
+    """
+    return VideoDisplay(monitorName="Unknown", monitorModel="Unknown", driverVersionRaw="Unknown")
+  # end __NewVideoDisplay()
+
   def __AssembleVideoInfo(self) -> None:
     """
-    video info is scattered in several lists; pull them all together to 1 list of dictionaries
-    """
-    for i in range(len(self.__videoCardNames)):
-      # based on videoCardManufacturers, decode videoDriverVersions into common driver versions/names
-      driverVersion = self.__videoDriverVersions[i]
-      # Intel Corporation
-      # (Standardgrafikkartentypen)
-      # NVIDIA
-      if self.__videoCardManufacturers[i].startswith("NVIDIA"):
-        driverVersion = DecodeNVIDIADriverVersion(driverVersion, self.__driverVersionsNVIDIA)
-      # Advanced Micro Devices, Inc.
-      if self.__videoCardManufacturers[i].startswith("Advanced Micro"):
-        driverVersion = DecodeAMDDriverVersion(driverVersion, self.__driverVersionsAMD)
-      cardData = {
-        'cardName': self.__videoCardNames[i],
-        'cardManufacturer': self.__videoCardManufacturers[i],
-        'VRAM': self.__videoCardRAM[i],
-        'displayMode': self.__videoDisplayModes[i],
-        'monitorName': self.__monitorNames[i],
-        'monitorModel': self.__monitorModels[i],
-        'driverVersion': driverVersion,
-        'driverVersionRaw': self.__videoDriverVersions[i]
-      }
-      self.__videoDisplays.append(cardData)
+    Decode the driver version of every video display into common driver versions/names
+    """
+    assembleStart = time.perf_counter()
+    # based on the card manufacturer, all of the report's displays in one call
+    decodeStart = time.perf_counter()
+    driverDecodes = DecodeDriverVersions([(DriverVendor(cardData.cardManufacturer), cardData.driverVersionRaw)
+                                          for cardData in self.__videoDisplays])
+    self.__RecordTiming("driverDecode", time.perf_counter() - decodeStart)
+    for cardData, driverDecode in zip(self.__videoDisplays, driverDecodes):
+      cardData.driverVersion = driverDecode.driverVersion
+      cardData.driverReleasesBehind = driverDecode.driverReleasesBehind
+      cardData.driverClosestRelease = driverDecode.driverClosestRelease
+    self.__RecordTiming("assembleVideoInfo", time.perf_counter() - assembleStart)
   # end __AssembleVideoInfo()
 
-  def __ParseSoundDevices(self, sectionName: str) -> None:
+  def __ParseSoundDevices(self, sectionLines) -> None:
     """
     Parse the Sound Devices/Capture Devices section of the file
     """
     # -------------
     # Sound Devices -AND- Sound Capture Devices
     # -------------
-    # parse the filecontents for the sectionName section
-    foundStart = False
-    foundEnd = False
-    skipNextLine = False
-    for fileLine in self.__filecontents:
-      if skipNextLine:
-        skipNextLine = False
-        continue
+    for fileLine in sectionLines:
       line = fileLine.strip()
-      if line == sectionName: 
-        foundStart = True
-        skipNextLine = True
-      if foundStart:
-        # the next line after sectionName is "------------", so skip it
-        if skipNextLine:
-          continue
-        if line.startswith('Description:'):
-          self.__soundDevices.append(line[13:])
-        # stop when we hit the next "--------"... line
-        if line.startswith("--------"):
-          foundEnd = True
-        if foundEnd:
-          break
-      # end if foundStart
-    # end for fileLine in self.__filecontents
+      if line.startswith('Description:'):
+        self.__soundDevices.append(SoundDevice(line[13:]))
+    # end for fileLine in sectionLines
   # end ParseSoundDevices(self)
 
-  def __ParseDrives(self) -> None:
+  def __ParseDrives(self, sectionLines) -> None:
     """
     Parse the Disk & DVD/CD-ROM Drives section of the file
     """
@@ -466,71 +1185,79 @@ class DXDiagFile:
     # Disk & DVD/CD-ROM Drives
     # ------------------------
     tempLines = []
-    foundStart = False
-    foundEnd = False
-    skipNextLine = False
-    for fileLine in self.__filecontents:
-      if skipNextLine:
-        skipNextLine = False
-        continue
+    for fileLine in sectionLines:
       line = fileLine.strip()
-      if line == "Disk & DVD/CD-ROM Drives":
-        foundStart = True
-        skipNextLine = True
-      if foundStart:
-        # the next line after "Disk & DVD/CD-ROM Drives" is "------------", so skip it
-        if skipNextLine:
-          continue
-        # make a copy of the disk section to reparse
-        if not line == "":
-          tempLines.append(line)
-        # stop when we hit the next "--------"... line
-        if line.startswith("--------"):
-          foundEnd = True
-        if foundEnd:
-          break
-      # end if foundStart
-    # end for fileLine in self.__filecontents
+      # make a copy of the disk section to reparse
+      if not line == "":
+        tempLines.append(line)
+    # end for fileLine in sectionLines
     # parse the tempLines list for the details
-    driveDetails = {
-      'driveLetter': "",
-      'freeSpace': "",
-      'totalSpace': "",
-      'fileSystem': "",
-      'model': ""
-    }
     for i in range(len(tempLines)):
       if tempLines[i].startswith('Drive:'):
-        driveDetails['driveLetter'] = tempLines[i][7]
+        driveLetter = tempLines[i][7:8]
+        # the section can end early in a cut short report, so take what lines there are
+        detailLines = tempLines[i+1:i+5]
         # determine if next line is "Free Space:"
-        if tempLines[i+1].startswith('Free Space:'):
-          driveDetails['freeSpace'] = tempLines[i+1][12:]
-          driveDetails['totalSpace'] = tempLines[i+2][13:]
-          driveDetails['fileSystem'] = tempLines[i+3][13:]
-          driveDetails['model'] = tempLines[i+4][7:]
+        if len(detailLines) > 0 and detailLines[0].startswith('Free Space:'):
+          if len(detailLines) < 4:
+            self.__AddDiagnostic(f"{SECTION_DRIVES}: the details of drive {driveLetter or '?'} are cut short")
+            detailLines += [""] * (4 - len(detailLines))
+          # letter, free space, total space, file system, model
+          driveDetails = Drive(driveLetter, detailLines[0][12:], detailLines[1][13:], detailLines[2][13:], detailLines[3][7:])
+        elif len(detailLines) > 0:
+          # empty removable drive; free space, total space and file system stay ""
+          driveDetails = Drive(driveLetter, model=detailLines[0][7:])
         else:
-          # empty removable drive
-          driveDetails['freeSpace'] = ""
-          driveDetails['totalSpace'] = ""
-          driveDetails['fileSystem'] = ""
-          driveDetails['model'] = tempLines[i+1][7:]
-        # MUST use .copy() in order to get the data, otherwise it is just a list of references to the single driveDetails dict
-        self.__drives.append(driveDetails.copy())
+          self.__AddDiagnostic(f"{SECTION_DRIVES}: the details of drive {driveLetter or '?'} are cut short")
+          driveDetails = Drive(driveLetter)
+        self.__drives.append(driveDetails)
       # end if tempLines[i].startswith('Drive:')
     # end for i in range(len(tempLines))
   # end ParseDrives()
 
+  def ToDict(self):
+    """
+    Return the parsed results as a dictionary of plain lists, dictionaries and strings
+    """
+    self.__ParseSections(PARSED_SECTIONS)
+    reportDict = {
+      "filename": self.__filename,
+      "found": self.__found,
+      "valid": self.__valid,
+      "systemInformation": self.__systemInformation.ToDict(),
+      "videoDisplays": [cardData.ToDict() for cardData in self.__videoDisplays],
+      "soundDevices": [str(soundDevice) for soundDevice in self.__soundDevices],
+      "drives": [driveDetails.ToDict() for driveDetails in self.__drives],
+      "dxErrorNotes": [str(dxNote) for dxNote in self.__dxErrorNotes],
+      "dxErrorCount": len(self.__dxErrorNotes)
+    }
+    reportDict["fingerprint"] = HardwareFingerprint(reportDict) if self.__valid else ""
+    reportDict["diagnostics"] = list(self.__diagnostics)
+    return reportDict
+  # end ToDict()
+
   @property
   def AMDUpdate(self):
     """
+    Return a boolean if the AMD driver decode data was updated from GitHub before this report was parsed
     """
     return self.__AMDDriverVersionsUpdate
 
+  @property
+  def diagnostics(self):
+    """
+    Return a list of strings noting what was skipped or couldn't be read, such as a section cut short by
+    the limits or a line a parser stopped at; the results are partial when this isn't empty
+    """
+    self.__ParseSections(PARSED_SECTIONS)
+    return list(self.__diagnostics)
+
   @property
   def drives(self):
     """
-    Returns a list of drive info dictionaries
+    Returns a list of Drive records, which also read as drive info dictionaries
     """
+    self.__ParseSections((SECTION_DRIVES,))
     return self.__drives
 
   @property
@@ -538,15 +1265,45 @@ class DXDiagFile:
     """
     Returns an integer of the number of DXDiag errors
     """
+    self.__ParseSections((SECTION_DXDIAGNOTES,))
     return len(self.__dxErrorNotes)
 
   @property
   def dxErrorNotes(self):
     """
-    Return a list of strings of DXDiag errors
+    Return a list of DxNote strings of DXDiag errors
     """
+    self.__ParseSections((SECTION_DXDIAGNOTES,))
     return self.__dxErrorNotes
 
+  @property
+  def encoding(self) -> str:
+    """
+    Return a string of the encoding the report was read with, such as "utf-16-le"
+    """
+    return self.__encoding
+
+  @property
+  def metrics(self):
+    """
+    Return a dictionary of what parsing this report cost so far:
+    "timings" - seconds per step: "updateCheck", "read", "index", "assembleVideoInfo" (which includes
+                "driverDecode", loading the decode tables if they aren't yet) and "construct" for the whole
+                constructor; "updateRefresh" is how long the background driver decode data check took,
+                once it has finished
+    "sectionTimings" - seconds spent in each section parser, by section name
+    "counters" - "bytesRead" from the report file and "linesScanned", the lines handed to the section parsers
+    Lazily parsed sections are added as they are parsed
+    """
+    timings = dict(self.__timings)
+    if driverTableUpdater.refreshSeconds is not None:
+      timings["updateRefresh"] = driverTableUpdater.refreshSeconds
+    return {
+      "timings": timings,
+      "sectionTimings": dict(self.__sectionTimings),
+      "counters": dict(self.__counters)
+    }
+
   @property
   def filename(self) -> str:
     """
@@ -554,6 +1311,20 @@ class DXDiagFile:
     """
     return self.__filename
 
+  @property
+  def fingerprint(self) -> str:
+    """
+    Return the HardwareFingerprint() of the machine the report came from, or "" if it couldn't be read
+    """
+    if not self.__valid:
+      return ""
+    self.__ParseSections((SECTION_SYSTEMINFORMATION, SECTION_DISPLAYDEVICES, SECTION_DRIVES))
+    return HardwareFingerprint({
+      "systemInformation": self.__systemInformation,
+      "videoDisplays": self.__videoDisplays,
+      "drives": self.__drives
+    })
+
   @property
   def found(self) -> bool:
     """
@@ -564,22 +1335,25 @@ class DXDiagFile:
   @property
   def soundDevices(self):
     """
-    Return a list of strings of detected sound devices
+    Return a list of SoundDevice strings of detected sound devices
     """
+    self.__ParseSections((SECTION_SOUNDDEVICES, SECTION_SOUNDCAPTUREDEVICES))
     return self.__soundDevices
 
   @property
   def systemInformation(self):
     """
-    Return a dictionary of system information
+    Return a SystemInfo record, which also reads as a dictionary of system information
     """
+    self.__ParseSections((SECTION_SYSTEMINFORMATION,))
     return self.__systemInformation
 
   @property
   def videoDisplays(self):
     """
-    Return a list of dictionaries of detected video devices
+    Return a list of VideoDisplay records, which also read as dictionaries, of detected video devices
     """
+    self.__ParseSections((SECTION_DISPLAYDEVICES,))
     return self.__videoDisplays
 
   @property
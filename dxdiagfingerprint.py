@@ -0,0 +1,188 @@
+#/usr/bin/python3
+# dxdiagfingerprint.py
+# hardware fingerprints for parsed DXDiag reports, to group reports by machine, drop repeats and track changes
+# by Derek French
+# v0.2
+# 0.2 - HardwareFingerprint() lives in dxdiagrecords.py now, so DXDiagFile can use it without importing the tools
+# 0.1 - fingerprint from machine name, CPU, memory, video cards and drive models; per-machine dedupe and change history
+
+# imports
+from dxdiagfleet import ReadJSONRecords
+from dxdiagrecords import HardwareFingerprint
+import argparse
+import json
+import sys
+
+# constants
+# what MachineIndex.AddReport() found a report to be
+REPORT_NEW = "new"
+REPORT_CHANGED = "changed"
+REPORT_DUPLICATE = "duplicate"
+
+# functions
+def ReportState(report):
+  """
+  Return the details of a DXDiagFile.ToDict() result that change on the same hardware, as a dictionary
+  of name to string: the OS, DirectX, DPI, each card's raw driver version, monitors, sound devices and DxDiag notes
+  """
+  systemInformation = report["systemInformation"]
+  reportState = {
+    "osName": systemInformation["osName"],
+    "directXVersion": systemInformation["directXVersion"],
+    "userDPI": systemInformation["userDPI"]
+  }
+  for cardData in report["videoDisplays"]:
+    # the raw version, so a newer decode table doesn't look like a driver change
+    reportState[f"driver: {cardData['cardName']}"] = cardData["driverVersionRaw"]
+  reportState["monitors"] = "; ".join(sorted(cardData["monitorName"] for cardData in report["videoDisplays"]))
+  reportState["soundDevices"] = "; ".join(sorted(report["soundDevices"]))
+  reportState["dxErrorNotes"] = "; ".join(report["dxErrorNotes"])
+  return reportState
+# end ReportState()
+
+# classes
+class MachineIndex:
+  """
+  Groups parsed reports by HardwareFingerprint() in one pass, keeping for each machine its report
+  file names and a compact history of what changed from one report to the next.
+  A report whose ReportState() matches the previous report of the same machine is a duplicate.
+  Reports are compared in the order they are added.
+  """
+
+  def __init__(self) -> None:
+    # fingerprint -> {"machineName", "reports", "duplicates", "changes", "state"}
+    self.__machines = {}
+    self.__reportCount = 0
+    self.__duplicateCount = 0
+  # end __init__()
+
+  def AddReport(self, report):
+    """
+    Add one DXDiagFile.ToDict() result, returning REPORT_NEW for the first report of a machine,
+    REPORT_CHANGED if it differs from that machine's last report, REPORT_DUPLICATE if it doesn't,
+    or None for a report that was not found or not valid, which is not added
+    """
+    if not report.get("valid"):
+      return None
+    fingerprint = report.get("fingerprint") or HardwareFingerprint(report)
+    reportState = ReportState(report)
+    self.__reportCount += 1
+    machine = self.__machines.get(fingerprint)
+    if machine is None:
+      self.__machines[fingerprint] = {
+        "machineName": report["systemInformation"]["machineName"],
+        "reports": [report["filename"]],
+        "duplicates": 0,
+        "changes": [],
+        "state": reportState
+      }
+      return REPORT_NEW
+    machine["reports"].append(report["filename"])
+    previousState = machine["state"]
+    if reportState == previousState:
+      machine["duplicates"] += 1
+      self.__duplicateCount += 1
+      return REPORT_DUPLICATE
+    stateChanges = {}
+    for stateName in previousState.keys() | reportState.keys():
+      previousValue = previousState.get(stateName, "")
+      currentValue = reportState.get(stateName, "")
+      if previousValue != currentValue:
+        stateChanges[stateName] = [previousValue, currentValue]
+    machine["changes"].append({
+      "filename": report["filename"],
+      "reportTime": report["systemInformation"]["reportTime"],
+      "changes": dict(sorted(stateChanges.items()))
+    })
+    machine["state"] = reportState
+    return REPORT_CHANGED
+  # end AddReport()
+
+  def AddReports(self, reports):
+    """
+    Add every report in an iterable of DXDiagFile.ToDict() results, yielding the ones that are not duplicates
+    """
+    for report in reports:
+      if self.AddReport(report) != REPORT_DUPLICATE:
+        yield report
+  # end AddReports()
+
+  def Groups(self):
+    """
+    Return a dictionary of fingerprint to the file names of that machine's reports, in the order added
+    """
+    return {fingerprint: list(machine["reports"]) for fingerprint, machine in self.__machines.items()}
+  # end Groups()
+
+  def History(self):
+    """
+    Yield one dictionary per machine: its fingerprint, machine name, report and duplicate counts, the state
+    of its first report and every change after that with the file it showed up in
+    """
+    for fingerprint, machine in self.__machines.items():
+      yield {
+        "fingerprint": fingerprint,
+        "machineName": machine["machineName"],
+        "reports": len(machine["reports"]),
+        "duplicates": machine["duplicates"],
+        "firstReport": machine["reports"][0],
+        "changes": machine["changes"],
+        "currentState": machine["state"]
+      }
+  # end History()
+
+  def WriteHistory(self, outputFile) -> None:
+    """
+    Write History() to an open text file as NDJSON, one machine per line
+    """
+    for machineHistory in self.History():
+      outputFile.write(json.dumps(machineHistory, ensure_ascii=False) + "\n")
+  # end WriteHistory()
+
+  @property
+  def duplicateCount(self) -> int:
+    return self.__duplicateCount
+
+  @property
+  def machineCount(self) -> int:
+    return len(self.__machines)
+
+  @property
+  def reportCount(self) -> int:
+    return self.__reportCount
+# end class MachineIndex
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="dxdiagfingerprint.py",
+    description="group parsed DxDiag reports by machine, the NDJSON records from parsedxdiag.py --json")
+  parser.add_argument("records", nargs="+", metavar="RECORDS",
+    help="NDJSON files of parsed reports in upload order, - for standard input")
+  parser.add_argument("-u", "--unique", metavar="FILE",
+    help="write the reports that are not duplicates to FILE as NDJSON")
+  parser.add_argument("--history", metavar="FILE",
+    help="write each machine's change history to FILE as NDJSON, - for the screen")
+  args = parser.parse_args()
+  machineIndex = MachineIndex()
+  uniqueOutput = None
+  if args.unique is not None:
+    uniqueOutput = open(args.unique, "w", encoding="utf-8")
+  try:
+    for fileName in args.records:
+      for report in machineIndex.AddReports(ReadJSONRecords(fileName)):
+        if uniqueOutput is not None:
+          uniqueOutput.write(json.dumps(report, ensure_ascii=False) + "\n")
+  finally:
+    if uniqueOutput is not None:
+      uniqueOutput.close()
+  print(f"{machineIndex.reportCount} reports from {machineIndex.machineCount} machines, "
+        f"{machineIndex.duplicateCount} duplicates", file=sys.stderr)
+  if args.history == "-":
+    machineIndex.WriteHistory(sys.stdout)
+  elif args.history is not None:
+    with open(args.history, "w", encoding="utf-8") as fh:
+      machineIndex.WriteHistory(fh)
+# end main()
+
+if __name__ == "__main__":
+  main()
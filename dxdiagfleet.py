@@ -0,0 +1,509 @@
+#/usr/bin/python3
+# dxdiagfleet.py
+# column store of many parsed DXDiag reports for fleet-wide counts, shares and histograms
+# by Derek French
+# v0.4
+# 0.4 - number comparisons never match a missing value, "!=" included; CardVendor() builds on DriverVendor()
+# 0.3 - added redecode, to decode each display's raw driver version again with the current decode tables
+# 0.2 - added the fingerprint column, for counting reports per machine
+# 0.1 - array-backed columns with dictionary-encoded strings, row masks, group counts, histograms and CSV export
+
+# imports
+from array import array
+from collections import Counter
+from dxdiagfile import DecodeDriverVersions, DriverVendor
+import argparse
+import bisect
+import csv
+import itertools
+import json
+import math
+import operator
+import re
+import sys
+
+# constants
+# the largest code each array type code can hold; coded columns widen as their dictionary grows
+CODE_TYPES = (("B", 0xFF), ("H", 0xFFFF), ("I", 0xFFFFFFFF))
+# "Windows 11 Home 64-bit (10.0, Build 22000) (22000.co_release.210604-1628)" -> "22000"
+OS_BUILD_PATTERN = re.compile(r"Build (\d+)")
+MASK_TRUE = 1
+COMPARE_OPERATORS = {
+  "==": operator.eq,
+  "!=": operator.ne,
+  "<": operator.lt,
+  "<=": operator.le,
+  ">": operator.gt,
+  ">=": operator.ge
+}
+
+# functions
+def MaskAnd(*masks) -> bytearray:
+  """
+  Return the rows set in every mask; masks are bytearrays of one 0 or 1 per row
+  """
+  rowCount = len(masks[0])
+  combined = int.from_bytes(masks[0], "little")
+  for mask in masks[1:]:
+    combined &= int.from_bytes(mask, "little")
+  return bytearray(combined.to_bytes(rowCount, "little"))
+# end MaskAnd()
+
+def MaskOr(*masks) -> bytearray:
+  """
+  Return the rows set in any mask
+  """
+  rowCount = len(masks[0])
+  combined = int.from_bytes(masks[0], "little")
+  for mask in masks[1:]:
+    combined |= int.from_bytes(mask, "little")
+  return bytearray(combined.to_bytes(rowCount, "little"))
+# end MaskOr()
+
+def MaskNot(mask) -> bytearray:
+  """
+  Return the rows not set in mask
+  """
+  return bytearray(bytes(mask).translate(bytes([1, 0]) + bytes(254)))
+# end MaskNot()
+
+def MaskCount(mask) -> int:
+  """
+  Return the number of rows set in mask
+  """
+  return mask.count(MASK_TRUE)
+# end MaskCount()
+
+def OSBuild(osName: str) -> str:
+  """
+  Return the Windows build number in an "Operating System:" value, or "" if there isn't one
+  """
+  buildMatch = OS_BUILD_PATTERN.search(osName)
+  if buildMatch is None:
+    return ""
+  return buildMatch.group(1)
+# end OSBuild()
+
+def CardVendor(cardManufacturer: str) -> str:
+  """
+  Return "NVIDIA", "AMD", "Intel" or "Other" for a video card manufacturer
+  """
+  driverVendor = DriverVendor(cardManufacturer)
+  if driverVendor != "":
+    return driverVendor
+  if cardManufacturer.startswith("Intel"):
+    return "Intel"
+  return "Other"
+# end CardVendor()
+
+class CodedColumn:
+  """
+  A column of strings stored as small integer codes into a dictionary of the distinct values.
+  Codes sit in an array that starts one byte wide and widens when the dictionary outgrows it,
+  so most fleet columns (vendors, OS builds, DirectX versions) cost one byte per row and
+  can be masked and counted by C loops instead of Python ones.
+  """
+
+  def __init__(self, name: str) -> None:
+    self.__name = name
+    self.__values = []
+    self.__valueCodes = {}
+    self.__typeIndex = 0
+    self.__codes = array(CODE_TYPES[0][0])
+  # end __init__()
+
+  def __len__(self) -> int:
+    return len(self.__codes)
+
+  def __getitem__(self, row: int) -> str:
+    return self.__values[self.__codes[row]]
+
+  def Append(self, value) -> None:
+    """
+    Add value, turned into a string, as the next row
+    """
+    value = "" if value is None else str(value)
+    code = self.__valueCodes.get(value)
+    if code is None:
+      code = len(self.__values)
+      if code > CODE_TYPES[self.__typeIndex][1]:
+        self.__typeIndex += 1
+        self.__codes = array(CODE_TYPES[self.__typeIndex][0], self.__codes)
+      self.__values.append(value)
+      self.__valueCodes[value] = code
+    self.__codes.append(code)
+  # end Append()
+
+  def Code(self, value: str):
+    """
+    Return the code of value, or None if no row holds it
+    """
+    return self.__valueCodes.get(value)
+  # end Code()
+
+  def In(self, values) -> bytearray:
+    """
+    Return a mask of the rows holding any of values
+    """
+    matchCodes = {self.__valueCodes[value] for value in values if value in self.__valueCodes}
+    if self.__codes.typecode == "B":
+      # one byte per row, so bytes.translate maps every code to 0 or 1 in a single C pass
+      codeTable = bytes(1 if code in matchCodes else 0 for code in range(256))
+      return bytearray(self.__codes.tobytes().translate(codeTable))
+    return bytearray(1 if code in matchCodes else 0 for code in self.__codes)
+  # end In()
+
+  def Equals(self, value: str) -> bytearray:
+    """
+    Return a mask of the rows holding value
+    """
+    return self.In((value,))
+  # end Equals()
+
+  def StartsWith(self, prefix: str) -> bytearray:
+    """
+    Return a mask of the rows whose value starts with prefix
+    """
+    return self.In([value for value in self.__values if value.startswith(prefix)])
+  # end StartsWith()
+
+  def Counts(self, mask=None):
+    """
+    Return a dictionary of value to number of rows, most common first
+    mask - only count the rows set in this mask
+    """
+    codes = self.__codes
+    if mask is not None:
+      codes = itertools.compress(codes, mask)
+    return {self.__values[code]: count for code, count in Counter(codes).most_common()}
+  # end Counts()
+
+  @property
+  def name(self) -> str:
+    return self.__name
+
+  @property
+  def values(self):
+    """
+    Return a list of the distinct values in the order they were first seen
+    """
+    return list(self.__values)
+# end class CodedColumn
+
+class NumberColumn:
+  """
+  A column of numbers stored as doubles; a missing value is NaN, which Compare() never matches
+  """
+
+  def __init__(self, name: str) -> None:
+    self.__name = name
+    self.__numbers = array("d")
+  # end __init__()
+
+  def __len__(self) -> int:
+    return len(self.__numbers)
+
+  def __getitem__(self, row: int):
+    number = self.__numbers[row]
+    if math.isnan(number):
+      return None
+    if number.is_integer():
+      return int(number)
+    return number
+
+  def Append(self, value) -> None:
+    """
+    Add value as the next row; None, "" and anything that isn't a number are stored as missing
+    """
+    try:
+      number = float(value)
+    except (TypeError, ValueError):
+      number = math.nan
+    self.__numbers.append(number)
+  # end Append()
+
+  def Compare(self, compareOperator: str, value: float) -> bytearray:
+    """
+    Return a mask of the rows where number <compareOperator> value, e.g. Compare(">", 5); missing rows never match
+    """
+    compare = COMPARE_OPERATORS[compareOperator]
+    compareMask = bytearray(map(compare, self.__numbers, itertools.repeat(value, len(self.__numbers))))
+    # NaN != value is True, so "!=" would otherwise match every missing row
+    return MaskAnd(compareMask, MaskNot(self.Missing()))
+  # end Compare()
+
+  def Missing(self) -> bytearray:
+    """
+    Return a mask of the rows with no value
+    """
+    return bytearray(map(math.isnan, self.__numbers))
+  # end Missing()
+
+  def Histogram(self, binEdges, mask=None):
+    """
+    Return a list of (low edge, high edge, count) for the bins between consecutive binEdges
+    Values below the first edge, at or above the last edge, or missing are left out
+    """
+    numbers = self.__numbers
+    if mask is not None:
+      numbers = itertools.compress(numbers, mask)
+    binCounts = Counter(map(bisect.bisect_right, itertools.repeat(binEdges), numbers))
+    return [(binEdges[i - 1], binEdges[i], binCounts.get(i, 0)) for i in range(1, len(binEdges))]
+  # end Histogram()
+
+  def Sum(self, mask=None) -> float:
+    """
+    Return the total of the values present, only over the rows in mask if given
+    """
+    numbers = self.__numbers
+    if mask is not None:
+      numbers = itertools.compress(numbers, mask)
+    return math.fsum(number for number in numbers if not math.isnan(number))
+  # end Sum()
+
+  @property
+  def name(self) -> str:
+    return self.__name
+# end class NumberColumn
+
+class FleetTable:
+  """
+  A set of equal length columns, one row per record
+  """
+
+  def __init__(self, codedColumns, numberColumns) -> None:
+    """
+    codedColumns - names of the string columns
+    numberColumns - names of the number columns
+    """
+    self.__columns = {}
+    for columnName in codedColumns:
+      self.__columns[columnName] = CodedColumn(columnName)
+    for columnName in numberColumns:
+      self.__columns[columnName] = NumberColumn(columnName)
+    self.__rowCount = 0
+  # end __init__()
+
+  def __len__(self) -> int:
+    return self.__rowCount
+
+  def __getitem__(self, columnName: str):
+    return self.__columns[columnName]
+
+  def AddRow(self, rowValues) -> None:
+    """
+    Add one row from a dictionary of column name to value; missing columns get an empty value
+    """
+    for columnName, column in self.__columns.items():
+      column.Append(rowValues.get(columnName))
+    self.__rowCount += 1
+  # end AddRow()
+
+  def AllRows(self) -> bytearray:
+    """
+    Return a mask with every row set
+    """
+    return bytearray(b"\x01" * self.__rowCount)
+  # end AllRows()
+
+  def GroupCount(self, columnName: str, mask=None):
+    """
+    Return a dictionary of each value of a string column to its number of rows, most common first
+    """
+    return self.__columns[columnName].Counts(mask)
+  # end GroupCount()
+
+  def Histogram(self, columnName: str, binEdges, mask=None):
+    """
+    Return a list of (low edge, high edge, count) for a number column
+    """
+    return self.__columns[columnName].Histogram(binEdges, mask)
+  # end Histogram()
+
+  def Share(self, mask, ofMask=None) -> float:
+    """
+    Return the fraction of the rows in ofMask (default every row) that are also in mask, 0.0 if ofMask is empty
+    """
+    if ofMask is None:
+      totalCount = self.__rowCount
+    else:
+      totalCount = MaskCount(ofMask)
+      mask = MaskAnd(mask, ofMask)
+    if totalCount == 0:
+      return 0.0
+    return MaskCount(mask) / totalCount
+  # end Share()
+
+  def Row(self, row: int):
+    """
+    Return one row as a dictionary of column name to value
+    """
+    return {columnName: column[row] for columnName, column in self.__columns.items()}
+  # end Row()
+
+  def WriteCSV(self, outputFile, mask=None) -> None:
+    """
+    Write the table, or the rows in mask, as CSV with a header row to an open text file
+    """
+    csvWriter = csv.writer(outputFile)
+    csvWriter.writerow(self.__columns.keys())
+    rows = range(self.__rowCount)
+    if mask is not None:
+      rows = itertools.compress(rows, mask)
+    columns = list(self.__columns.values())
+    for row in rows:
+      csvWriter.writerow(["" if column[row] is None else column[row] for column in columns])
+  # end WriteCSV()
+
+  @property
+  def columnNames(self):
+    return list(self.__columns.keys())
+# end class FleetTable
+
+class Fleet:
+  """
+  Parsed reports held as two column tables: reports, one row per report, and displays, one row
+  per video display with "reportRow" pointing back at its report.
+  Feed it DXDiagFile.ToDict() results, such as the records from parsedxdiag.py --json.
+  With redecode, each display's driverVersionRaw is decoded again through DecodeDriverVersions(), so
+  records saved with older decode tables count releases behind against the current ones.
+  """
+
+  REPORT_CODED = ("filename", "fingerprint", "machineName", "osName", "osBuild", "language", "systemDetails",
+                  "cpuName", "directXVersion", "userDPI")
+  REPORT_NUMBERS = ("memoryInMB", "memoryInGB", "displayCount", "soundDeviceCount", "driveCount", "dxErrorCount")
+  DISPLAY_CODED = ("cardName", "cardManufacturer", "vendor", "driverVersion", "driverVersionRaw",
+                   "driverClosestRelease", "displayMode", "monitorName", "monitorModel")
+  DISPLAY_NUMBERS = ("reportRow", "VRAM", "driverReleasesBehind")
+
+  def __init__(self, redecode: bool = False) -> None:
+    self.__redecode = redecode
+    self.__reports = FleetTable(self.REPORT_CODED, self.REPORT_NUMBERS)
+    self.__displays = FleetTable(self.DISPLAY_CODED, self.DISPLAY_NUMBERS)
+  # end __init__()
+
+  def AddReport(self, report) -> bool:
+    """
+    Add one DXDiagFile.ToDict() result; reports that were not found or not valid are skipped
+    Returns True if the report was added
+    """
+    if not report.get("valid"):
+      return False
+    reportRow = len(self.__reports)
+    reportValues = dict(report["systemInformation"])
+    reportValues["filename"] = report["filename"]
+    reportValues["fingerprint"] = report.get("fingerprint", "")
+    reportValues["osBuild"] = OSBuild(reportValues.get("osName", ""))
+    reportValues["displayCount"] = len(report["videoDisplays"])
+    reportValues["soundDeviceCount"] = len(report["soundDevices"])
+    reportValues["driveCount"] = len(report["drives"])
+    reportValues["dxErrorCount"] = report["dxErrorCount"]
+    self.__reports.AddRow(reportValues)
+    driverDecodes = None
+    if self.__redecode:
+      driverDecodes = DecodeDriverVersions([(DriverVendor(cardData["cardManufacturer"]), cardData["driverVersionRaw"])
+                                            for cardData in report["videoDisplays"]])
+    for displayNumber, cardData in enumerate(report["videoDisplays"]):
+      displayValues = dict(cardData)
+      if driverDecodes is not None:
+        displayValues.update(driverDecodes[displayNumber]._asdict())
+      displayValues["reportRow"] = reportRow
+      displayValues["vendor"] = CardVendor(cardData["cardManufacturer"])
+      self.__displays.AddRow(displayValues)
+    return True
+  # end AddReport()
+
+  def AddReports(self, reports) -> int:
+    """
+    Add every report in an iterable of DXDiagFile.ToDict() results, returning the number added
+    """
+    addedCount = 0
+    for report in reports:
+      if self.AddReport(report):
+        addedCount += 1
+    return addedCount
+  # end AddReports()
+
+  def ReleasesBehindShare(self, vendorName: str, minimumBehind: int) -> float:
+    """
+    Return the fraction of vendorName's displays whose driver is more than minimumBehind releases old
+    e.g. ReleasesBehindShare("NVIDIA", 5) for the share of NVIDIA users more than 5 releases behind
+    """
+    vendorMask = self.__displays["vendor"].Equals(vendorName)
+    behindMask = self.__displays["driverReleasesBehind"].Compare(">", minimumBehind)
+    return self.__displays.Share(behindMask, vendorMask)
+  # end ReleasesBehindShare()
+
+  @property
+  def displays(self) -> FleetTable:
+    return self.__displays
+
+  @property
+  def reports(self) -> FleetTable:
+    return self.__reports
+# end class Fleet
+
+def ReadJSONRecords(fileName: str):
+  """
+  Yield each report in an NDJSON file written by parsedxdiag.py --json; "-" reads standard input
+  """
+  if fileName == "-":
+    recordFile = sys.stdin
+  else:
+    recordFile = open(fileName, "r", encoding="utf-8")
+  try:
+    for recordLine in recordFile:
+      if recordLine.strip() != "":
+        yield json.loads(recordLine)
+  finally:
+    if recordFile is not sys.stdin:
+      recordFile.close()
+# end ReadJSONRecords()
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="dxdiagfleet.py",
+    description="summarize many parsed DxDiag reports, the NDJSON records from parsedxdiag.py --json")
+  parser.add_argument("records", nargs="+", metavar="RECORDS",
+    help="NDJSON files of parsed reports, - for standard input")
+  parser.add_argument("-g", "--group", action="append", default=[], metavar="COLUMN",
+    help="count reports or displays by COLUMN, e.g. cardName, osBuild, directXVersion; may be repeated")
+  parser.add_argument("-b", "--behind", type=int, metavar="N",
+    help="show the share of each vendor's displays more than N driver releases behind")
+  parser.add_argument("--redecode", action="store_true",
+    help="decode the driver versions again with the current decode tables instead of using the saved ones")
+  parser.add_argument("--reports-csv", metavar="FILE", help="write the report columns to FILE as CSV")
+  parser.add_argument("--displays-csv", metavar="FILE", help="write the display columns to FILE as CSV")
+  args = parser.parse_args()
+  fleet = Fleet(args.redecode)
+  for fileName in args.records:
+    fleet.AddReports(ReadJSONRecords(fileName))
+  print(f"{len(fleet.reports)} reports, {len(fleet.displays)} video displays")
+  for columnName in args.group:
+    if columnName in fleet.reports.columnNames:
+      fleetTable = fleet.reports
+    elif columnName in fleet.displays.columnNames:
+      fleetTable = fleet.displays
+    else:
+      print(f"ERROR: unknown column [{columnName}].")
+      sys.exit(1)
+    if not isinstance(fleetTable[columnName], CodedColumn):
+      print(f"ERROR: column [{columnName}] is a number column; only text columns can be grouped.")
+      sys.exit(1)
+    print()
+    print(f"{columnName}:")
+    for value, count in fleetTable.GroupCount(columnName).items():
+      print(f"  {count:8}  {count / len(fleetTable):6.1%}  {value}")
+  if args.behind is not None:
+    print()
+    print(f"More than {args.behind} driver releases behind:")
+    for vendorName in ("NVIDIA", "AMD"):
+      print(f"  {vendorName:<8} {fleet.ReleasesBehindShare(vendorName, args.behind):6.1%}")
+  for csvFileName, fleetTable in ((args.reports_csv, fleet.reports), (args.displays_csv, fleet.displays)):
+    if csvFileName is not None:
+      with open(csvFileName, "w", newline="", encoding="utf-8") as fh:
+        fleetTable.WriteCSV(fh)
+# end main()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,252 @@
+#/usr/bin/python3
+# dxdiagrecords.py
+# compact record types for the details parsed out of a DXDiag report
+# by Derek French
+# v0.3
+# 0.3 - records can carry extra fields, such as the ones added through dxdiagfile.RegisterField()
+# 0.2 - added DriverDecode, the result of decoding one raw driver version, and HardwareFingerprint()
+# 0.1 - __slots__ records for system information, video displays, drives, sound devices and DxDiag notes
+
+# imports
+from collections import namedtuple
+from collections.abc import MutableMapping
+import hashlib
+import itertools
+import json
+
+# constants
+# hex digits kept from the SHA-256 of the fingerprinted fields
+FINGERPRINT_LENGTH = 16
+
+# the decoded form of one raw "Driver File Version" string; a tuple, since one result is shared by every
+# display with the same driver
+DriverDecode = namedtuple("DriverDecode", ("driverVersion", "driverReleasesBehind", "driverClosestRelease"))
+
+# functions
+def HardwareFingerprint(report) -> str:
+  """
+  Return a short stable hash of the hardware in a DXDiagFile.ToDict() result: machine name, CPU,
+  memory, each distinct video card with its VRAM and each distinct drive model.
+  Cards and drive models are sorted and counted once, so the order they are listed in, the number of
+  monitors on a card and the number of partitions on a disk don't change the fingerprint.
+  """
+  systemInformation = report["systemInformation"]
+  videoCards = sorted({(cardData["cardName"], cardData["VRAM"]) for cardData in report["videoDisplays"]})
+  driveModels = sorted({driveDetails["model"] for driveDetails in report["drives"]})
+  fingerprintFields = [
+    systemInformation["machineName"],
+    systemInformation["cpuName"],
+    systemInformation["memoryInMB"],
+    [list(videoCard) for videoCard in videoCards],
+    driveModels
+  ]
+  fingerprintSource = json.dumps(fingerprintFields, ensure_ascii=False, separators=(",", ":"))
+  return hashlib.sha256(fingerprintSource.encode("utf-8")).hexdigest()[:FINGERPRINT_LENGTH]
+# end HardwareFingerprint()
+
+# classes
+class DXDiagRecord(MutableMapping):
+  """
+  Base for the fixed-field report records.
+  Fields are __slots__ attributes, so a record carries no per-instance dictionary and no copy
+  of its key strings. A record also behaves as a dictionary of its fields, in field order:
+  record["cardName"], record.get(), dict(record), record.items() and == against a dict all work,
+  so code written for the old dictionaries keeps working. Fields can't be removed, and the only
+  ones that can be added are extra fields, set with SetExtraField(), which follow the fixed ones.
+  Subclasses set FIELDS to a dictionary of field name to default value, __slots__ to its keys,
+  and spell out an __init__ taking every field, which is much faster than a generic one; it also
+  sets _extraFields to None, which becomes a dictionary once an extra field is set.
+  """
+  __slots__ = ("_extraFields",)
+  FIELDS = {}
+
+  def __getitem__(self, fieldName: str):
+    if fieldName in self.FIELDS:
+      return getattr(self, fieldName)
+    if self._extraFields is not None and fieldName in self._extraFields:
+      return self._extraFields[fieldName]
+    raise KeyError(fieldName)
+
+  def __setitem__(self, fieldName: str, value) -> None:
+    if fieldName in self.FIELDS:
+      setattr(self, fieldName, value)
+    elif self._extraFields is not None and fieldName in self._extraFields:
+      self._extraFields[fieldName] = value
+    else:
+      raise KeyError(fieldName)
+
+  def __delitem__(self, fieldName: str) -> None:
+    raise TypeError(f"{type(self).__name__} fields can't be deleted")
+
+  def __iter__(self):
+    if self._extraFields is None:
+      return iter(self.FIELDS)
+    return itertools.chain(self.FIELDS, self._extraFields)
+
+  def __len__(self) -> int:
+    if self._extraFields is None:
+      return len(self.FIELDS)
+    return len(self.FIELDS) + len(self._extraFields)
+
+  def __contains__(self, fieldName) -> bool:
+    return fieldName in self.FIELDS or (self._extraFields is not None and fieldName in self._extraFields)
+
+  def __repr__(self) -> str:
+    fieldList = ", ".join(f"{fieldName}={self[fieldName]!r}" for fieldName in self)
+    return f"{type(self).__name__}({fieldList})"
+
+  def SetExtraField(self, fieldName: str, value) -> None:
+    """
+    Set a field beyond the fixed FIELDS, adding it if it isn't there yet
+    """
+    if fieldName in self.FIELDS:
+      raise KeyError(f"{fieldName} is a {type(self).__name__} field, not an extra one")
+    if self._extraFields is None:
+      self._extraFields = {}
+    self._extraFields[fieldName] = value
+  # end SetExtraField()
+
+  def copy(self):
+    """
+    Return a new record with the same field values
+    """
+    recordCopy = type(self)(**{fieldName: getattr(self, fieldName) for fieldName in self.FIELDS})
+    if self._extraFields is not None:
+      recordCopy._extraFields = dict(self._extraFields)
+    return recordCopy
+  # end copy()
+
+  def ToDict(self):
+    """
+    Return the fields, extra fields included, as a plain dictionary
+    """
+    recordDict = {fieldName: getattr(self, fieldName) for fieldName in self.FIELDS}
+    if self._extraFields is not None:
+      recordDict.update(self._extraFields)
+    return recordDict
+  # end ToDict()
+
+  @property
+  def extraFields(self):
+    """
+    Return a dictionary of the extra fields set on this record
+    """
+    return dict(self._extraFields or {})
+# end class DXDiagRecord
+
+class SystemInfo(DXDiagRecord):
+  """
+  The System Information section of a report
+  """
+  FIELDS = {
+    "reportTime": "",
+    "machineName": "",
+    "osName": "",
+    "language": "",
+    "systemDetails": 'n/a',
+    "cpuName": "",
+    "memoryString": "",
+    "memoryInMB": 0,
+    "memoryInGB": 0,
+    "pageFile": "",
+    "directXVersion": "",
+    "userDPI": ""
+  }
+  __slots__ = tuple(FIELDS)
+
+  def __init__(self, reportTime="", machineName="", osName="", language="", systemDetails='n/a', cpuName="",
+               memoryString="", memoryInMB=0, memoryInGB=0, pageFile="", directXVersion="", userDPI="") -> None:
+    self.reportTime = reportTime
+    self.machineName = machineName
+    self.osName = osName
+    self.language = language
+    self.systemDetails = systemDetails
+    self.cpuName = cpuName
+    self.memoryString = memoryString
+    self.memoryInMB = memoryInMB
+    self.memoryInGB = memoryInGB
+    self.pageFile = pageFile
+    self.directXVersion = directXVersion
+    self.userDPI = userDPI
+    self._extraFields = None
+  # end __init__()
+# end class SystemInfo
+
+class VideoDisplay(DXDiagRecord):
+  """
+  One video display from the Display Devices section, with its decoded driver version
+  """
+  FIELDS = {
+    "cardName": "",
+    "cardManufacturer": "",
+    "VRAM": 0,
+    "displayMode": "",
+    "monitorName": "",
+    "monitorModel": "",
+    "driverVersion": "",
+    "driverVersionRaw": "",
+    "driverReleasesBehind": None,
+    "driverClosestRelease": ""
+  }
+  __slots__ = tuple(FIELDS)
+
+  def __init__(self, cardName="", cardManufacturer="", VRAM=0, displayMode="", monitorName="", monitorModel="",
+               driverVersion="", driverVersionRaw="", driverReleasesBehind=None, driverClosestRelease="") -> None:
+    self.cardName = cardName
+    self.cardManufacturer = cardManufacturer
+    self.VRAM = VRAM
+    self.displayMode = displayMode
+    self.monitorName = monitorName
+    self.monitorModel = monitorModel
+    self.driverVersion = driverVersion
+    self.driverVersionRaw = driverVersionRaw
+    self.driverReleasesBehind = driverReleasesBehind
+    self.driverClosestRelease = driverClosestRelease
+    self._extraFields = None
+  # end __init__()
+# end class VideoDisplay
+
+class Drive(DXDiagRecord):
+  """
+  One drive from the Disk & DVD/CD-ROM Drives section; an empty removable drive has only a letter and model
+  """
+  FIELDS = {
+    "driveLetter": "",
+    "freeSpace": "",
+    "totalSpace": "",
+    "fileSystem": "",
+    "model": ""
+  }
+  __slots__ = tuple(FIELDS)
+
+  def __init__(self, driveLetter="", freeSpace="", totalSpace="", fileSystem="", model="") -> None:
+    self.driveLetter = driveLetter
+    self.freeSpace = freeSpace
+    self.totalSpace = totalSpace
+    self.fileSystem = fileSystem
+    self.model = model
+    self._extraFields = None
+  # end __init__()
+# end class Drive
+
+class SoundDevice(str):
+  """
+  The description of one sound or sound capture device; it is the description string itself
+  """
+  __slots__ = ()
+
+  @property
+  def description(self) -> str:
+    return str(self)
+# end class SoundDevice
+
+class DxNote(str):
+  """
+  One problem reported in the DxDiag Notes section; it is the note text itself
+  """
+  __slots__ = ()
+
+  @property
+  def text(self) -> str:
+    return str(self)
+# end class DxNote
@@ -0,0 +1,388 @@
+#/usr/bin/python3
+# dxdiagserver.py
+# local HTTP service that parses posted DXDiag reports and returns them as JSON
+# by Derek French
+# v0.3
+# 0.3 - --offline keeps worker processes offline too, spawned ones included
+# 0.2 - uploads with a missing, non-numeric or negative Content-Length get 400; a worker process dying answers
+#       500 and starts a fresh pool instead of breaking every later parse, counted as poolRestarts in /metrics
+# 0.1 - POST /parse over a warm thread or process pool, GET /metrics for latency and throughput, GET /health
+
+# imports
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from dxdiagbatch import ParseReport, StartWorker, WarmDriverTables
+from dxdiagcache import CACHE_MAXBYTES
+from drivertables import driverTableRegistry, driverTableUpdater, DRIVER_TABLES, GoOffline
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+# constants
+VERSION = "0.3"
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+# largest upload accepted; real reports are well under 1 MB
+MAX_REPORT_BYTES = 64 * 1024 * 1024
+# parses waiting or running per worker before new uploads get 503 Service Unavailable
+PENDING_PER_WORKER = 4
+# request latencies kept for the percentiles in /metrics
+LATENCY_WINDOW = 1024
+# seconds of completed requests counted for the recent throughput in /metrics
+THROUGHPUT_WINDOW = 60.0
+# seconds between checks for newer driver decode data; each check honours the updater's own TTL
+UPDATE_CHECK_INTERVAL = 60 * 60
+RETRY_AFTER_SECONDS = 1
+
+# classes
+class ServiceMetrics:
+  """
+  Counts requests and keeps the latencies of the most recent ones, safely across request threads
+  """
+
+  def __init__(self) -> None:
+    self.__lock = threading.Lock()
+    self.__startTime = time.monotonic()
+    self.__requestCount = 0
+    self.__statusCounts = {}
+    self.__bytesReceived = 0
+    self.__inFlight = 0
+    self.__latencies = deque(maxlen=LATENCY_WINDOW)
+    self.__finishTimes = deque()
+  # end __init__()
+
+  def Start(self, byteCount: int) -> None:
+    """
+    Record that a parse request with byteCount bytes of report has started
+    """
+    with self.__lock:
+      self.__inFlight += 1
+      self.__bytesReceived += byteCount
+  # end Start()
+
+  def Finish(self, statusCode: int, latencySeconds: float, parsed: bool) -> None:
+    """
+    Record a finished request; parsed is True for requests that went through Start()
+    """
+    finishTime = time.monotonic()
+    with self.__lock:
+      if parsed:
+        self.__inFlight -= 1
+        self.__latencies.append(latencySeconds)
+        self.__finishTimes.append(finishTime)
+        self.__TrimFinishTimes(finishTime)
+      self.__requestCount += 1
+      self.__statusCounts[statusCode] = self.__statusCounts.get(statusCode, 0) + 1
+  # end Finish()
+
+  def __TrimFinishTimes(self, now: float) -> None:
+    """
+    Drop finish times older than THROUGHPUT_WINDOW; call with the lock held
+    """
+    while len(self.__finishTimes) > 0 and self.__finishTimes[0] < now - THROUGHPUT_WINDOW:
+      self.__finishTimes.popleft()
+  # end __TrimFinishTimes()
+
+  def Snapshot(self):
+    """
+    Return a dictionary of the counts, the latency percentiles in milliseconds and the throughput
+    """
+    now = time.monotonic()
+    with self.__lock:
+      self.__TrimFinishTimes(now)
+      latencies = sorted(self.__latencies)
+      uptimeSeconds = now - self.__startTime
+      snapshot = {
+        "uptimeSeconds": round(uptimeSeconds, 3),
+        "requests": self.__requestCount,
+        "statusCounts": {str(statusCode): count for statusCode, count in sorted(self.__statusCounts.items())},
+        "bytesReceived": self.__bytesReceived,
+        "inFlight": self.__inFlight,
+        "parsesPerSecond": round(len(self.__finishTimes) / min(THROUGHPUT_WINDOW, max(uptimeSeconds, 1e-9)), 3)
+      }
+    latencySummary = {"count": len(latencies)}
+    if len(latencies) > 0:
+      for percentile in (50, 90, 99):
+        latencyPos = max(0, math.ceil(percentile / 100 * len(latencies)) - 1)
+        latencySummary[f"p{percentile}"] = round(latencies[latencyPos] * 1000, 3)
+      latencySummary["max"] = round(latencies[-1] * 1000, 3)
+      latencySummary["mean"] = round(sum(latencies) / len(latencies) * 1000, 3)
+    snapshot["latencyMs"] = latencySummary
+    return snapshot
+  # end Snapshot()
+# end class ServiceMetrics
+
+class ParseService:
+  """
+  Parses uploaded reports over a pool that lives as long as the service, so the interpreter,
+  the driver decode tables and the update check are paid for once instead of per report.
+  Worker processes parse in parallel; worker threads avoid the hand-off cost but share one
+  interpreter lock. At most PENDING_PER_WORKER parses per worker are accepted at once.
+  """
+
+  def __init__(self, workerCount: int = 0, useThreads: bool = False, profile: bool = False,
+               cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES,
+               maxReportBytes: int = MAX_REPORT_BYTES) -> None:
+    """
+    workerCount - number of worker processes or threads, 0 for one per CPU
+    useThreads - parse in threads of this process instead of worker processes
+    profile - add each report's DXDiagFile.metrics to its result
+    cacheFolder - reuse and save parsed results in this ReportCache folder
+    maxReportBytes - uploads bigger than this are refused
+    """
+    self.__workerCount = workerCount if workerCount > 0 else (os.cpu_count() or 1)
+    self.__useThreads = useThreads
+    self.__profile = profile
+    self.__cacheFolder = cacheFolder
+    self.__cacheMaxBytes = cacheMaxBytes
+    self.__maxReportBytes = maxReportBytes
+    self.__pendingSlots = threading.BoundedSemaphore(self.__workerCount * PENDING_PER_WORKER)
+    self.__metrics = ServiceMetrics()
+    self.__updateLock = threading.Lock()
+    self.__nextUpdateCheck = time.monotonic() + UPDATE_CHECK_INTERVAL
+    self.__poolLock = threading.Lock()
+    self.__poolRestarts = 0
+    if useThreads:
+      WarmDriverTables()
+    self.__executor = self.__StartPool()
+  # end __init__()
+
+  def __StartPool(self):
+    """
+    Return a new pool of workerCount worker threads or processes
+    """
+    if self.__useThreads:
+      return ThreadPoolExecutor(max_workers=self.__workerCount, thread_name_prefix="DXDiagParse")
+    return ProcessPoolExecutor(max_workers=self.__workerCount, initializer=StartWorker)
+  # end __StartPool()
+
+  def __RestartPool(self, brokenExecutor) -> None:
+    """
+    Replace brokenExecutor with a new pool, unless another request thread already has
+    """
+    with self.__poolLock:
+      if self.__executor is not brokenExecutor:
+        return
+      self.__executor = self.__StartPool()
+      self.__poolRestarts += 1
+    brokenExecutor.shutdown(wait=False, cancel_futures=True)
+  # end __RestartPool()
+
+  def TryParse(self, reportBytes: bytes, reportName: str):
+    """
+    Parse reportBytes and return the ParseReport() result, or None if too many parses are pending
+    Raises BrokenExecutor if a worker process died during the parse, such as being killed for running out
+    of memory; the pool is restarted first, so the next parse gets a working one
+    """
+    if not self.__pendingSlots.acquire(blocking=False):
+      return None
+    try:
+      self.__CheckForUpdates()
+      executor = self.__executor
+      try:
+        parseFuture = executor.submit(ParseReport, reportName, False, self.__profile,
+                                      self.__cacheFolder, self.__cacheMaxBytes, reportBytes)
+        return parseFuture.result()
+      except BrokenExecutor:
+        self.__RestartPool(executor)
+        raise
+    finally:
+      self.__pendingSlots.release()
+  # end TryParse()
+
+  def __CheckForUpdates(self) -> None:
+    """
+    Start a background check for newer driver decode data once every UPDATE_CHECK_INTERVAL
+    """
+    with self.__updateLock:
+      if time.monotonic() < self.__nextUpdateCheck:
+        return
+      self.__nextUpdateCheck = time.monotonic() + UPDATE_CHECK_INTERVAL
+    # the workers' registries reload a table as soon as its file changes
+    threading.Thread(target=driverTableUpdater.Refresh, name="DriverTableRefresh", daemon=True).start()
+  # end __CheckForUpdates()
+
+  def MetricsSnapshot(self):
+    """
+    Return the ServiceMetrics snapshot plus the pool settings and the decode table versions
+    """
+    snapshot = self.__metrics.Snapshot()
+    snapshot["workers"] = self.__workerCount
+    snapshot["pool"] = "threads" if self.__useThreads else "processes"
+    snapshot["poolRestarts"] = self.__poolRestarts
+    snapshot["driverTableVersions"] = {vendorName: driverTableRegistry.GetTableVersion(vendorName)
+                                       for vendorName in DRIVER_TABLES}
+    return snapshot
+  # end MetricsSnapshot()
+
+  def Shutdown(self) -> None:
+    """
+    Wait for the parses in progress and stop the pool
+    """
+    self.__executor.shutdown(wait=True)
+  # end Shutdown()
+
+  @property
+  def maxReportBytes(self) -> int:
+    return self.__maxReportBytes
+
+  @property
+  def metrics(self) -> ServiceMetrics:
+    return self.__metrics
+# end class ParseService
+
+class ParseRequestHandler(BaseHTTPRequestHandler):
+  """
+  POST /parse[?name=NAME] - the body is a raw DxDiag.txt report in any encoding DxDiag writes;
+                            answers DXDiagFile.ToDict() plus "error" as JSON, 422 if the report is unreadable
+  GET /metrics            - request counts, latency percentiles and throughput as JSON
+  GET /health             - {"status": "ok"}
+  """
+  server_version = f"DXDiagParse/{VERSION}"
+  protocol_version = "HTTP/1.1"
+
+  def __SendJSON(self, statusCode: int, body, extraHeaders=None) -> None:
+    responseBytes = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    self.send_response(statusCode)
+    self.send_header("Content-Type", "application/json; charset=utf-8")
+    self.send_header("Content-Length", str(len(responseBytes)))
+    for headerName, headerValue in (extraHeaders or {}).items():
+      self.send_header(headerName, headerValue)
+    self.end_headers()
+    self.wfile.write(responseBytes)
+  # end __SendJSON()
+
+  def __SendError(self, statusCode: int, message: str, extraHeaders=None) -> None:
+    self.__SendJSON(statusCode, {"error": message}, extraHeaders)
+  # end __SendError()
+
+  def do_GET(self) -> None:
+    requestStart = time.perf_counter()
+    requestPath = urlsplit(self.path).path
+    if requestPath == "/metrics":
+      statusCode = HTTPStatus.OK
+      self.__SendJSON(statusCode, self.server.service.MetricsSnapshot())
+    elif requestPath == "/health":
+      statusCode = HTTPStatus.OK
+      self.__SendJSON(statusCode, {"status": "ok"})
+    else:
+      statusCode = HTTPStatus.NOT_FOUND
+      self.__SendError(statusCode, f"no such path: {requestPath}")
+    self.server.service.metrics.Finish(statusCode, time.perf_counter() - requestStart, False)
+  # end do_GET()
+
+  def do_POST(self) -> None:
+    requestStart = time.perf_counter()
+    service = self.server.service
+    requestURL = urlsplit(self.path)
+    if requestURL.path != "/parse":
+      self.__Finish(HTTPStatus.NOT_FOUND, f"no such path: {requestURL.path}", requestStart)
+      return
+    try:
+      contentLength = int(self.headers.get("Content-Length"))
+    except (TypeError, ValueError):
+      contentLength = -1
+    if contentLength < 0:
+      # a negative length would read the body to the end of the connection, past the size limit
+      self.__Finish(HTTPStatus.BAD_REQUEST, "Content-Length must be a byte count", requestStart)
+      return
+    if contentLength > service.maxReportBytes:
+      self.__Finish(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"reports are limited to {service.maxReportBytes} bytes", requestStart)
+      return
+    reportBytes = self.rfile.read(contentLength)
+    reportName = parse_qs(requestURL.query).get("name", ["upload"])[0]
+    service.metrics.Start(len(reportBytes))
+    try:
+      report = service.TryParse(reportBytes, reportName)
+    except Exception as parseError:
+      # counted as finished either way, so inFlight stays right
+      statusCode = HTTPStatus.INTERNAL_SERVER_ERROR
+      self.__SendError(statusCode, f"the parse failed: {type(parseError).__name__}")
+      service.metrics.Finish(statusCode, time.perf_counter() - requestStart, True)
+      return
+    if report is None:
+      statusCode = HTTPStatus.SERVICE_UNAVAILABLE
+      self.__SendError(statusCode, "too many reports being parsed; try again", {"Retry-After": str(RETRY_AFTER_SECONDS)})
+    else:
+      statusCode = HTTPStatus.OK if report["error"] == "" else HTTPStatus.UNPROCESSABLE_ENTITY
+      self.__SendJSON(statusCode, report)
+    service.metrics.Finish(statusCode, time.perf_counter() - requestStart, True)
+  # end do_POST()
+
+  def __Finish(self, statusCode: int, message: str, requestStart: float) -> None:
+    """
+    Answer a request that never reached the parser with an error, and count it
+    """
+    # the body wasn't read, so the connection can't be reused
+    self.close_connection = True
+    self.__SendError(statusCode, message, {"Connection": "close"})
+    self.server.service.metrics.Finish(statusCode, time.perf_counter() - requestStart, False)
+  # end __Finish()
+
+  def log_message(self, format, *args) -> None:
+    if self.server.verbose:
+      super().log_message(format, *args)
+  # end log_message()
+# end class ParseRequestHandler
+
+class ParseServer(ThreadingHTTPServer):
+  """
+  A threaded HTTP server that hands each upload to a ParseService
+  """
+  daemon_threads = True
+
+  def __init__(self, serverAddress, service: ParseService, verbose: bool = False) -> None:
+    """
+    serverAddress - (host, port); port 0 picks a free port, see server_address afterwards
+    """
+    self.service = service
+    self.verbose = verbose
+    super().__init__(serverAddress, ParseRequestHandler)
+  # end __init__()
+# end class ParseServer
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="dxdiagserver.py",
+    description=f"DXDiagParse server {VERSION} - parses DxDiag reports posted to http://HOST:PORT/parse")
+  parser.add_argument("--host", default=SERVER_HOST, help=f"address to listen on, defaults to {SERVER_HOST}")
+  parser.add_argument("-p", "--port", type=int, default=SERVER_PORT, help=f"port to listen on, defaults to {SERVER_PORT}")
+  parser.add_argument("-w", "--workers", type=int, default=0,
+    help="number of worker processes (or threads), defaults to one per CPU")
+  parser.add_argument("--threads", action="store_true", help="parse in threads instead of worker processes")
+  parser.add_argument("--max-size", type=int, default=MAX_REPORT_BYTES // (1024 * 1024), metavar="MB",
+    help=f"largest report accepted, defaults to {MAX_REPORT_BYTES // (1024 * 1024)} MB")
+  parser.add_argument("--profile", action="store_true", help="add parse timings to each result as \"metrics\"")
+  parser.add_argument("--cache", metavar="DIR", help="keep parsed results in DIR and reuse them for repeated reports")
+  parser.add_argument("--offline", action="store_true", help="do not check GitHub for updated driver decode data")
+  parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+  args = parser.parse_args()
+  if args.offline:
+    GoOffline()
+  driverTableUpdater.StartBackgroundRefresh()
+  service = ParseService(args.workers, args.threads, args.profile, args.cache, maxReportBytes=args.max_size * 1024 * 1024)
+  server = ParseServer((args.host, args.port), service, args.verbose)
+  host, port = server.server_address[:2]
+  print(f"DXDiagParse server {VERSION} listening on http://{host}:{port}/parse; press Ctrl+C to stop.", file=sys.stderr)
+  # shutdown() waits for serve_forever() to return, so it can't run on the serving thread itself
+  def StopServer(signalNumber, frame) -> None:
+    threading.Thread(target=server.shutdown, name="ServerShutdown", daemon=True).start()
+  for signalNumber in (signal.SIGINT, signal.SIGTERM):
+    signal.signal(signalNumber, StopServer)
+  try:
+    server.serve_forever()
+  finally:
+    server.server_close()
+    service.Shutdown()
+# end main()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,383 @@
+#/usr/bin/python3
+# dxdiagwatch.py
+# watch a drop folder and parse each DXDiag report as it arrives or changes
+# by Derek French
+# v0.1
+# 0.1 - inotify watcher with a polling fallback, feeding a bounded pool of worker processes
+
+# imports
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dxdiagbatch import ParseReport, REPORT_PATTERN, StartWorker
+from dxdiagcache import CACHE_MAXBYTES
+from drivertables import driverTableUpdater
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+
+# constants
+# inotify event bits, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READSIZE = 64 * 1024
+# seconds between scans of the folder when polling
+POLL_INTERVAL = 2.0
+# seconds the main loop waits for a file event or a finished report before checking again
+WAIT_INTERVAL = 0.2
+# reports queued per worker before the watcher stops taking new events
+QUEUE_PER_WORKER = 64
+# reports handed to the pool per worker at once
+INFLIGHT_PER_WORKER = 2
+# seconds between housekeeping passes while watching: checking for newer driver decode data (each check
+# honours the updater's own TTL) and forgetting files that have been removed from the folder
+HOUSEKEEPING_INTERVAL = 60 * 60
+
+# functions
+def FileStamp(fileName: str):
+  """
+  Return the (modification time in ns, size) of fileName, or None if it is gone
+  """
+  try:
+    fileStat = os.stat(fileName)
+  except OSError:
+    return None
+  return (fileStat.st_mtime_ns, fileStat.st_size)
+# end FileStamp()
+
+class PollingWatcher:
+  """
+  Finds new and changed report files by scanning the folder every POLL_INTERVAL seconds.
+  A file is only reported once its modification time and size are the same on two scans in a
+  row, so a report still being uploaded is not picked up half written, and is reported again
+  only when it changes. Files already in the folder when the watcher starts are not reported.
+  """
+
+  def __init__(self, folder: str, reportPattern: str = REPORT_PATTERN, interval: float = POLL_INTERVAL) -> None:
+    self.__folder = folder
+    self.__reportPattern = reportPattern.lower()
+    self.__interval = interval
+    self.__lastScan = 0.0
+    # file name -> stamp seen on the last scan
+    self.__scanStamps = self.__Scan()
+    # file name -> stamp it was last reported with
+    self.__reportedStamps = dict(self.__scanStamps)
+    self.__lastScan = time.monotonic()
+  # end __init__()
+
+  def __Scan(self):
+    """
+    Return a dictionary of report file path to stamp for every matching file in the folder
+    """
+    scanStamps = {}
+    try:
+      with os.scandir(self.__folder) as folderEntries:
+        for folderEntry in folderEntries:
+          if not fnmatch.fnmatch(folderEntry.name.lower(), self.__reportPattern):
+            continue
+          try:
+            if not folderEntry.is_file():
+              continue
+            entryStat = folderEntry.stat()
+          except OSError:
+            continue
+          scanStamps[folderEntry.path] = (entryStat.st_mtime_ns, entryStat.st_size)
+    except OSError:
+      pass
+    return scanStamps
+  # end __Scan()
+
+  def Changes(self, timeout: float):
+    """
+    Wait up to timeout seconds and return a list of report paths that were written since the last call
+    """
+    waitTime = self.__lastScan + self.__interval - time.monotonic()
+    if waitTime > timeout:
+      time.sleep(max(timeout, 0))
+      return []
+    if waitTime > 0:
+      time.sleep(waitTime)
+    scanStamps = self.__Scan()
+    self.__lastScan = time.monotonic()
+    changedFiles = []
+    reportedStamps = {}
+    for fileName, fileStamp in scanStamps.items():
+      reportedStamp = self.__reportedStamps.get(fileName)
+      if reportedStamp != fileStamp and self.__scanStamps.get(fileName) == fileStamp:
+        # unchanged since the last scan, so the write is done
+        changedFiles.append(fileName)
+        reportedStamp = fileStamp
+      if reportedStamp is not None:
+        reportedStamps[fileName] = reportedStamp
+    # files that are gone drop out of both
+    self.__scanStamps = scanStamps
+    self.__reportedStamps = reportedStamps
+    return changedFiles
+  # end Changes()
+
+  def ExistingFiles(self):
+    """
+    Return every report path in the folder now
+    """
+    return sorted(self.__Scan())
+  # end ExistingFiles()
+
+  def Close(self) -> None:
+    pass
+
+  @property
+  def method(self) -> str:
+    return "polling"
+# end class PollingWatcher
+
+class InotifyWatcher:
+  """
+  Finds new and changed report files with Linux inotify, called through ctypes.
+  Only completed writes (IN_CLOSE_WRITE) and files moved into the folder (IN_MOVED_TO) count,
+  so an upload that writes to a temporary name and renames it is picked up once, complete.
+  Raises OSError when inotify is not available, so callers can fall back to PollingWatcher.
+  """
+
+  def __init__(self, folder: str, reportPattern: str = REPORT_PATTERN) -> None:
+    self.__folder = folder
+    self.__reportPattern = reportPattern.lower()
+    self.__fd = -1
+    libcName = ctypes.util.find_library("c")
+    if libcName is None:
+      raise OSError("C library not found")
+    libc = ctypes.CDLL(libcName, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+      raise OSError("inotify is not available")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    self.__fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if self.__fd < 0:
+      errorNumber = ctypes.get_errno()
+      raise OSError(errorNumber, f"inotify_init1: {os.strerror(errorNumber)}")
+    watchMask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+    if libc.inotify_add_watch(self.__fd, os.fsencode(folder), watchMask) < 0:
+      errorNumber = ctypes.get_errno()
+      os.close(self.__fd)
+      self.__fd = -1
+      raise OSError(errorNumber, f"inotify_add_watch {folder}: {os.strerror(errorNumber)}")
+    self.__overflowed = False
+  # end __init__()
+
+  def Changes(self, timeout: float):
+    """
+    Wait up to timeout seconds and return a list of report paths that were written since the last call
+    After the kernel event queue overflows every report in the folder is returned, so none are missed
+    """
+    readyFds, _, _ = select.select([self.__fd], [], [], max(timeout, 0))
+    if len(readyFds) == 0:
+      return []
+    changedFiles = []
+    try:
+      eventBytes = os.read(self.__fd, INOTIFY_READSIZE)
+    except BlockingIOError:
+      return []
+    eventPos = 0
+    while eventPos + INOTIFY_EVENT.size <= len(eventBytes):
+      _, eventMask, _, nameLength = INOTIFY_EVENT.unpack_from(eventBytes, eventPos)
+      nameStart = eventPos + INOTIFY_EVENT.size
+      fileName = os.fsdecode(eventBytes[nameStart:nameStart + nameLength].rstrip(b"\0"))
+      eventPos = nameStart + nameLength
+      if eventMask & IN_Q_OVERFLOW:
+        self.__overflowed = True
+      elif eventMask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+        raise OSError(f"watched folder {self.__folder} was removed or moved")
+      elif eventMask & IN_ISDIR or fileName == "":
+        continue
+      elif fnmatch.fnmatch(fileName.lower(), self.__reportPattern):
+        changedFiles.append(os.path.join(self.__folder, fileName))
+    # end while eventPos
+    if self.__overflowed:
+      self.__overflowed = False
+      return self.ExistingFiles()
+    return changedFiles
+  # end Changes()
+
+  def ExistingFiles(self):
+    """
+    Return every report path in the folder now
+    """
+    existingFiles = []
+    with os.scandir(self.__folder) as folderEntries:
+      for folderEntry in folderEntries:
+        if fnmatch.fnmatch(folderEntry.name.lower(), self.__reportPattern) and folderEntry.is_file():
+          existingFiles.append(folderEntry.path)
+    return sorted(existingFiles)
+  # end ExistingFiles()
+
+  def Close(self) -> None:
+    if self.__fd >= 0:
+      os.close(self.__fd)
+      self.__fd = -1
+  # end Close()
+
+  @property
+  def method(self) -> str:
+    return "inotify"
+# end class InotifyWatcher
+
+def OpenWatcher(folder: str, reportPattern: str = REPORT_PATTERN, polling: bool = False):
+  """
+  Return an InotifyWatcher for folder, or a PollingWatcher when inotify can't be used or polling is True
+  """
+  if not os.path.isdir(folder):
+    raise FileNotFoundError(f"watch folder not found: {folder}")
+  if not polling and sys.platform.startswith("linux"):
+    try:
+      return InotifyWatcher(folder, reportPattern)
+    except OSError:
+      pass
+  return PollingWatcher(folder, reportPattern)
+# end OpenWatcher()
+
+class ReportWatcher:
+  """
+  Parses each report that lands in, or is rewritten in, a folder, over a pool of worker processes.
+  Workers live as long as the watcher, so each loads the driver decode tables once and keeps them.
+  Backpressure: at most INFLIGHT_PER_WORKER reports per worker are handed to the pool at once,
+  and once QUEUE_PER_WORKER reports per worker are waiting the watcher stops taking file events
+  (inotify keeps them in the kernel; a queue overflow rescans the folder) until the pool catches up.
+  Stop() (or SIGINT/SIGTERM while Run() is in the main thread) stops taking new files, finishes
+  the reports already queued, shuts the pool down and returns; a second signal drops the queued
+  reports that haven't been handed out yet, so only the ones being parsed are waited for.
+  """
+
+  def __init__(self, folder: str, onReport, workerCount: int = 0, streaming: bool = False, profile: bool = False,
+               cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES, reportPattern: str = REPORT_PATTERN,
+               existing: bool = False, polling: bool = False) -> None:
+    """
+    folder - the drop folder to watch; files in subfolders are not watched
+    onReport - called with each ParseReport() result, in this process, as each report finishes
+    workerCount - number of worker processes, 0 for one per CPU
+    existing - also parse the reports already in the folder when Run() starts
+    polling - scan the folder every POLL_INTERVAL seconds even where inotify is available
+    """
+    self.__folder = folder
+    self.__onReport = onReport
+    self.__workerCount = workerCount if workerCount > 0 else (os.cpu_count() or 1)
+    self.__parseOptions = (streaming, profile, cacheFolder, cacheMaxBytes)
+    self.__reportPattern = reportPattern
+    self.__existing = existing
+    self.__polling = polling
+    self.__stopEvent = threading.Event()
+    self.__dropQueued = False
+    # path -> stamp of the file when it was last handed to the pool
+    self.__parsedStamps = {}
+    # paths waiting for the pool, oldest first; dicts keep insertion order and drop repeats
+    self.__queuedFiles = {}
+    self.__watcherMethod = ""
+    self.__reportCount = 0
+  # end __init__()
+
+  def __QueueFile(self, fileName: str) -> None:
+    """
+    Queue fileName unless it is unchanged since it was last parsed
+    """
+    fileStamp = FileStamp(fileName)
+    if fileStamp is None or self.__parsedStamps.get(fileName) == fileStamp:
+      return
+    self.__queuedFiles[fileName] = None
+  # end __QueueFile()
+
+  def __HandleSignal(self, signalNumber, frame) -> None:
+    if self.__stopEvent.is_set():
+      self.__dropQueued = True
+    self.__stopEvent.set()
+  # end __HandleSignal()
+
+  def Run(self) -> int:
+    """
+    Watch and parse until Stop() is called or a SIGINT/SIGTERM arrives; returns the number of reports parsed
+    """
+    previousHandlers = {}
+    if threading.current_thread() is threading.main_thread():
+      for signalNumber in (signal.SIGINT, signal.SIGTERM):
+        previousHandlers[signalNumber] = signal.signal(signalNumber, self.__HandleSignal)
+    watcher = OpenWatcher(self.__folder, self.__reportPattern, self.__polling)
+    self.__watcherMethod = watcher.method
+    maxInFlight = self.__workerCount * INFLIGHT_PER_WORKER
+    maxQueued = self.__workerCount * QUEUE_PER_WORKER
+    inFlight = set()
+    nextHousekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+    try:
+      with ProcessPoolExecutor(max_workers=self.__workerCount, initializer=StartWorker) as executor:
+        if self.__existing:
+          for fileName in watcher.ExistingFiles():
+            self.__QueueFile(fileName)
+        while True:
+          if self.__stopEvent.is_set():
+            if self.__dropQueued:
+              self.__queuedFiles.clear()
+            if len(self.__queuedFiles) == 0 and len(inFlight) == 0:
+              break
+          # hand queued reports to the pool while it has room
+          while len(self.__queuedFiles) > 0 and len(inFlight) < maxInFlight:
+            fileName = next(iter(self.__queuedFiles))
+            del self.__queuedFiles[fileName]
+            self.__parsedStamps[fileName] = FileStamp(fileName)
+            inFlight.add(executor.submit(ParseReport, fileName, *self.__parseOptions))
+          # only take new file events while there is room to queue them
+          if not self.__stopEvent.is_set() and len(self.__queuedFiles) < maxQueued:
+            for fileName in watcher.Changes(0 if len(inFlight) > 0 else WAIT_INTERVAL):
+              self.__QueueFile(fileName)
+          if len(inFlight) > 0:
+            doneFutures, inFlight = wait(inFlight, timeout=WAIT_INTERVAL, return_when=FIRST_COMPLETED)
+            for doneFuture in doneFutures:
+              self.__reportCount += 1
+              self.__onReport(doneFuture.result())
+          if time.monotonic() >= nextHousekeeping:
+            # the workers' registries reload a table as soon as its file changes
+            threading.Thread(target=driverTableUpdater.Refresh, name="DriverTableRefresh", daemon=True).start()
+            for fileName in list(self.__parsedStamps):
+              if not os.path.exists(fileName):
+                del self.__parsedStamps[fileName]
+            nextHousekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+        # end while True
+    finally:
+      watcher.Close()
+      for signalNumber, previousHandler in previousHandlers.items():
+        signal.signal(signalNumber, previousHandler)
+    return self.__reportCount
+  # end Run()
+
+  def Stop(self, dropQueued: bool = False) -> None:
+    """
+    Ask Run() to stop taking new files and return once the queued reports are done
+    dropQueued - drop the reports still waiting for the pool instead of parsing them
+    """
+    if dropQueued:
+      self.__dropQueued = True
+    self.__stopEvent.set()
+  # end Stop()
+
+  @property
+  def queuedCount(self) -> int:
+    return len(self.__queuedFiles)
+
+  @property
+  def reportCount(self) -> int:
+    return self.__reportCount
+
+  @property
+  def watcherMethod(self) -> str:
+    """
+    Return "inotify" or "polling" once Run() has started
+    """
+    return self.__watcherMethod
+# end class ReportWatcher
@@ -0,0 +1,504 @@
+#/usr/bin/python3
+# generatedxdiag.py
+# generate synthetic DxDiag.txt reports for scale and stress testing
+# by Derek French
+# v0.2
+# 0.2 - sizes take K, M and G as well as KB, MB and GB; a bad size is a usage error naming the units
+#       instead of a traceback
+# 0.1 - seeded reports in the DxDiag section layout with configurable display, sound, drive, device and problem
+#       counts, sizes, encodings and driver vendors; driver versions come from the decode tables; corpus manifest
+
+# imports
+from drivertables import DRIVER_TABLES, LoadAMDDriverTable, LoadNVIDIADriverTable
+from collections import namedtuple
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+
+# constants
+VERSION = "0.2"
+SCRIPT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SEED = "dxdiag"
+# one line per generated report: its file name, seed, encoding, size and what a parse should find in it
+MANIFEST_FILE = "manifest.ndjson"
+# device entries written to the file at a time when padding a report out to its size
+WRITE_BATCH = 1000
+# distinct padding entries drawn up front; a big report repeats them in a random order
+PADDING_POOL_SIZE = 256
+ENCODINGS = ("utf-8", "utf-8-sig", "utf-16", "utf-16-le", "utf-16-be")
+ENCODING_MIXED = "mixed"
+VENDOR_INTEL = "Intel"
+VENDORS = ("NVIDIA", "AMD", VENDOR_INTEL)
+NEWLINES = {"crlf": "\r\n", "lf": "\n"}
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 * 1024, "MB": 1024 * 1024, "G": 1024 * 1024 * 1024,
+              "GB": 1024 * 1024 * 1024}
+
+# what one report holds; the counts are (smallest, largest) ranges each report picks from
+# displays - Display Devices entries, sounds - Sound Devices entries, captures - Sound Capture Devices entries
+# drives - Disk & DVD/CD-ROM Drives entries, devices - System Devices entries before any padding
+# problems - DxDiag Notes tabs with "There is a problem" instead of "No problems found"
+# sizeBytes - pad the device lists out to about this many bytes of file, 0 for no padding
+# encoding - one of ENCODINGS, or ENCODING_MIXED to pick one per report
+# vendors - the video card vendors to draw from, any of VENDORS
+ReportOptions = namedtuple("ReportOptions",
+  ("displays", "sounds", "captures", "drives", "devices", "problems", "sizeBytes", "encoding", "newline", "vendors"),
+  defaults=((1, 2), (1, 3), (1, 2), (1, 4), (40, 120), (0, 0), 0, "utf-8", "\r\n", VENDORS))
+
+# the fields of one generated report that a parse should give back
+ReportSummary = namedtuple("ReportSummary",
+  ("machineName", "encoding", "displays", "vendors", "soundDevices", "drives", "dxErrorNotes"))
+
+OPERATING_SYSTEMS = [
+  "Windows 11 Home 64-bit (10.0, Build 22631) (22621.ni_release.220506-1250)",
+  "Windows 11 Pro 64-bit (10.0, Build 26100) (26100.ge_release.240331-1435)",
+  "Windows 10 Home 64-bit (10.0, Build 19045) (19041.vb_release.191206-1406)",
+  "Windows 10 Pro 64-bit (10.0, Build 19045) (19041.vb_release.191206-1406)",
+  "Windows Server 2022 Datacenter 64-bit (10.0, Build 20348) (20348.fe_release.210507-1500)"
+]
+LANGUAGES = [
+  "English (Regional Setting: English)",
+  "German (Regional Setting: German)",
+  "French (Regional Setting: French)",
+  "Portuguese (Regional Setting: Portuguese)"
+]
+SYSTEM_MODELS = [
+  ("Micro-Star International Co., Ltd.", "MS-7C56"),
+  ("ASUS", "System Product Name"),
+  ("Dell Inc.", "Precision 7960 Tower"),
+  ("LENOVO", "82JU"),
+  ("HP", "HP Z8 Fury G5 Workstation Desktop PC"),
+  ("System manufacturer", "System Product Name")
+]
+PROCESSORS = [
+  "AMD Ryzen 7 5800X3D 8-Core Processor            (16 CPUs), ~3.4GHz",
+  "AMD Ryzen 9 7950X 16-Core Processor             (32 CPUs), ~4.5GHz",
+  "AMD Ryzen 7 4800H with Radeon Graphics          (16 CPUs), ~2.9GHz",
+  "Intel(R) Core(TM) i7-10700K CPU @ 3.80GHz (16 CPUs), ~3.8GHz",
+  "13th Gen Intel(R) Core(TM) i9-13900K (32 CPUs), ~3.0GHz",
+  "Intel(R) Xeon(R) w9-3495X (112 CPUs), ~1.9GHz"
+]
+MEMORY_SIZES = [8192, 16384, 32768, 65536, 131072, 524288]
+USER_DPIS = ["96 DPI (100 percent)", "120 DPI (125 percent)", "144 DPI (150 percent)"]
+# vendor -> Manufacturer line and (card name, dedicated memory in MB) choices
+VIDEO_CARDS = {
+  "NVIDIA": ("NVIDIA", [
+    ("NVIDIA GeForce RTX 4090", 24142),
+    ("NVIDIA GeForce RTX 3080", 10067),
+    ("NVIDIA GeForce RTX 3060", 12086),
+    ("NVIDIA GeForce GTX 1660 SUPER", 5991),
+    ("NVIDIA RTX A6000", 48571)
+  ]),
+  "AMD": ("Advanced Micro Devices, Inc.", [
+    ("AMD Radeon RX 7900 XTX", 24523),
+    ("AMD Radeon RX 6800", 16337),
+    ("AMD Radeon RX 580 2048SP", 8147),
+    ("AMD Radeon(TM) Graphics", 512)
+  ]),
+  VENDOR_INTEL: ("Intel Corporation", [
+    ("Intel(R) UHD Graphics 770", 128),
+    ("Intel(R) Iris(R) Xe Graphics", 128),
+    ("Intel(R) Arc(TM) A770 Graphics", 16064)
+  ])
+}
+DISPLAY_MODES = [
+  "1920 x 1080 (32 bit) (60Hz)",
+  "2560 x 1440 (32 bit) (144Hz)",
+  "2560 x 1080 (32 bit) (59Hz)",
+  "3840 x 2160 (32 bit) (60Hz)"
+]
+MONITORS = [
+  ("Generic PnP Monitor", "LG ULTRAWIDE"),
+  ("Generic PnP Monitor", "DELL U2720Q"),
+  ("Generic PnP Monitor", "ASUS VG27A"),
+  ("Generic Monitor (XG270HU)", "XG270HU")
+]
+SOUND_DEVICES = [
+  "Speakers (Realtek(R) Audio)",
+  "Headphones (Arctis 5 Game)",
+  "Speakers (High Definition Audio Device)",
+  "DELL U2720Q (NVIDIA High Definition Audio)",
+  "Digital Audio (S/PDIF) (High Definition Audio Device)"
+]
+CAPTURE_DEVICES = [
+  "Microphone (Realtek(R) Audio)",
+  "Headset Earphone (Arctis 5 Chat)",
+  "Microphone (Yeti Stereo Microphone)"
+]
+# (model, total GB) of fixed drives
+DRIVE_MODELS = [
+  ("Samsung SSD 980 PRO 1TB", 953.8),
+  ("Samsung SSD 850 EVO 500GB", 465.8),
+  ("WDC WD40EZRZ-00GXCB0", 3726.0),
+  ("ST8000NM000A-2KE101", 7452.0),
+  ("KINGSTON SA400S37480G", 447.1)
+]
+REMOVABLE_DRIVE_MODELS = ["HL-DT-ST DVDRAM GH24NSD1", "Generic STORAGE DEVICE USB Device"]
+FILE_SYSTEMS = ["NTFS", "NTFS", "NTFS", "ReFS", "exFAT"]
+NOTE_TAB_DISPLAY = "Display Tab {0}"
+NOTE_TAB_SOUND = "Sound Tab {0}"
+NOTE_TAB_INPUT = "Input Tab"
+# DxDiag Notes tab -> the problems it can report; {0} is a card name
+PROBLEM_TEXTS = {
+  NOTE_TAB_DISPLAY: [
+    "There is a problem with the display driver.",
+    "There is a problem with {0} device. For more information, search for 'graphics drivers' in Windows Support."
+  ],
+  NOTE_TAB_SOUND: ["There is a problem with the sound device. For more information, search for 'audio drivers' in Windows Support."],
+  NOTE_TAB_INPUT: ["There is a problem with the input device. Try unplugging and reconnecting it."]
+}
+SYSTEM_DEVICE_NAMES = [
+  "PCI Express Root Port",
+  "PCI standard host CPU bridge",
+  "AMD SMBus",
+  "Intel(R) USB 3.10 eXtensible Host Controller - 1.20 (Microsoft)",
+  "Standard NVM Express Controller",
+  "High Definition Audio Controller",
+  "Realtek PCIe 2.5GbE Family Controller",
+  "PCI Express Upstream Switch Port"
+]
+INPUT_DEVICE_NAMES = ["Mouse", "Keyboard", "Logitech G502 HERO", "Xbox Controller", "HID-compliant consumer control device"]
+
+# functions
+def ParseCountRange(countText: str):
+  """
+  Turn a command line count, "4" or "1-8", into a (smallest, largest) range
+  """
+  lowText, separator, highText = countText.partition("-")
+  countRange = (int(lowText), int(highText) if separator else int(lowText))
+  if countRange[0] < 0 or countRange[1] < countRange[0]:
+    raise ValueError(f"bad count range {countText!r}")
+  return countRange
+# end ParseCountRange()
+
+def ParseSize(sizeText: str) -> int:
+  """
+  Turn a command line size, "50MB", "512K" or "1000000", into bytes
+  """
+  sizeText = sizeText.strip().upper()
+  numberText = sizeText.rstrip("KMGB")
+  unitText = sizeText[len(numberText):]
+  try:
+    return int(float(numberText) * SIZE_UNITS[unitText])
+  except (KeyError, ValueError):
+    # argparse prints the message of an ArgumentTypeError; a KeyError would be a traceback
+    raise argparse.ArgumentTypeError(f"bad size {sizeText!r}; give a number with B, K, KB, M, MB, G or GB") from None
+# end ParseSize()
+
+@functools.lru_cache(maxsize=None)
+def DriverTableVersions(vendorName: str):
+  """
+  Return the release versions in a vendor's decode table, in table order, read once per process
+  """
+  if vendorName == "AMD":
+    driverVersions = LoadAMDDriverTable(os.path.join(SCRIPT_FOLDER, DRIVER_TABLES["AMD"]))
+  else:
+    driverVersions = LoadNVIDIADriverTable(os.path.join(SCRIPT_FOLDER, DRIVER_TABLES["NVIDIA"]))
+  return tuple(versionNumber for versionNumber in driverVersions if versionNumber != "version")
+# end DriverTableVersions()
+
+def DriverFileVersion(rng, vendorName: str) -> str:
+  """
+  Return a "Driver File Version" value for a vendor, a release from its decode table when it has one
+  AMD: "32.00.21025.1024 (English)" as listed; NVIDIA: "581.42" becomes "32.00.0015.8142 (English)",
+  the reverse of DecodeNVIDIADriverVersion(); Intel has no table, so any recent looking version
+  """
+  if vendorName == "AMD":
+    return rng.choice(DriverTableVersions("AMD")) + " (English)"
+  if vendorName == "NVIDIA":
+    majorVersion, _, minorVersion = rng.choice(DriverTableVersions("NVIDIA")).partition(".")
+    return f"32.00.001{majorVersion[0]}.{majorVersion[1:]}{minorVersion} (English)"
+  return f"32.00.0101.{rng.randint(4000, 6999)} (English)"
+# end DriverFileVersion()
+
+def PickCount(rng, countRange) -> int:
+  return rng.randint(countRange[0], countRange[1])
+# end PickCount()
+
+def SectionHeader(sectionName: str) -> str:
+  """
+  Return a section title between two rules of its own length, as DxDiag writes them
+  """
+  sectionRule = "-" * len(sectionName)
+  return f"{sectionRule}\n{sectionName}\n{sectionRule}\n"
+# end SectionHeader()
+
+def SystemDeviceEntry(rng) -> str:
+  vendorID = rng.choice(["1022", "8086", "10DE", "10EC", "144D"])
+  return (f"     Name: {rng.choice(SYSTEM_DEVICE_NAMES)}\n"
+          f"Device ID: PCI\\VEN_{vendorID}&DEV_{rng.randint(0, 0xFFFF):04X}&SUBSYS_{rng.randint(0, 0xFFFFFFFF):08X}"
+          f"&REV_{rng.randint(0, 0xFF):02X}\\{rng.randint(1, 9)}&{rng.randint(0, 0xFFFFFFF):07X}&0&{rng.randint(0, 0xFF):02X}\n"
+          f"   Driver: C:\\WINDOWS\\system32\\DRIVERS\\pci.sys, 10.00.{rng.randint(19041, 26100)}.{rng.randint(1, 5000)} "
+          f"(English), 1/1/2024 00:00:00, {rng.randint(20000, 900000)} bytes\n\n")
+# end SystemDeviceEntry()
+
+def InputDeviceEntry(rng) -> str:
+  return (f"      Device Name: {rng.choice(INPUT_DEVICE_NAMES)}\n"
+          f"         Attached: 1\n"
+          f"    Controller ID: n/a\n"
+          f"Vendor/Product ID: 0x{rng.randint(0, 0xFFFF):04X}, 0x{rng.randint(0, 0xFFFF):04X}\n"
+          f"        FF Driver: n/a\n\n")
+# end InputDeviceEntry()
+
+def BuildSystemInformation(rng, machineName: str) -> str:
+  systemManufacturer, systemModel = rng.choice(SYSTEM_MODELS)
+  memoryInMB = rng.choice(MEMORY_SIZES)
+  pageFileUsed = rng.randint(memoryInMB // 8, memoryInMB // 2)
+  return (SectionHeader("System Information") +
+          f"      Time of this report: {rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2021, 2025)}, "
+          f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}\n"
+          f"             Machine name: {machineName}\n"
+          f"               Machine Id: {{{rng.getrandbits(128):032X}}}\n"
+          f"         Operating System: {rng.choice(OPERATING_SYSTEMS)}\n"
+          f"                 Language: {rng.choice(LANGUAGES)}\n"
+          f"      System Manufacturer: {systemManufacturer}\n"
+          f"             System Model: {systemModel}\n"
+          f"                     BIOS: {rng.choice(['1.A0', '2.14.0', 'F20'])} (type: UEFI)\n"
+          f"                Processor: {rng.choice(PROCESSORS)}\n"
+          f"                   Memory: {memoryInMB}MB RAM\n"
+          f"      Available OS Memory: {memoryInMB - rng.randint(64, 512)}MB RAM\n"
+          f"                Page File: {pageFileUsed}MB used, {memoryInMB - pageFileUsed}MB available\n"
+          f"              Windows Dir: C:\\WINDOWS\n"
+          f"          DirectX Version: DirectX 12\n"
+          f"      DX Setup Parameters: Not found\n"
+          f"         User DPI Setting: {rng.choice(USER_DPIS)}\n"
+          f"       System DPI Setting: 96 DPI (100 percent)\n"
+          f"          DWM DPI Scaling: Disabled\n"
+          f"                 Miracast: Available, with HDCP\n\n")
+# end BuildSystemInformation()
+
+def BuildDxDiagNotes(rng, displayCount: int, soundCount: int, problemCount: int, cardNames) -> str:
+  """
+  Return the DxDiag Notes section, with problemCount of its tabs reporting a problem
+  """
+  # more problems than tabs go on extra display tabs, as a report with many adapters can have
+  displayTabCount = max(displayCount, problemCount - soundCount - 1)
+  noteTabs = [(NOTE_TAB_DISPLAY, tabNumber) for tabNumber in range(1, displayTabCount + 1)]
+  noteTabs += [(NOTE_TAB_SOUND, tabNumber) for tabNumber in range(1, soundCount + 1)]
+  noteTabs.append((NOTE_TAB_INPUT, 0))
+  problemTabs = set(rng.sample(range(len(noteTabs)), problemCount))
+  noteLines = []
+  for tabIndex, (tabName, tabNumber) in enumerate(noteTabs):
+    if tabIndex in problemTabs:
+      noteText = rng.choice(PROBLEM_TEXTS[tabName]).format(rng.choice(cardNames) if cardNames else "the display")
+    else:
+      noteText = "No problems found."
+    noteLines.append(f"{tabName.format(tabNumber):>19}: {noteText}\n")
+  return SectionHeader("DxDiag Notes") + "".join(noteLines) + "\n"
+# end BuildDxDiagNotes()
+
+def BuildDisplay(rng, vendorName: str) -> str:
+  cardManufacturer, cardChoices = VIDEO_CARDS[vendorName]
+  cardName, dedicatedMemory = rng.choice(cardChoices)
+  monitorName, monitorModel = rng.choice(MONITORS)
+  return (f"           Card name: {cardName}\n"
+          f"        Manufacturer: {cardManufacturer}\n"
+          f"           Chip type: {cardName}\n"
+          f"            DAC type: Integrated RAMDAC\n"
+          f"         Device Type: Full Device (POST)\n"
+          f"          Device Key: Enum\\PCI\\VEN_{rng.randint(0, 0xFFFF):04X}&DEV_{rng.randint(0, 0xFFFF):04X}\n"
+          f"      Display Memory: {dedicatedMemory + rng.randint(8000, 32000)} MB\n"
+          f"    Dedicated Memory: {dedicatedMemory} MB\n"
+          f"       Shared Memory: {rng.randint(8000, 32000)} MB\n"
+          f"        Current Mode: {rng.choice(DISPLAY_MODES)}\n"
+          f"         HDR Support: {rng.choice(['Supported', 'Not Supported'])}\n"
+          f"        Monitor Name: {monitorName}\n"
+          f"       Monitor Model: {monitorModel}\n"
+          f"          Monitor Id: {monitorModel.replace(' ', '')[:7].upper()}\n"
+          f"         Native Mode: {rng.choice(DISPLAY_MODES)}\n"
+          f"         Output Type: {rng.choice(['HDMI', 'Displayport External', 'Internal'])}\n"
+          f"         Driver Name: C:\\WINDOWS\\System32\\DriverStore\\FileRepository\\display.inf\\umd.dll\n"
+          f" Driver File Version: {DriverFileVersion(rng, vendorName)}\n"
+          f"      Driver Version: {rng.randint(27, 32)}.0.{rng.randint(10, 22000)}.{rng.randint(1000, 9999)}\n"
+          f"         DDI Version: 12\n"
+          f"      Feature Levels: 12_1,12_0,11_1,11_0,10_1,10_0,9_3,9_2,9_1\n"
+          f"        Driver Model: WDDM 3.1\n"
+          f" PanelFitter Stretch: n/a\n\n")
+# end BuildDisplay()
+
+def BuildDrive(rng, driveNumber: int) -> str:
+  # C: to Z:, then around again, as a server with more volumes than letters can list them
+  driveLetter = chr(ord("C") + driveNumber % 24)
+  if driveNumber > 0 and rng.random() < 0.1:
+    # an empty removable drive lists only its model
+    return f"      Drive: {driveLetter}:\n      Model: {rng.choice(REMOVABLE_DRIVE_MODELS)}\n\n"
+  driveModel, totalSpace = rng.choice(DRIVE_MODELS)
+  return (f"      Drive: {driveLetter}:\n"
+          f" Free Space: {rng.uniform(0.1, totalSpace):.1f} GB\n"
+          f"Total Space: {totalSpace:.1f} GB\n"
+          f"File System: {rng.choice(FILE_SYSTEMS)}\n"
+          f"      Model: {driveModel}\n\n")
+# end BuildDrive()
+
+def EncodedLength(text: str, encoding: str, newline: str) -> int:
+  """
+  Return the bytes text takes in a file, for the ASCII text reports are generated in
+  """
+  charCount = len(text) + text.count("\n") * (len(newline) - 1)
+  return charCount * 2 if encoding.startswith("utf-16") else charCount
+# end EncodedLength()
+
+def IterReportParts(seed, options: ReportOptions = ReportOptions(), summary=None):
+  """
+  Yield the text of one report a piece at a time, the same text for the same seed and options
+  Lines end in "\n"; translate them to options.newline when writing.
+  summary - a list that gets the report's ReportSummary appended once the hardware has been picked
+  """
+  rng = random.Random(seed)
+  encoding = options.encoding
+  if encoding == ENCODING_MIXED:
+    encoding = rng.choice(ENCODINGS)
+  machineName = f"{rng.choice(['DESKTOP', 'LAPTOP', 'WORKSTATION', 'SRV'])}-{rng.getrandbits(32):08X}"
+  displayVendors = [rng.choice(options.vendors) for displayNumber in range(PickCount(rng, options.displays))]
+  soundCount = PickCount(rng, options.sounds)
+  captureCount = PickCount(rng, options.captures)
+  driveCount = PickCount(rng, options.drives)
+  deviceCount = PickCount(rng, options.devices)
+  problemCount = PickCount(rng, options.problems)
+  displayParts = [BuildDisplay(rng, vendorName) for vendorName in displayVendors]
+  cardNames = [displayPart.split("\n", 1)[0].partition(": ")[2] for displayPart in displayParts]
+  headParts = [
+    BuildSystemInformation(rng, machineName),
+    BuildDxDiagNotes(rng, len(displayVendors), soundCount, problemCount, cardNames),
+    SectionHeader("DirectX Debug Levels") + "Direct3D:    0/4 (retail)\nDirectDraw:  0/4 (retail)\n\n",
+    SectionHeader("Display Devices")
+  ]
+  headParts += displayParts
+  headParts.append(SectionHeader("Sound Devices"))
+  headParts += [f"            Description: {rng.choice(SOUND_DEVICES)}\n Default Sound Playback: "
+                f"{'Yes' if soundNumber == 0 else 'No'}\n\n" for soundNumber in range(soundCount)]
+  headParts.append(SectionHeader("Sound Capture Devices"))
+  headParts += [f"            Description: {rng.choice(CAPTURE_DEVICES)}\n  Default Sound Capture: "
+                f"{'Yes' if captureNumber == 0 else 'No'}\n\n" for captureNumber in range(captureCount)]
+  headParts.append(SectionHeader("DirectInput Devices"))
+  inputParts = [InputDeviceEntry(rng) for inputNumber in range(rng.randint(2, 6))]
+  driveParts = [SectionHeader("Disk & DVD/CD-ROM Drives")] + [BuildDrive(rng, driveNumber) for driveNumber in range(driveCount)]
+  deviceParts = [SectionHeader("System Devices")] + [SystemDeviceEntry(rng) for deviceNumber in range(deviceCount)]
+  tailParts = [SectionHeader("DirectShow Filters"), "DirectShow Filters:\nWMAudio Decoder DMO,0x00800800,1,1,WMADMOD.DLL,10.00.19041.3636\n\n"]
+  if summary is not None:
+    summary.append(ReportSummary(machineName, encoding, len(displayVendors), displayVendors,
+                                 soundCount + captureCount, driveCount, problemCount))
+  # pad out to the size with input devices before the drives and system devices after them, like a real report,
+  # so the parser has to get through both to find the drives section and the end of the report
+  paddingBytes = 0
+  if options.sizeBytes > 0:
+    reportBytes = sum(EncodedLength(reportPart, encoding, options.newline)
+                      for reportPart in headParts + inputParts + driveParts + deviceParts + tailParts)
+    paddingBytes = max(0, options.sizeBytes - reportBytes)
+  yield from headParts
+  yield from inputParts
+  yield from IterPadding(rng, InputDeviceEntry, paddingBytes // 2, encoding, options.newline)
+  yield from driveParts
+  yield from deviceParts
+  yield from IterPadding(rng, SystemDeviceEntry, paddingBytes - paddingBytes // 2, encoding, options.newline)
+  yield from tailParts
+# end IterReportParts()
+
+def IterPadding(rng, entryFunction, paddingBytes: int, encoding: str, newline: str):
+  """
+  Yield batches of entryFunction() entries adding up to about paddingBytes, drawn from a pool of distinct entries
+  """
+  if paddingBytes <= 0:
+    return
+  paddingPool = [entryFunction(rng) for poolNumber in range(PADDING_POOL_SIZE)]
+  poolLengths = [EncodedLength(poolEntry, encoding, newline) for poolEntry in paddingPool]
+  batch = []
+  while paddingBytes > 0:
+    poolIndex = rng.randrange(PADDING_POOL_SIZE)
+    batch.append(paddingPool[poolIndex])
+    paddingBytes -= poolLengths[poolIndex]
+    if len(batch) == WRITE_BATCH:
+      yield "".join(batch)
+      batch = []
+  if len(batch) > 0:
+    yield "".join(batch)
+# end IterPadding()
+
+def GenerateReport(seed, options: ReportOptions = ReportOptions()) -> str:
+  """
+  Return one report as text, with options.newline line endings
+  """
+  reportText = "".join(IterReportParts(seed, options))
+  if options.newline != "\n":
+    reportText = reportText.replace("\n", options.newline)
+  return reportText
+# end GenerateReport()
+
+def WriteReport(fileName: str, seed, options: ReportOptions = ReportOptions()):
+  """
+  Write one report to fileName a piece at a time, returning its ReportSummary
+  """
+  summary = []
+  reportParts = IterReportParts(seed, options, summary)
+  # the encoding is only known once the report has started
+  firstPart = next(reportParts)
+  with open(fileName, "w", encoding=summary[0].encoding, newline=options.newline) as fh:
+    fh.write(firstPart)
+    for reportPart in reportParts:
+      fh.write(reportPart)
+  return summary[0]
+# end WriteReport()
+
+def GenerateCorpus(folder: str, reportCount: int, seed=DEFAULT_SEED, options: ReportOptions = ReportOptions()):
+  """
+  Write reportCount reports to folder as DxDiag_00000.txt, DxDiag_00001.txt,... along with a MANIFEST_FILE
+  Report n is seeded from seed and n alone, so any one report of a corpus can be made again on its own
+  Returns the list of manifest entries
+  """
+  os.makedirs(folder, exist_ok=True)
+  manifest = []
+  with open(os.path.join(folder, MANIFEST_FILE), "w", encoding="utf-8") as manifestFile:
+    for reportNumber in range(reportCount):
+      reportSeed = f"{seed}-{reportNumber}"
+      fileName = os.path.join(folder, f"DxDiag_{reportNumber:05d}.txt")
+      summary = WriteReport(fileName, reportSeed, options)
+      manifestEntry = {"filename": fileName, "seed": reportSeed, "bytes": os.path.getsize(fileName)}
+      manifestEntry.update(summary._asdict())
+      manifestFile.write(json.dumps(manifestEntry) + "\n")
+      manifest.append(manifestEntry)
+  return manifest
+# end GenerateCorpus()
+
+#mainline
+def main():
+  parser = argparse.ArgumentParser(prog="generatedxdiag.py",
+    description=f"generatedxdiag {VERSION} - writes reproducible synthetic DxDiag.txt reports for load testing")
+  parser.add_argument("-o", "--output", metavar="DIR", default="dxdiag-corpus",
+    help="folder to write the reports and manifest.ndjson to, default dxdiag-corpus")
+  parser.add_argument("-n", "--count", type=int, default=1, help="number of reports, default 1")
+  parser.add_argument("--seed", default=DEFAULT_SEED, help="the same seed and options always give the same reports")
+  parser.add_argument("--displays", type=ParseCountRange, default=(1, 2), metavar="N|MIN-MAX",
+    help="Display Devices entries per report, default 1-2")
+  parser.add_argument("--sounds", type=ParseCountRange, default=(1, 3), metavar="N|MIN-MAX",
+    help="Sound Devices entries, default 1-3")
+  parser.add_argument("--captures", type=ParseCountRange, default=(1, 2), metavar="N|MIN-MAX",
+    help="Sound Capture Devices entries, default 1-2")
+  parser.add_argument("--drives", type=ParseCountRange, default=(1, 4), metavar="N|MIN-MAX",
+    help="Disk & DVD/CD-ROM Drives entries, default 1-4")
+  parser.add_argument("--devices", type=ParseCountRange, default=(40, 120), metavar="N|MIN-MAX",
+    help="System Devices entries before any --size padding, default 40-120")
+  parser.add_argument("--problems", type=ParseCountRange, default=(0, 0), metavar="N|MIN-MAX",
+    help='DxDiag Notes tabs reporting "There is a problem", default 0')
+  parser.add_argument("--size", type=ParseSize, default=0, metavar="SIZE",
+    help="pad the device lists so each report is about SIZE, such as 512KB or 50MB")
+  parser.add_argument("--encoding", choices=ENCODINGS + (ENCODING_MIXED,), default="utf-8",
+    help="report encoding, or mixed to pick one per report; default utf-8")
+  parser.add_argument("--vendors", default=",".join(VENDORS),
+    help="comma separated video card vendors to draw from, default NVIDIA,AMD,Intel")
+  parser.add_argument("--newline", choices=sorted(NEWLINES), default="crlf", help="line endings, default crlf like DxDiag")
+  args = parser.parse_args()
+  vendors = tuple(vendorName.strip() for vendorName in args.vendors.split(",") if vendorName.strip())
+  unknownVendors = set(vendors) - set(VENDORS)
+  if len(vendors) == 0 or len(unknownVendors) > 0:
+    parser.error(f"--vendors takes any of {', '.join(VENDORS)}")
+  options = ReportOptions(args.displays, args.sounds, args.captures, args.drives, args.devices, args.problems,
+                          args.size, args.encoding, NEWLINES[args.newline], vendors)
+  manifest = GenerateCorpus(args.output, args.count, args.seed, options)
+  totalBytes = sum(manifestEntry["bytes"] for manifestEntry in manifest)
+  print(f"{len(manifest)} reports, {totalBytes} bytes, written to {args.output}", file=sys.stderr)
+# end main()
+
+if __name__ == "__main__":
+  main()
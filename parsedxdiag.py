@@ -2,28 +2,60 @@
 #parsedxdiag.py
 # parse through a DXDiag report file and pull out the useful information
 # by Derek French
-# v1.14
+# v1.24
+#- 1.24 - waits up to UPDATE_TIMEOUT seconds for a driver decode data check under way before exiting
+#- 1.23 - reports read only in part, past the parse limits or cut short, list their diagnostics
+#- 1.22 - added --dedupe and --history, grouping batch reports by hardware fingerprint
+#- 1.21 - reports inside .zip, .gz and .xz archives are parsed straight from the archive
+#- 1.20 - added --watch to keep parsing reports as they land in a drop folder
+#- 1.19 - added --cache to reuse the parsed results of reports seen before
+#- 1.18 - added --profile to print where each report's parse time went, or add it to the JSON records
+#- 1.17 - added --json for NDJSON output, one record per report as it finishes
+#- 1.16 - added --offline; driver decode data updates now run in the background
+#- 1.15 - added batch mode over directories, globs and file lists with a pool of worker processes
 #- 1.14 - cleaning up code
 #- 1.13 - added checking for valid report file encoding format
 #- 1.12 - added User DPI
 #- 1.11 - switching to def main(), print() formatting
 
 # imports
+from dxdiagbatch import ExpandReportPaths, IsReportArchive, ParseReport, ParseReports, ReadFileList, WriteJSONRecord
+from dxdiagcache import CACHE_MAXBYTES
 from dxdiagfile import DXDiagFile
+from dxdiagfingerprint import MachineIndex, REPORT_DUPLICATE
+from dxdiagwatch import ReportWatcher
+from drivertables import driverTableUpdater, GoOffline, UPDATE_TIMEOUT
+import argparse
 import os
 import sys
 
 # constants
-FILENAME_POS = 1
-VERSION = "1.14"
+VERSION = "1.24"
 
 # functions
-def ParseFile(fileName: str) -> None:
-  dxDiag = DXDiagFile(fileName)
-  if dxDiag.valid is False:
+def ParseFile(fileName: str, streaming: bool = False, profile: bool = False,
+              cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES) -> None:
+  if cacheFolder is not None:
+    report = ParseReport(fileName, streaming, profile, cacheFolder, cacheMaxBytes)
+    metrics = report.get('metrics')
+  else:
+    dxDiag = DXDiagFile(fileName, streaming)
+    report = dxDiag.ToDict()
+    metrics = dxDiag.metrics
+  if report['valid'] is False:
     print(f"Failed to read report file [{fileName}]; check report file encoding.")
     sys.exit(1)
-  sysInfo = dxDiag.systemInformation
+  PrintReport(report)
+  if profile:
+    print()
+    PrintMetrics(metrics)
+# end ParseFile()
+
+def PrintReport(report) -> None:
+  """
+  Print the summary of a parsed report, a DXDiagFile.ToDict() dictionary
+  """
+  sysInfo = report['systemInformation']
   print(f"DxDiag Report Parser {VERSION}")
   print("--------------------------")
   print(f"Report time:      {sysInfo['reportTime']}")
@@ -45,7 +77,7 @@ def ParseFile(fileName: str) -> None:
   print()
   # video displays
   displayNumber = 1
-  for cards in dxDiag.videoDisplays:
+  for cards in report['videoDisplays']:
     print(f"Video display {displayNumber}")
     print(f"Video card:       {cards['cardName']}")
     print(f"Driver version:   {cards['driverVersion']}")
@@ -72,7 +104,7 @@ def ParseFile(fileName: str) -> None:
     displayNumber += 1
   # audio devices
   audioPrefix = "Sound devices:    "
-  for audio in dxDiag.soundDevices:
+  for audio in report['soundDevices']:
     print(audioPrefix + audio)
     audioPrefix = "                  "
   print()
@@ -80,7 +112,7 @@ def ParseFile(fileName: str) -> None:
   driveLetters = ""
   driveInfo = ""
   driveInfoPrefix = ""
-  for drives in dxDiag.drives:
+  for drives in report['drives']:
     driveLetters += drives['driveLetter'] + " "
     driveInfo += driveInfoPrefix + drives['driveLetter'] + ": "
     if not drives['freeSpace'] == "":
@@ -90,53 +122,199 @@ def ParseFile(fileName: str) -> None:
   print(f"Drives:           {driveLetters}")
   print(f"Drive info:       {driveInfo}")
   # any DXDiag errors
-  if dxDiag.dxErrorCount > 0:
+  if report['dxErrorCount'] > 0:
     print()
     print("DXDIAG DETECTED AN ERROR:")
-    print(f"Error count: {dxDiag.dxErrorCount}")
-    for errors in dxDiag.dxErrorNotes :
+    print(f"Error count: {report['dxErrorCount']}")
+    for errors in report['dxErrorNotes']:
       print(f"- {errors}")
     print()
     print('Check the DxDiag report section "DxDiag Notes"')
-# end ParseFile()
+  # anything skipped or unreadable, so the details above may be incomplete
+  if len(report.get('diagnostics', [])) > 0:
+    print()
+    print("REPORT ONLY PARTLY READ:")
+    for diagnostic in report['diagnostics']:
+      print(f"- {diagnostic}")
+# end PrintReport()
 
-def PrintHelp() -> None:
-  print(f"ParseDxDiag {VERSION} - parses a DxDiag report file")
-  print()
-  print("parsedxdiag.py [DxDiag.txt]")
-  print("DxDiag.txt   - name of the DxDiag file, defaults to DxDiag.txt")
-# end PrintHelp()
+def PrintMetrics(metrics) -> None:
+  """
+  Print the timings and counters of a parsed report, a DXDiagFile.metrics dictionary
+  """
+  print("Profile")
+  for timingName, seconds in metrics['timings'].items():
+    print(f"  {timingName + ':':<26} {seconds * 1000:9.3f} ms")
+  for sectionName, seconds in metrics['sectionTimings'].items():
+    print(f"  {sectionName + ':':<26} {seconds * 1000:9.3f} ms")
+  for counterName, count in metrics['counters'].items():
+    print(f"  {counterName + ':':<26} {count:9}")
+# end PrintMetrics()
+
+def ParseBatch(fileNames, workerCount: int, streaming: bool, jsonOutput=None, profile: bool = False,
+               cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES, machineIndex: MachineIndex = None,
+               dedupe: bool = False) -> int:
+  """
+  Parse and print many report files, then list the ones that failed
+  archives are parsed member by member, each member counting as a report
+  jsonOutput - a file to write each report to as an NDJSON record instead of printing the summary;
+               records come out in the order the reports finish, and the failure list goes to stderr
+  profile - print each report's metrics after its summary, or add them to its JSON record as "metrics"
+  cacheFolder - reuse and save parsed results in this cache folder
+  machineIndex - add every report to this MachineIndex, in fileNames order
+  dedupe - skip reports the machineIndex finds to be duplicates of the same machine's previous report
+  Returns the number of failed reports
+  """
+  failedReports = []
+  reportCount = 0
+  duplicateCount = 0
+  summaryOutput = sys.stdout
+  if jsonOutput is not None:
+    summaryOutput = sys.stderr
+  # a machine's history follows the order of its reports, so keep them in order when indexing
+  reportResults = ParseReports(fileNames, workerCount, streaming, ordered=jsonOutput is None or machineIndex is not None,
+                               profile=profile, cacheFolder=cacheFolder, cacheMaxBytes=cacheMaxBytes)
+  for report in reportResults:
+    reportCount += 1
+    if machineIndex is not None and machineIndex.AddReport(report) == REPORT_DUPLICATE and dedupe:
+      duplicateCount += 1
+      continue
+    if report['error'] != "":
+      failedReports.append(report)
+    if jsonOutput is not None:
+      WriteJSONRecord(report, jsonOutput)
+      continue
+    if report['error'] != "":
+      continue
+    print(f"Report file:      {report['filename']}")
+    PrintReport(report)
+    print()
+    if profile:
+      PrintMetrics(report['metrics'])
+      print()
+  if dedupe:
+    print(f"Parsed {reportCount} report files, {len(failedReports)} failed, {duplicateCount} duplicates skipped.",
+          file=summaryOutput)
+  elif reportCount > 1 or len(failedReports) > 0:
+    print(f"Parsed {reportCount} report files, {len(failedReports)} failed.", file=summaryOutput)
+  for report in failedReports:
+    print(f"- {report['filename']}: {report['error']}", file=summaryOutput)
+  return len(failedReports)
+# end ParseBatch()
+
+def WatchFolder(folder: str, workerCount: int, streaming: bool, jsonOutput, profile: bool = False,
+                cacheFolder: str = None, cacheMaxBytes: int = CACHE_MAXBYTES,
+                existing: bool = False, polling: bool = False) -> None:
+  """
+  Parse each report written to folder as an NDJSON record to jsonOutput until interrupted
+  """
+  reportWatcher = ReportWatcher(folder, lambda report: WriteJSONRecord(report, jsonOutput), workerCount, streaming,
+                                profile, cacheFolder, cacheMaxBytes, existing=existing, polling=polling)
+  print(f"Watching [{folder}] for reports; press Ctrl+C to stop.", file=sys.stderr)
+  reportCount = reportWatcher.Run()
+  print(f"Parsed {reportCount} report files ({reportWatcher.watcherMethod}).", file=sys.stderr)
+# end WatchFolder()
+
+def BuildArgumentParser():
+  parser = argparse.ArgumentParser(prog="parsedxdiag.py", description=f"ParseDxDiag {VERSION} - parses DxDiag report files")
+  parser.add_argument("reports", nargs="*", metavar="DxDiag.txt",
+    help="DxDiag report files, .zip/.gz/.xz archives of them, directories or glob patterns, defaults to DxDiag.txt")
+  parser.add_argument("-l", "--file-list", metavar="LIST",
+    help="text file listing report files, one per line")
+  parser.add_argument("-w", "--workers", type=int, default=0,
+    help="number of worker processes for batch mode, defaults to one per CPU")
+  parser.add_argument("-s", "--stream", action="store_true",
+    help="stream each report instead of loading it whole, keeping memory use low")
+  parser.add_argument("-j", "--json", action="store_true",
+    help="write each report as a line of JSON (NDJSON) instead of the summary")
+  parser.add_argument("-o", "--output", metavar="FILE",
+    help="write the JSON records to FILE instead of the screen")
+  parser.add_argument("--offline", action="store_true",
+    help="do not check GitHub for updated driver decode data")
+  parser.add_argument("--profile", action="store_true",
+    help="show the time spent in each step of parsing each report, or add it to the JSON records")
+  parser.add_argument("--dedupe", action="store_true",
+    help="skip reports from the same hardware as an earlier report that show no changes since it")
+  parser.add_argument("--history", metavar="FILE",
+    help="write each machine's change history from report to report to FILE as NDJSON")
+  parser.add_argument("--watch", metavar="DIR",
+    help="keep running, writing a JSON record for each report that lands in DIR or changes there")
+  parser.add_argument("--existing", action="store_true",
+    help="with --watch, also parse the reports already in DIR")
+  parser.add_argument("--poll", action="store_true",
+    help="with --watch, scan DIR every few seconds instead of using inotify")
+  parser.add_argument("--cache", metavar="DIR",
+    help="keep parsed results in DIR and reuse them when the same report is parsed again")
+  parser.add_argument("--cache-size", type=int, default=CACHE_MAXBYTES // (1024 * 1024), metavar="MB",
+    help=f"trim the cache back to this many megabytes, defaults to {CACHE_MAXBYTES // (1024 * 1024)}")
+  return parser
+# end BuildArgumentParser()
 
 #mainline
 def main():
-  fileName = ""
-  argCount = len(sys.argv)
-  # argCount 1 is no parameters, 2 is 1, etc.
-  if argCount == 1:
+  parser = BuildArgumentParser()
+  args = parser.parse_intermixed_args()
+  reportInputs = list(args.reports)
+  if args.file_list is not None:
+    reportInputs += ReadFileList(args.file_list)
+  if args.offline:
+    GoOffline()
+  cacheMaxBytes = args.cache_size * 1024 * 1024
+  # start the driver decode data check once here so batch workers don't each repeat it
+  driverTableUpdater.StartBackgroundRefresh()
+  if args.watch is not None:
+    if not os.path.isdir(args.watch):
+      print(f"ERROR: Watch folder [{args.watch}] not found.")
+      sys.exit(1)
+    jsonOutput = sys.stdout
+    if args.output is not None:
+      jsonOutput = open(args.output, "a", encoding="utf-8")
+    try:
+      WatchFolder(args.watch, args.workers, args.stream, jsonOutput, args.profile, args.cache, cacheMaxBytes,
+                  args.existing, args.poll)
+    finally:
+      if jsonOutput is not sys.stdout:
+        jsonOutput.close()
+    return
+  if len(reportInputs) == 0:
     # no args passed, assume DxDiag.txt file
-    fileName = "DxDiag.txt"
-  elif argCount == 2:
-    # single arg passed
-    fileName = sys.argv[FILENAME_POS]
-    if fileName == "-h" or fileName == "--help":
-      fileName = ""
-  else:
-    # more than 2 arguments, print help
-    fileName = ""
-  if fileName == "":
+    reportInputs = ["DxDiag.txt"]
+  if (len(reportInputs) == 1 and args.file_list is None and os.path.isfile(reportInputs[0]) and not args.json
+      and not IsReportArchive(reportInputs[0]) and args.history is None):
+    # parse the file
+    ParseFile(reportInputs[0], args.stream, args.profile, args.cache, cacheMaxBytes)
+    return
+  fileNames = ExpandReportPaths(reportInputs)
+  if len(fileNames) == 1 and not os.path.exists(fileNames[0]):
     # print help
-    PrintHelp()
-  else:
-    # check if the file exists
-    if os.path.exists(fileName):
-      # parse the file
-      ParseFile(fileName)
-    else:
-      # print help
-      print("ERROR: Specified file not found.")
-      print()
-      PrintHelp()
+    print("ERROR: Specified file not found.")
+    print()
+    parser.print_help()
+    return
+  jsonOutput = None
+  if args.json:
+    jsonOutput = sys.stdout
+    if args.output is not None:
+      jsonOutput = open(args.output, "w", encoding="utf-8")
+  machineIndex = None
+  if args.dedupe or args.history is not None:
+    machineIndex = MachineIndex()
+  try:
+    failedCount = ParseBatch(fileNames, args.workers, args.stream, jsonOutput, args.profile,
+                             args.cache, cacheMaxBytes, machineIndex, args.dedupe)
+  finally:
+    if jsonOutput is not None and jsonOutput is not sys.stdout:
+      jsonOutput.close()
+  if args.history is not None:
+    with open(args.history, "w", encoding="utf-8") as fh:
+      machineIndex.WriteHistory(fh)
+  if failedCount > 0:
+    sys.exit(1)
 # end main()
 
 if __name__ == "__main__":
-  main()
+  try:
+    main()
+  finally:
+    # the check runs in a daemon thread, so give one under way a chance to finish rather than cut it off
+    driverTableUpdater.Wait(UPDATE_TIMEOUT)
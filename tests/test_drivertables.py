@@ -0,0 +1,164 @@
+#/usr/bin/python3
+# test_drivertables.py
+# DriverTableUpdater against a stand-in table server on localhost
+# by Derek French
+
+# imports
+from drivertables import DriverTableUpdater, FILE_DRIVERSUPDATESTATE, ReadTableVersion
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+# constants
+TABLE_FILE = "driverDecodeTest.csv"
+TABLE_ETAG = '"table-39"'
+LOCAL_TABLE = b"version,38\n31.0.15.4617,546.17\n"
+SERVED_TABLE = b"version,39\n31.0.15.4617,546.17\n31.0.15.5123,551.23\n"
+
+# classes
+class TableRequestHandler(BaseHTTPRequestHandler):
+  """
+  Serves SERVED_TABLE with an ETag, answering 304 to a matching If-None-Match; the server's delaySeconds
+  holds every answer back, its garbled answers with something that isn't HTTP, and each request's path
+  and headers are kept in its requests
+  """
+
+  def do_GET(self) -> None:
+    self.server.requests.append((self.path, dict(self.headers)))
+    time.sleep(self.server.delaySeconds)
+    if self.server.garbled:
+      self.wfile.write(b"NOT HTTP AT ALL\r\n\r\n")
+      return
+    if self.headers.get("If-None-Match") == TABLE_ETAG:
+      self.send_response(304)
+      self.end_headers()
+      return
+    self.send_response(200)
+    self.send_header("ETag", TABLE_ETAG)
+    self.send_header("Content-Length", str(len(SERVED_TABLE)))
+    self.end_headers()
+    self.wfile.write(SERVED_TABLE)
+  # end do_GET()
+
+  def log_message(self, format, *args) -> None:
+    pass
+# end class TableRequestHandler
+
+class DriverTableUpdaterTest(unittest.TestCase):
+  """
+  Each test gets its own table folder and table server
+  """
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+    self.tablePath = os.path.join(self.folder.name, TABLE_FILE)
+    with open(self.tablePath, "wb") as fh:
+      fh.write(LOCAL_TABLE)
+    self.server = ThreadingHTTPServer(("127.0.0.1", 0), TableRequestHandler)
+    self.server.daemon_threads = True
+    self.server.requests = []
+    self.server.delaySeconds = 0
+    self.server.garbled = False
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    self.baseURL = f"http://127.0.0.1:{self.server.server_address[1]}/"
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.server.shutdown()
+    self.server.server_close()
+    self.folder.cleanup()
+  # end tearDown()
+
+  def MakeUpdater(self, ttl: float = 3600, timeout: float = 5.0, offline: bool = False) -> DriverTableUpdater:
+    return DriverTableUpdater(baseURL=self.baseURL, tables={"Test": TABLE_FILE}, folder=self.folder.name,
+                              ttl=ttl, timeout=timeout, offline=offline)
+  # end MakeUpdater()
+
+  def ReadState(self):
+    with open(os.path.join(self.folder.name, FILE_DRIVERSUPDATESTATE), "r", encoding="utf-8") as fh:
+      return json.load(fh)
+  # end ReadState()
+
+  def testNewerVersionReplacesTable(self) -> None:
+    updater = self.MakeUpdater()
+    self.assertEqual(updater.Refresh(), ["Test"])
+    self.assertEqual(ReadTableVersion(self.tablePath), 39)
+    with open(self.tablePath, "rb") as fh:
+      self.assertEqual(fh.read(), SERVED_TABLE)
+    self.assertEqual(updater.updatedTables, {"Test"})
+    self.assertEqual(updater.errors, {})
+    self.assertEqual([requestPath for requestPath, _ in self.server.requests], ["/" + TABLE_FILE])
+    self.assertEqual(self.ReadState()["Test"]["etag"], TABLE_ETAG)
+  # end testNewerVersionReplacesTable()
+
+  def testSameOrOlderVersionKeepsTable(self) -> None:
+    with open(self.tablePath, "wb") as fh:
+      fh.write(b"version,40\n")
+    self.assertEqual(self.MakeUpdater().Refresh(), [])
+    self.assertEqual(ReadTableVersion(self.tablePath), 40)
+  # end testSameOrOlderVersionKeepsTable()
+
+  def testETagGivesNotModified(self) -> None:
+    self.MakeUpdater().Refresh()
+    self.assertEqual(self.MakeUpdater().Refresh(force=True), [])
+    self.assertEqual(len(self.server.requests), 2)
+    self.assertEqual(self.server.requests[1][1].get("If-None-Match"), TABLE_ETAG)
+    self.assertEqual(ReadTableVersion(self.tablePath), 39)
+  # end testETagGivesNotModified()
+
+  def testTTLSkipsSecondCheck(self) -> None:
+    self.MakeUpdater().Refresh()
+    # a new updater, as in the next run, reads the last check time from the state file
+    self.assertEqual(self.MakeUpdater().Refresh(), [])
+    self.assertEqual(len(self.server.requests), 1)
+    self.MakeUpdater(ttl=0).Refresh()
+    self.assertEqual(len(self.server.requests), 2)
+  # end testTTLSkipsSecondCheck()
+
+  def testSlowServerTimesOut(self) -> None:
+    self.server.delaySeconds = 2.0
+    updater = self.MakeUpdater(timeout=0.3)
+    refreshStart = time.monotonic()
+    self.assertEqual(updater.Refresh(), [])
+    self.assertLess(time.monotonic() - refreshStart, 1.5)
+    self.assertIn("Test", updater.errors)
+    self.assertEqual(ReadTableVersion(self.tablePath), 38)
+    # a failed check counts as a check
+    self.assertIn("lastChecked", self.ReadState()["Test"])
+  # end testSlowServerTimesOut()
+
+  def testBadResponseIsRecorded(self) -> None:
+    self.server.garbled = True
+    updater = self.MakeUpdater()
+    self.assertEqual(updater.Refresh(), [])
+    self.assertTrue(updater.errors["Test"].startswith("BadStatusLine"))
+    self.assertEqual(ReadTableVersion(self.tablePath), 38)
+  # end testBadResponseIsRecorded()
+
+  def testUnfinishedCheckIsNotRecorded(self) -> None:
+    self.server.delaySeconds = 1.0
+    updater = self.MakeUpdater()
+    updater.StartBackgroundRefresh()
+    time.sleep(0.3)
+    # the process could exit here, cutting the check off, so it must not count yet
+    self.assertFalse(os.path.exists(os.path.join(self.folder.name, FILE_DRIVERSUPDATESTATE)))
+    updater.Wait(5.0)
+    self.assertIn("lastChecked", self.ReadState()["Test"])
+    self.assertEqual(ReadTableVersion(self.tablePath), 39)
+  # end testUnfinishedCheckIsNotRecorded()
+
+  def testOfflineMakesNoRequest(self) -> None:
+    updater = self.MakeUpdater(ttl=0, offline=True)
+    self.assertEqual(updater.Refresh(force=True), [])
+    self.assertIsNone(updater.StartBackgroundRefresh())
+    self.assertEqual(self.server.requests, [])
+    self.assertEqual(ReadTableVersion(self.tablePath), 38)
+  # end testOfflineMakesNoRequest()
+# end class DriverTableUpdaterTest
+
+if __name__ == "__main__":
+  unittest.main()
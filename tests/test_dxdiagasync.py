@@ -0,0 +1,126 @@
+#/usr/bin/python3
+# test_dxdiagasync.py
+# AsyncReportParser.AsCompleted() over names, archives and uploads, and ReadReportStream() bounds
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagasync import AsyncReportParser, ParseReportsAsCompleted, ReadReportStream
+from tests import test_parselimits
+import asyncio
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+# constants
+REPORT_BYTES = test_parselimits.REPORT_TEXT.encode("utf-8")
+LIMIT_BYTES = 1000
+PARSER_OPTIONS = {"workerCount": 2, "useThreads": True, "checkForUpdates": False}
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+async def ByteChunks(chunkCount: int, chunkSize: int = 300):
+  for _ in range(chunkCount):
+    yield b"x" * chunkSize
+# end ByteChunks()
+
+# classes
+class AsCompletedTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+    self.reportName = os.path.join(self.folder.name, "DxDiag.txt")
+    with open(self.reportName, "wb") as fh:
+      fh.write(REPORT_BYTES)
+    self.archiveName = os.path.join(self.folder.name, "DxDiag.txt.gz")
+    with gzip.open(self.archiveName, "wb") as fh:
+      fh.write(REPORT_BYTES)
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def testNamesArchivesAndUploads(self) -> None:
+    reportInputs = [self.reportName, self.archiveName] + [(f"upload{index}.txt", REPORT_BYTES) for index in range(6)]
+
+    async def ParseAll():
+      async with AsyncReportParser(**PARSER_OPTIONS) as reportParser:
+        self.assertEqual(reportParser.maxConcurrent, 4)
+        reports = [report async for report in reportParser.AsCompleted(reportInputs)]
+      self.assertTrue(reportParser.closed)
+      return reports
+
+    reports = asyncio.run(ParseAll())
+    self.assertEqual(sorted(report["filename"] for report in reports),
+                     sorted([self.reportName, f"{self.archiveName}/DxDiag.txt"] + [f"upload{index}.txt" for index in range(6)]))
+    self.assertTrue(all(report["error"] == "" for report in reports))
+    self.assertTrue(all(report["systemInformation"]["machineName"] == "DESKTOP-Limits" for report in reports))
+  # end testNamesArchivesAndUploads()
+
+  def testAsyncInputsAndFailures(self) -> None:
+    async def ReportInputs():
+      yield ("upload.txt", REPORT_BYTES)
+      yield os.path.join(self.folder.name, "missing.txt")
+
+    async def ParseAll():
+      return [report async for report in ParseReportsAsCompleted(ReportInputs(), **PARSER_OPTIONS)]
+
+    reports = {report["filename"]: report for report in asyncio.run(ParseAll())}
+    self.assertEqual(len(reports), 2)
+    self.assertEqual(reports["upload.txt"]["error"], "")
+    self.assertNotEqual(reports[os.path.join(self.folder.name, "missing.txt")]["error"], "")
+  # end testAsyncInputsAndFailures()
+
+  def testStoppingEarly(self) -> None:
+    reportInputs = [(f"upload{index}.txt", REPORT_BYTES) for index in range(20)]
+
+    async def ParseFirst():
+      async with AsyncReportParser(**PARSER_OPTIONS) as reportParser:
+        async for report in reportParser.AsCompleted(reportInputs):
+          break
+      with self.assertRaises(RuntimeError):
+        await reportParser.Parse("late.txt", REPORT_BYTES)
+      return report
+
+    self.assertEqual(asyncio.run(ParseFirst())["error"], "")
+  # end testStoppingEarly()
+# end class AsCompletedTest
+
+class ReadReportStreamTest(unittest.TestCase):
+
+  def testStreamsStopPastLimit(self) -> None:
+    async def ReadAll():
+      streamReader = asyncio.StreamReader()
+      streamReader.feed_data(b"x" * (LIMIT_BYTES * 5))
+      streamReader.feed_eof()
+      streamBytes = await ReadReportStream(streamReader, LIMIT_BYTES)
+      # nothing read past the limit byte
+      self.assertEqual(len(await streamReader.read()), LIMIT_BYTES * 4 - 1)
+      return {
+        "StreamReader": streamBytes,
+        "chunks": await ReadReportStream(ByteChunks(20), LIMIT_BYTES),
+        "file": await ReadReportStream(io.BytesIO(b"x" * (LIMIT_BYTES * 5)), LIMIT_BYTES)
+      }
+
+    for streamKind, reportBytes in asyncio.run(ReadAll()).items():
+      with self.subTest(streamKind=streamKind):
+        self.assertEqual(len(reportBytes), LIMIT_BYTES + 1)
+  # end testStreamsStopPastLimit()
+
+  def testShortStreamsAreReadWhole(self) -> None:
+    async def ReadAll():
+      return [await ReadReportStream(ByteChunks(2), LIMIT_BYTES),
+              await ReadReportStream(io.BytesIO(REPORT_BYTES))]
+
+    self.assertEqual(asyncio.run(ReadAll()), [b"x" * 600, REPORT_BYTES])
+  # end testShortStreamsAreReadWhole()
+# end class ReadReportStreamTest
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,131 @@
+#/usr/bin/python3
+# test_dxdiagbatch.py
+# reports read straight out of .zip, .gz and .xz archives, within the parse limits
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagbatch import ParseReportFile, ParseReports
+from dxdiagfile import ENV_MAXREPORTBYTES
+from tests import test_parselimits
+from unittest import mock
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+import zipfile
+
+# constants
+REPORT_BYTES = test_parselimits.REPORT_TEXT.encode("utf-8")
+# compresses to almost nothing, as an archive bomb would
+PADDING_BYTES = b"\n" * (20 * 1024 * 1024)
+LIMIT_BYTES = 4096
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class ArchiveTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def ArchivePath(self, fileName: str) -> str:
+    return os.path.join(self.folder.name, fileName)
+  # end ArchivePath()
+
+  def testZipMembers(self) -> None:
+    archiveName = self.ArchivePath("reports.zip")
+    with zipfile.ZipFile(archiveName, "w", zipfile.ZIP_DEFLATED) as reportArchive:
+      reportArchive.writestr("first/DxDiag.txt", REPORT_BYTES)
+      reportArchive.writestr("second.TXT", test_parselimits.REPORT_TEXT.encode("utf-16"))
+      reportArchive.writestr("__MACOSX/first/._DxDiag.txt", b"resource fork")
+      reportArchive.writestr("readme.md", b"not a report")
+    reports = ParseReportFile(archiveName)
+    self.assertEqual([report["member"] for report in reports], ["first/DxDiag.txt", "second.TXT"])
+    for report in reports:
+      self.assertEqual(report["error"], "")
+      self.assertEqual(report["archive"], archiveName)
+      self.assertEqual(report["filename"], f"{archiveName}/{report['member']}")
+      self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits")
+  # end testZipMembers()
+
+  def testSingleReportArchives(self) -> None:
+    for fileName, openArchive in (("DxDiag.txt.gz", gzip.open), ("DxDiag.xz", lzma.open)):
+      with self.subTest(fileName=fileName):
+        archiveName = self.ArchivePath(fileName)
+        with openArchive(archiveName, "wb") as fh:
+          fh.write(REPORT_BYTES)
+        reports = ParseReportFile(archiveName)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0]["error"], "")
+        self.assertEqual(reports[0]["member"], fileName[:-3])
+        self.assertEqual(len(reports[0]["videoDisplays"]), 2)
+  # end testSingleReportArchives()
+
+  def testMembersStopAtReportLimit(self) -> None:
+    zipName = self.ArchivePath("bomb.zip")
+    with zipfile.ZipFile(zipName, "w", zipfile.ZIP_DEFLATED) as reportArchive:
+      reportArchive.writestr("DxDiag.txt", REPORT_BYTES + PADDING_BYTES)
+    gzName = self.ArchivePath("bomb.txt.gz")
+    with gzip.open(gzName, "wb") as fh:
+      fh.write(REPORT_BYTES + PADDING_BYTES)
+    xzName = self.ArchivePath("bomb.txt.xz")
+    with lzma.open(xzName, "wb") as fh:
+      fh.write(REPORT_BYTES + PADDING_BYTES)
+    with mock.patch.dict(os.environ, {ENV_MAXREPORTBYTES: str(LIMIT_BYTES)}):
+      for archiveName in (zipName, gzName, xzName):
+        for streaming in (False, True):
+          for cacheFolder in (None, self.ArchivePath("cache")):
+            with self.subTest(archiveName=archiveName, streaming=streaming, cacheFolder=cacheFolder):
+              reports = ParseReportFile(archiveName, streaming, cacheFolder=cacheFolder)
+              self.assertEqual(len(reports), 1)
+              self.assertEqual(reports[0]["error"], "")
+              self.assertEqual(len(reports[0]["videoDisplays"]), 2)
+              self.assertEqual(reports[0]["diagnostics"],
+                               [f"the report is over {LIMIT_BYTES} bytes; only the first {LIMIT_BYTES} were read"])
+  # end testMembersStopAtReportLimit()
+
+  def testUnreadableArchivesFail(self) -> None:
+    emptyName = self.ArchivePath("empty.zip")
+    with zipfile.ZipFile(emptyName, "w") as reportArchive:
+      reportArchive.writestr("readme.md", b"not a report")
+    reports = ParseReportFile(emptyName)
+    self.assertEqual(len(reports), 1)
+    self.assertFalse(reports[0]["valid"])
+    self.assertEqual(reports[0]["member"], "")
+    self.assertEqual(reports[0]["error"], "no reports matching *.txt in archive")
+    # a .gz is only found to be broken once its one member is read
+    brokenName = self.ArchivePath("broken.gz")
+    with open(brokenName, "wb") as fh:
+      fh.write(b"not gzip at all")
+    reports = ParseReportFile(brokenName)
+    self.assertEqual(len(reports), 1)
+    self.assertFalse(reports[0]["valid"])
+    self.assertEqual(reports[0]["member"], "broken")
+    self.assertTrue(reports[0]["diagnostics"][0].startswith("the report could not be read: Not a gzipped file"))
+  # end testUnreadableArchivesFail()
+
+  def testParseReportsInThisProcess(self) -> None:
+    reportName = self.ArchivePath("DxDiag.txt")
+    with open(reportName, "wb") as fh:
+      fh.write(REPORT_BYTES)
+    archiveName = self.ArchivePath("DxDiag.txt.gz")
+    with gzip.open(archiveName, "wb") as fh:
+      fh.write(REPORT_BYTES)
+    reports = list(ParseReports([reportName, archiveName], workerCount=1))
+    self.assertEqual([report["filename"] for report in reports], [reportName, f"{archiveName}/DxDiag.txt"])
+    self.assertTrue(all(report["valid"] for report in reports))
+  # end testParseReportsInThisProcess()
+# end class ArchiveTest
+
+if __name__ == "__main__":
+  unittest.main()
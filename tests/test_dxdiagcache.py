@@ -0,0 +1,121 @@
+#/usr/bin/python3
+# test_dxdiagcache.py
+# ReportCache keys and eviction, and ParseReport() going through the cache
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagbatch import ParseReport
+from dxdiagcache import ReportCache
+from dxdiagfile import ENV_MAXREPORTBYTES, ENV_MAXSECTIONLINES
+from tests import test_parselimits
+from unittest import mock
+import io
+import os
+import random
+import tempfile
+import unittest
+
+# constants
+REPORT_HASH = "ab" * 32
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+def BulkyReport(seed: int):
+  """
+  Return a report dictionary that hardly compresses, so each cache entry is about 2 KB
+  """
+  return {"valid": True, "padding": random.Random(seed).randbytes(1000).hex()}
+# end BulkyReport()
+
+# classes
+class ReportCacheTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def testKeyFollowsReportAndLimits(self) -> None:
+    reportCache = ReportCache(self.folder.name)
+    cacheKey = reportCache.ReportKey(REPORT_HASH)
+    self.assertEqual(reportCache.ReportKey(REPORT_HASH), cacheKey)
+    self.assertNotEqual(reportCache.ReportKey("cd" * 32), cacheKey)
+    for envName in (ENV_MAXREPORTBYTES, ENV_MAXSECTIONLINES):
+      with self.subTest(envName=envName), mock.patch.dict(os.environ, {envName: "1000"}):
+        self.assertNotEqual(reportCache.ReportKey(REPORT_HASH), cacheKey)
+  # end testKeyFollowsReportAndLimits()
+
+  def testPutAndGet(self) -> None:
+    reportCache = ReportCache(self.folder.name)
+    self.assertIsNone(reportCache.Get("missing"))
+    reportCache.Put("first", {"valid": True, "machineName": "DESKTOP-Limits"})
+    self.assertEqual(reportCache.Get("first"), {"valid": True, "machineName": "DESKTOP-Limits"})
+    self.assertEqual(reportCache.stats["hits"], 1)
+    self.assertEqual(reportCache.stats["misses"], 1)
+    # a new cache over the same folder finds the entry
+    self.assertEqual(ReportCache(self.folder.name).entryCount, 1)
+  # end testPutAndGet()
+
+  def testLeastRecentlyUsedIsEvicted(self) -> None:
+    reportCache = ReportCache(self.folder.name)
+    reportCache.Put("probe", BulkyReport(0))
+    entryBytes = reportCache.stats["totalBytes"]
+    reportCache.Clear()
+    # room for two entries but not three
+    reportCache = ReportCache(self.folder.name, maxBytes=entryBytes * 2 + entryBytes // 2)
+    reportCache.Put("first", BulkyReport(1))
+    reportCache.Put("second", BulkyReport(2))
+    self.assertIsNotNone(reportCache.Get("first"))
+    reportCache.Put("third", BulkyReport(3))
+    self.assertIsNone(reportCache.Get("second"))
+    self.assertEqual(reportCache.Get("first"), BulkyReport(1))
+    self.assertEqual(reportCache.Get("third"), BulkyReport(3))
+    self.assertEqual(reportCache.stats["evictions"], 1)
+    self.assertEqual(sorted(os.listdir(self.folder.name)), sorted(f"{cacheKey}.json.z" for cacheKey in ("first", "third")))
+  # end testLeastRecentlyUsedIsEvicted()
+# end class ReportCacheTest
+
+class CachedParseTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+    self.cacheFolder = os.path.join(self.folder.name, "cache")
+    self.reportBytes = test_parselimits.REPORT_TEXT.encode("utf-8")
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def testLimitsChangeGivesFreshParse(self) -> None:
+    fullReport = ParseReport("upload.txt", cacheFolder=self.cacheFolder, reportBytes=self.reportBytes)
+    self.assertEqual(fullReport["diagnostics"], [])
+    with mock.patch.dict(os.environ, {ENV_MAXSECTIONLINES: "3"}):
+      limitedReport = ParseReport("upload.txt", cacheFolder=self.cacheFolder, reportBytes=self.reportBytes)
+    self.assertIn("System Information: over 3 lines; only the first 3 were read", limitedReport["diagnostics"])
+    # and the full parse is still there for the default limits
+    self.assertEqual(ParseReport("again.txt", cacheFolder=self.cacheFolder, reportBytes=self.reportBytes),
+                     dict(fullReport, filename="again.txt"))
+    self.assertEqual(len(os.listdir(self.cacheFolder)), 2)
+  # end testLimitsChangeGivesFreshParse()
+
+  def testArchiveMemberReadStopsAtLimit(self) -> None:
+    memberFile = io.BytesIO(self.reportBytes + b"x" * 1000000)
+    with mock.patch.dict(os.environ, {ENV_MAXREPORTBYTES: "2000"}):
+      report = ParseReport("archive.zip/DxDiag.txt", cacheFolder=self.cacheFolder, reportFile=memberFile)
+    self.assertEqual(memberFile.tell(), 2001)
+    self.assertEqual(report["error"], "")
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits")
+    self.assertEqual(report["diagnostics"][0], "the report is over 2000 bytes; only the first 2000 were read")
+  # end testArchiveMemberReadStopsAtLimit()
+# end class CachedParseTest
+
+if __name__ == "__main__":
+  unittest.main()
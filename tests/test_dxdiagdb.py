@@ -0,0 +1,85 @@
+#/usr/bin/python3
+# test_dxdiagdb.py
+# ReportDatabase ingest counts and driver version keys
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagdb import DriverVersionKey, ReportDatabase
+from tests import test_parselimits
+import os
+import tempfile
+import unittest
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class DriverVersionKeyTest(unittest.TestCase):
+
+  def testKeysSortLikeVersions(self) -> None:
+    self.assertEqual(DriverVersionKey("31.00.0015.4617 (English)"), "00031.00000.00015.04617")
+    self.assertEqual(DriverVersionKey("31.x"), "00031")
+    self.assertLess(DriverVersionKey("30.0.15.9999"), DriverVersionKey("31.x"))
+    self.assertLess(DriverVersionKey("31.0.9.1"), DriverVersionKey("31.0.10.1"))
+  # end testKeysSortLikeVersions()
+
+  def testPartsTooLongToSortHaveNoKey(self) -> None:
+    # "123456" would sort below "99999" as text
+    self.assertIsNone(DriverVersionKey("31.0.123456.1"))
+    self.assertIsNone(DriverVersionKey("31.-1.0.1"))
+    self.assertIsNone(DriverVersionKey("Unknown"))
+    self.assertEqual(DriverVersionKey("65535.65535.65535.65535"), "65535.65535.65535.65535")
+  # end testPartsTooLongToSortHaveNoKey()
+
+  def testDriverBelowRejectsUnsortableVersion(self) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+      with ReportDatabase(os.path.join(folder, "reports.db")) as reportDatabase:
+        with self.assertRaises(ValueError):
+          reportDatabase.SelectReports(driverBelow="31.0.123456")
+  # end testDriverBelowRejectsUnsortableVersion()
+# end class DriverVersionKeyTest
+
+class IngestTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+    self.reportFileName = os.path.join(self.folder.name, "DxDiag.txt")
+    with open(self.reportFileName, "w", encoding="utf-8") as fh:
+      fh.write(test_parselimits.REPORT_TEXT)
+    self.reportDatabase = ReportDatabase(os.path.join(self.folder.name, "reports.db"))
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.reportDatabase.Close()
+    self.folder.cleanup()
+  # end tearDown()
+
+  def testSameFileNamedTwiceCountsOnce(self) -> None:
+    sameFileName = os.path.join(self.folder.name, ".", "DxDiag.txt")
+    ingestCounts = self.reportDatabase.Ingest([self.reportFileName, sameFileName], workerCount=1)
+    self.assertEqual(ingestCounts, {"files": 1, "unreadable": 0, "skipped": 0, "ingested": 1, "reports": 1, "failed": 0})
+    self.assertEqual(self.reportDatabase.counts["reports"], 1)
+  # end testSameFileNamedTwiceCountsOnce()
+
+  def testUnchangedFileIsSkipped(self) -> None:
+    self.reportDatabase.Ingest([self.reportFileName], workerCount=1)
+    ingestCounts = self.reportDatabase.Ingest([self.reportFileName], workerCount=1)
+    self.assertEqual(ingestCounts["skipped"], 1)
+    self.assertEqual(ingestCounts["ingested"], 0)
+  # end testUnchangedFileIsSkipped()
+
+  def testMissingFileIsUnreadableNotFailed(self) -> None:
+    missingFileName = os.path.join(self.folder.name, "gone.txt")
+    ingestCounts = self.reportDatabase.Ingest([self.reportFileName, missingFileName], workerCount=1)
+    self.assertEqual(ingestCounts["unreadable"], 1)
+    self.assertEqual(ingestCounts["failed"], 0)
+    self.assertEqual(ingestCounts["files"], 1)
+    self.assertEqual(ingestCounts["reports"], 1)
+  # end testMissingFileIsUnreadableNotFailed()
+# end class IngestTest
+
+if __name__ == "__main__":
+  unittest.main()
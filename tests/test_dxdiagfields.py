@@ -0,0 +1,101 @@
+#/usr/bin/python3
+# test_dxdiagfields.py
+# fields added with RegisterField(): extra record fields, bad values, rejected rules and the cache key
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagcache import ReportCache
+from dxdiagfile import DXDiagFile, RegisterField, SECTION_DISPLAYDEVICES, SECTION_DRIVES, SECTION_SYSTEMINFORMATION
+from dxdiagfile import fieldSchema
+from tests import test_parselimits
+import tempfile
+import unittest
+
+# constants
+REPORT_HASH = "ab" * 32
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+def RefreshRateField(value: str) -> int:
+  """
+  "2560 x 1080 (32 bit) (59Hz)" -> 59
+  """
+  return int(value[value.rindex("(") + 1:value.rindex("Hz")])
+# end RefreshRateField()
+
+# classes
+class RegisterFieldTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    fieldSchema.Reset()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    # fields are registered for the whole process, so leave none behind for the other tests
+    fieldSchema.Reset()
+  # end tearDown()
+
+  def ParseReport(self, reportText: str = test_parselimits.REPORT_TEXT):
+    return DXDiagFile("DxDiag.txt", reportBytes=reportText.encode("utf-8")).ToDict()
+  # end ParseReport()
+
+  def testExtraFieldsShowUpInToDict(self) -> None:
+    RegisterField(SECTION_SYSTEMINFORMATION, "Page File", "pageFileUsedMB", lambda value: int(value[:value.index("MB")]))
+    RegisterField(SECTION_DISPLAYDEVICES, "Current Mode", "refreshRate", RefreshRateField)
+    report = self.ParseReport()
+    self.assertEqual(report["systemInformation"]["pageFileUsedMB"], 9733)
+    # the built-in field on the same key is still read
+    self.assertEqual(report["systemInformation"]["pageFile"], "9733MB used, 14741MB available")
+    self.assertEqual([cardData["refreshRate"] for cardData in report["videoDisplays"]], [59, 60])
+    self.assertEqual(list(report["videoDisplays"][0])[-1], "refreshRate")
+    self.assertEqual(report["diagnostics"], [])
+  # end testExtraFieldsShowUpInToDict()
+
+  def testBuiltinFieldCanBeJoined(self) -> None:
+    RegisterField(SECTION_SYSTEMINFORMATION, "Language", "machineName", joinWith=" / ")
+    report = self.ParseReport()
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits / English (Regional Setting: English)")
+  # end testBuiltinFieldCanBeJoined()
+
+  def testBadValueIsADiagnostic(self) -> None:
+    RegisterField(SECTION_DISPLAYDEVICES, "Current Mode", "refreshRate", RefreshRateField)
+    reportText = test_parselimits.REPORT_TEXT.replace("(60Hz)", "(sixtyHz)")
+    report = self.ParseReport(reportText)
+    self.assertEqual(report["videoDisplays"][0]["refreshRate"], 59)
+    self.assertNotIn("refreshRate", report["videoDisplays"][1])
+    self.assertEqual(report["diagnostics"],
+                     [f"{SECTION_DISPLAYDEVICES}: Current Mode '1920 x 1080 (32 bit) (sixtyHz)' couldn't be read"])
+  # end testBadValueIsADiagnostic()
+
+  def testRejectedRules(self) -> None:
+    with self.assertRaises(ValueError):
+      RegisterField(SECTION_DRIVES, "Model", "driveModel")
+    with self.assertRaises(ValueError):
+      RegisterField(SECTION_SYSTEMINFORMATION, "Time: of day", "timeOfDay")
+    self.assertEqual(fieldSchema.registeredRules, ())
+  # end testRejectedRules()
+
+  def testRegisteredFieldsChangeCacheKey(self) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+      reportCache = ReportCache(folder)
+      self.assertEqual(fieldSchema.schemaKey, "")
+      builtinKey = reportCache.ReportKey(REPORT_HASH)
+      RegisterField(SECTION_DISPLAYDEVICES, "Current Mode", "refreshRate", RefreshRateField)
+      self.assertIn("refreshRate", fieldSchema.schemaKey)
+      refreshRateKey = reportCache.ReportKey(REPORT_HASH)
+      self.assertNotEqual(refreshRateKey, builtinKey)
+      fieldSchema.Reset()
+      # the same rule under another converter is another schema
+      RegisterField(SECTION_DISPLAYDEVICES, "Current Mode", "refreshRate")
+      self.assertNotIn(reportCache.ReportKey(REPORT_HASH), (builtinKey, refreshRateKey))
+      fieldSchema.Reset()
+      self.assertEqual(reportCache.ReportKey(REPORT_HASH), builtinKey)
+  # end testRegisteredFieldsChangeCacheKey()
+# end class RegisterFieldTest
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,98 @@
+#/usr/bin/python3
+# test_dxdiagfingerprint.py
+# MachineIndex report states: new machines, duplicates, changes and the history they leave
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagfile import DXDiagFile
+from dxdiagfingerprint import MachineIndex, REPORT_CHANGED, REPORT_DUPLICATE, REPORT_NEW
+from dxdiagrecords import HardwareFingerprint
+from tests import test_parselimits
+import copy
+import io
+import json
+import unittest
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class MachineIndexTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    cls.baseReport = DXDiagFile("DxDiag.txt", reportBytes=test_parselimits.REPORT_TEXT.encode("utf-8")).ToDict()
+  # end setUpClass()
+
+  def Report(self, fileName: str):
+    report = copy.deepcopy(self.baseReport)
+    report["filename"] = fileName
+    report.pop("fingerprint", None)
+    return report
+  # end Report()
+
+  def testFingerprintIgnoresCardOrder(self) -> None:
+    report = self.Report("first.txt")
+    reorderedReport = self.Report("second.txt")
+    reorderedReport["videoDisplays"].reverse()
+    self.assertEqual(HardwareFingerprint(report), HardwareFingerprint(reorderedReport))
+    reorderedReport["systemInformation"]["memoryInMB"] += 16384
+    self.assertNotEqual(HardwareFingerprint(report), HardwareFingerprint(reorderedReport))
+  # end testFingerprintIgnoresCardOrder()
+
+  def testReportStates(self) -> None:
+    machineIndex = MachineIndex()
+    self.assertEqual(machineIndex.AddReport(self.Report("first.txt")), REPORT_NEW)
+    self.assertEqual(machineIndex.AddReport(self.Report("again.txt")), REPORT_DUPLICATE)
+    updatedReport = self.Report("updated.txt")
+    updatedReport["systemInformation"]["osName"] = "Windows 11 Pro"
+    self.assertEqual(machineIndex.AddReport(updatedReport), REPORT_CHANGED)
+    # compared with the last report, not the first
+    self.assertEqual(machineIndex.AddReport(copy.deepcopy(updatedReport)), REPORT_DUPLICATE)
+    otherReport = self.Report("other.txt")
+    otherReport["systemInformation"]["machineName"] = "LAPTOP-Other"
+    self.assertEqual(machineIndex.AddReport(otherReport), REPORT_NEW)
+    self.assertIsNone(machineIndex.AddReport({"valid": False, "filename": "broken.txt"}))
+    self.assertEqual(machineIndex.reportCount, 5)
+    self.assertEqual(machineIndex.duplicateCount, 2)
+    self.assertEqual(machineIndex.machineCount, 2)
+    self.assertEqual(list(machineIndex.Groups().values()),
+                     [["first.txt", "again.txt", "updated.txt", "updated.txt"], ["other.txt"]])
+  # end testReportStates()
+
+  def testDriverChangeIsRecorded(self) -> None:
+    machineIndex = MachineIndex()
+    machineIndex.AddReport(self.Report("first.txt"))
+    updatedReport = self.Report("updated.txt")
+    cardData = updatedReport["videoDisplays"][0]
+    previousVersion = cardData["driverVersionRaw"]
+    cardData["driverVersionRaw"] = "99.99.9999.9999"
+    self.assertEqual(machineIndex.AddReport(updatedReport), REPORT_CHANGED)
+    historyFile = io.StringIO()
+    machineIndex.WriteHistory(historyFile)
+    historyLines = historyFile.getvalue().splitlines()
+    self.assertEqual(len(historyLines), 1)
+    machineHistory = json.loads(historyLines[0])
+    self.assertEqual(machineHistory["machineName"], "DESKTOP-Limits")
+    self.assertEqual(machineHistory["reports"], 2)
+    self.assertEqual(machineHistory["duplicates"], 0)
+    self.assertEqual(machineHistory["firstReport"], "first.txt")
+    self.assertEqual(machineHistory["changes"], [{
+      "filename": "updated.txt",
+      "reportTime": updatedReport["systemInformation"]["reportTime"],
+      "changes": {f"driver: {cardData['cardName']}": [previousVersion, "99.99.9999.9999"]}
+    }])
+  # end testDriverChangeIsRecorded()
+
+  def testAddReportsDropsDuplicates(self) -> None:
+    machineIndex = MachineIndex()
+    reports = [self.Report("first.txt"), self.Report("again.txt"), {"valid": False}]
+    self.assertEqual([report.get("filename") for report in machineIndex.AddReports(reports)], ["first.txt", None])
+  # end testAddReportsDropsDuplicates()
+# end class MachineIndexTest
+
+if __name__ == "__main__":
+  unittest.main()
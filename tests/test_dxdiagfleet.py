@@ -0,0 +1,93 @@
+#/usr/bin/python3
+# test_dxdiagfleet.py
+# fleet columns, masks and vendor grouping
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagfile import DXDiagFile
+from dxdiagfleet import CardVendor, Fleet, MaskAnd, MaskCount, MaskNot, MaskOr, NumberColumn
+from tests import test_parselimits
+import unittest
+
+# constants
+NUMBER_VALUES = (1, None, 3, "", 5, "n/a")
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class NumberColumnTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.column = NumberColumn("VRAM")
+    for value in NUMBER_VALUES:
+      self.column.Append(value)
+  # end setUp()
+
+  def testMissingValues(self) -> None:
+    self.assertEqual(list(self.column.Missing()), [0, 1, 0, 1, 0, 1])
+    self.assertEqual([self.column[row] for row in range(len(self.column))], [1, None, 3, None, 5, None])
+  # end testMissingValues()
+
+  def testNoComparisonMatchesMissing(self) -> None:
+    expectedMasks = {
+      "==": [0, 0, 1, 0, 0, 0],
+      "!=": [1, 0, 0, 0, 1, 0],
+      "<": [1, 0, 0, 0, 0, 0],
+      "<=": [1, 0, 1, 0, 0, 0],
+      ">": [0, 0, 0, 0, 1, 0],
+      ">=": [0, 0, 1, 0, 1, 0]
+    }
+    for compareOperator, expectedMask in expectedMasks.items():
+      with self.subTest(compareOperator=compareOperator):
+        self.assertEqual(list(self.column.Compare(compareOperator, 3)), expectedMask)
+  # end testNoComparisonMatchesMissing()
+
+  def testEmptyColumn(self) -> None:
+    self.assertEqual(NumberColumn("empty").Compare("!=", 1), bytearray())
+  # end testEmptyColumn()
+
+  def testSumSkipsMissing(self) -> None:
+    self.assertEqual(self.column.Sum(), 9)
+    self.assertEqual(self.column.Sum(self.column.Compare(">", 1)), 8)
+  # end testSumSkipsMissing()
+# end class NumberColumnTest
+
+class MaskTest(unittest.TestCase):
+
+  def testMaskOperations(self) -> None:
+    firstMask = bytearray([1, 1, 0, 0])
+    secondMask = bytearray([1, 0, 1, 0])
+    self.assertEqual(list(MaskAnd(firstMask, secondMask)), [1, 0, 0, 0])
+    self.assertEqual(list(MaskOr(firstMask, secondMask)), [1, 1, 1, 0])
+    self.assertEqual(list(MaskNot(firstMask)), [0, 0, 1, 1])
+    self.assertEqual(MaskCount(secondMask), 2)
+  # end testMaskOperations()
+# end class MaskTest
+
+class FleetTest(unittest.TestCase):
+
+  def testCardVendor(self) -> None:
+    self.assertEqual(CardVendor("NVIDIA"), "NVIDIA")
+    self.assertEqual(CardVendor("Advanced Micro Devices, Inc."), "AMD")
+    self.assertEqual(CardVendor("Intel Corporation"), "Intel")
+    self.assertEqual(CardVendor("(Standard display types)"), "Other")
+  # end testCardVendor()
+
+  def testReportsAndDisplays(self) -> None:
+    report = DXDiagFile("DxDiag.txt", reportBytes=test_parselimits.REPORT_TEXT.encode("utf-8")).ToDict()
+    fleet = Fleet()
+    self.assertEqual(fleet.AddReports([report, {"valid": False}]), 1)
+    self.assertEqual(len(fleet.reports), 1)
+    self.assertEqual(fleet.reports.GroupCount("machineName"), {"DESKTOP-Limits": 1})
+    self.assertEqual(fleet.displays.GroupCount("vendor"), {"AMD": 1, "NVIDIA": 1})
+    bigCards = fleet.displays["VRAM"].Compare(">", 12000)
+    self.assertEqual(fleet.displays.Share(bigCards), 0.5)
+  # end testReportsAndDisplays()
+# end class FleetTest
+
+if __name__ == "__main__":
+  unittest.main()
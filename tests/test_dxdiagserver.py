@@ -0,0 +1,110 @@
+#/usr/bin/python3
+# test_dxdiagserver.py
+# ParseServer and ParseService end to end on localhost
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater
+from dxdiagserver import ParseServer, ParseService
+from tests import test_parselimits
+import http.client
+import json
+import socket
+import threading
+import unittest
+
+# constants
+MAX_UPLOAD_BYTES = 100000
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class ParseServerTest(unittest.TestCase):
+  """
+  One threaded service and server on a free port for the whole class, so /metrics sees every request
+  """
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    cls.service = ParseService(workerCount=2, useThreads=True, maxReportBytes=MAX_UPLOAD_BYTES)
+    cls.server = ParseServer(("127.0.0.1", 0), cls.service)
+    cls.port = cls.server.server_address[1]
+    threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+  # end setUpClass()
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    cls.server.shutdown()
+    cls.server.server_close()
+    cls.service.Shutdown()
+  # end tearDownClass()
+
+  def Request(self, method: str, path: str, body: bytes = None):
+    """
+    Return the (status, JSON body) of one request
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+    try:
+      connection.request(method, path, body)
+      response = connection.getresponse()
+      return response.status, json.loads(response.read())
+    finally:
+      connection.close()
+  # end Request()
+
+  def RawPost(self, headerLines: bytes) -> int:
+    """
+    Send a POST /parse with these header lines and no body, returning the response status
+    """
+    with socket.create_connection(("127.0.0.1", self.port), timeout=10) as rawSocket:
+      rawSocket.sendall(b"POST /parse HTTP/1.1\r\nHost: 127.0.0.1\r\n" + headerLines + b"\r\n")
+      statusLine = rawSocket.makefile("rb").readline()
+    return int(statusLine.split()[1])
+  # end RawPost()
+
+  def test1ParsePost(self) -> None:
+    status, report = self.Request("POST", "/parse?name=upload.txt", test_parselimits.REPORT_TEXT.encode("utf-16"))
+    self.assertEqual(status, 200)
+    self.assertEqual(report["error"], "")
+    self.assertEqual(report["filename"], "upload.txt")
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits")
+    self.assertEqual([cardData["cardName"] for cardData in report["videoDisplays"]],
+                     ["NVIDIA GeForce RTX 3080", "AMD Radeon RX 6800"])
+  # end test1ParsePost()
+
+  def test2SizeLimit(self) -> None:
+    self.assertEqual(self.RawPost(f"Content-Length: {MAX_UPLOAD_BYTES + 1}\r\n".encode("ascii")), 413)
+  # end test2SizeLimit()
+
+  def test3BadContentLength(self) -> None:
+    for headerLines in (b"Content-Length: -1\r\n", b"Content-Length: lots\r\n", b""):
+      with self.subTest(headerLines=headerLines):
+        self.assertEqual(self.RawPost(headerLines), 400)
+  # end test3BadContentLength()
+
+  def test4UnknownPath(self) -> None:
+    status, body = self.Request("GET", "/nowhere")
+    self.assertEqual(status, 404)
+    self.assertIn("error", body)
+  # end test4UnknownPath()
+
+  def test5Metrics(self) -> None:
+    status, metrics = self.Request("GET", "/metrics")
+    self.assertEqual(status, 200)
+    # the tests run in name order, so every request before this one is counted
+    self.assertEqual(metrics["statusCounts"], {"200": 1, "400": 3, "404": 1, "413": 1})
+    self.assertEqual(metrics["requests"], 6)
+    self.assertEqual(metrics["inFlight"], 0)
+    self.assertEqual(metrics["latencyMs"]["count"], 1)
+    self.assertEqual(metrics["pool"], "threads")
+    self.assertEqual(metrics["workers"], 2)
+    self.assertEqual(metrics["poolRestarts"], 0)
+    self.assertEqual(self.Request("GET", "/health"), (200, {"status": "ok"}))
+  # end test5Metrics()
+# end class ParseServerTest
+
+if __name__ == "__main__":
+  unittest.main()
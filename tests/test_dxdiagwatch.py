@@ -0,0 +1,141 @@
+#/usr/bin/python3
+# test_dxdiagwatch.py
+# the polling watcher that stands in where inotify can't be used, and ReportWatcher over it
+# by Derek French
+
+# imports
+from drivertables import driverTableUpdater, ENV_OFFLINE
+from dxdiagwatch import OpenWatcher, PollingWatcher, ReportWatcher
+from tests import test_parselimits
+from unittest import mock
+import os
+import tempfile
+import threading
+import unittest
+
+# constants
+SCAN_INTERVAL = 0.05
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class PollingWatcherTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def WriteFile(self, fileName: str, fileText: str, mode: str = "w") -> str:
+    filePath = os.path.join(self.folder.name, fileName)
+    with open(filePath, mode, encoding="utf-8") as fh:
+      fh.write(fileText)
+    return filePath
+  # end WriteFile()
+
+  def Scan(self, watcher: PollingWatcher):
+    # a timeout well past the interval, so every call scans
+    return watcher.Changes(SCAN_INTERVAL * 10)
+  # end Scan()
+
+  def testFilesThereAtStartAreNotReported(self) -> None:
+    oldPath = self.WriteFile("old.txt", "old report")
+    watcher = PollingWatcher(self.folder.name, interval=SCAN_INTERVAL)
+    self.assertEqual(self.Scan(watcher), [])
+    self.assertEqual(self.Scan(watcher), [])
+    self.assertEqual(watcher.ExistingFiles(), [oldPath])
+  # end testFilesThereAtStartAreNotReported()
+
+  def testNewFileIsReportedOnceSettled(self) -> None:
+    watcher = PollingWatcher(self.folder.name, interval=SCAN_INTERVAL)
+    newPath = self.WriteFile("new.txt", "first half")
+    self.WriteFile("notes.log", "not a report")
+    # first seen, but it could still be being written
+    self.assertEqual(self.Scan(watcher), [])
+    self.WriteFile("new.txt", " and the second half", "a")
+    self.assertEqual(self.Scan(watcher), [])
+    # the same on two scans in a row
+    self.assertEqual(self.Scan(watcher), [newPath])
+    self.assertEqual(self.Scan(watcher), [])
+  # end testNewFileIsReportedOnceSettled()
+
+  def testChangedFileIsReportedAgain(self) -> None:
+    watcher = PollingWatcher(self.folder.name, interval=SCAN_INTERVAL)
+    reportPath = self.WriteFile("report.txt", "first")
+    self.Scan(watcher)
+    self.assertEqual(self.Scan(watcher), [reportPath])
+    self.WriteFile("report.txt", "rewritten with more")
+    self.Scan(watcher)
+    self.assertEqual(self.Scan(watcher), [reportPath])
+  # end testChangedFileIsReportedAgain()
+
+  def testRemovedFileIsForgotten(self) -> None:
+    watcher = PollingWatcher(self.folder.name, interval=SCAN_INTERVAL)
+    reportPath = self.WriteFile("report.txt", "first")
+    self.Scan(watcher)
+    self.assertEqual(self.Scan(watcher), [reportPath])
+    os.remove(reportPath)
+    self.assertEqual(self.Scan(watcher), [])
+    # the same file arriving again is new
+    self.WriteFile("report.txt", "first")
+    self.Scan(watcher)
+    self.assertEqual(self.Scan(watcher), [reportPath])
+  # end testRemovedFileIsForgotten()
+
+  def testShortTimeoutWaitsWithoutScanning(self) -> None:
+    watcher = PollingWatcher(self.folder.name, interval=60)
+    self.WriteFile("report.txt", "first")
+    self.assertEqual(watcher.Changes(0), [])
+  # end testShortTimeoutWaitsWithoutScanning()
+
+  def testOpenWatcher(self) -> None:
+    self.assertEqual(OpenWatcher(self.folder.name, polling=True).method, "polling")
+    with self.assertRaises(FileNotFoundError):
+      OpenWatcher(os.path.join(self.folder.name, "missing"))
+  # end testOpenWatcher()
+# end class PollingWatcherTest
+
+class ReportWatcherTest(unittest.TestCase):
+
+  def testPollingWatcherParsesExistingAndNewReports(self) -> None:
+    with tempfile.TemporaryDirectory() as folder, mock.patch.dict(os.environ, {ENV_OFFLINE: "1"}):
+      with open(os.path.join(folder, "DxDiag_existing.txt"), "w", encoding="utf-8") as fh:
+        fh.write(test_parselimits.REPORT_TEXT)
+      reports = []
+      reportEvents = [threading.Event(), threading.Event()]
+
+      def OnReport(report) -> None:
+        reports.append(report)
+        reportEvents[len(reports) - 1].set()
+
+      reportWatcher = ReportWatcher(folder, OnReport, workerCount=1, existing=True, polling=True)
+      runThread = threading.Thread(target=reportWatcher.Run)
+      runThread.start()
+      try:
+        self.assertTrue(reportEvents[0].wait(30))
+        # written under another name and renamed in, as an upload would be; found by the next two scans
+        newPath = os.path.join(folder, "DxDiag_new.txt")
+        with open(newPath + ".part", "w", encoding="utf-8") as fh:
+          fh.write(test_parselimits.REPORT_TEXT)
+        os.replace(newPath + ".part", newPath)
+        self.assertTrue(reportEvents[1].wait(30))
+      finally:
+        reportWatcher.Stop()
+        runThread.join(30)
+      self.assertFalse(runThread.is_alive())
+      self.assertEqual(reportWatcher.watcherMethod, "polling")
+      self.assertEqual(reportWatcher.reportCount, 2)
+      self.assertEqual([os.path.basename(report["filename"]) for report in reports],
+                       ["DxDiag_existing.txt", "DxDiag_new.txt"])
+      self.assertTrue(all(report["error"] == "" for report in reports))
+  # end testPollingWatcherParsesExistingAndNewReports()
+# end class ReportWatcherTest
+
+if __name__ == "__main__":
+  unittest.main()
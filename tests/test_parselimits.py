@@ -0,0 +1,314 @@
+#/usr/bin/python3
+# test_parselimits.py
+# DXDiagFile on cut short, oversized and garbled reports: partial results and diagnostics
+# by Derek French
+
+# imports
+from dxdiagfile import DefaultParseLimits, DXDiagFile, ParseLimits, SECTION_DISPLAYDEVICES, SECTION_DRIVES
+from dxdiagfile import ENV_MAXLINECHARS, ENV_MAXREPORTBYTES, ENV_MAXSECTIONLINES, MAX_LINE_CHARS
+from dxdiagfile import MMAP_THRESHOLD, READ_BLOCKSIZE, ReadLimitedBytes, ReadReportText
+from drivertables import driverTableUpdater
+from unittest import mock
+import io
+import os
+import tempfile
+import unittest
+
+# constants
+REPORT_TEXT = """------------------
+System Information
+------------------
+      Time of this report: 12/3/2023, 00:00:00
+             Machine name: DESKTOP-Limits
+         Operating System: Windows 11 Home 64-bit (10.0, Build 22000) (22000.co_release.210604-1628)
+                 Language: English (Regional Setting: English)
+      System Manufacturer: Micro-Star International
+             System Model: MS-7C56
+                Processor: AMD Ryzen 7 5800X3D 8-Core Processor (16 CPUs), ~3.4GHz
+                   Memory: 16384MB RAM
+                Page File: 9733MB used, 14741MB available
+          DirectX Version: DirectX 12
+         User DPI Setting: 96 DPI (100 percent)
+
+------------
+DxDiag Notes
+------------
+      Display Tab 1: No problems found.
+      Display Tab 2: There is a problem with the display driver.
+
+---------------
+Display Devices
+---------------
+           Card name: NVIDIA GeForce RTX 3080
+        Manufacturer: NVIDIA
+    Dedicated Memory: 10067 MB
+        Current Mode: 2560 x 1080 (32 bit) (59Hz)
+        Monitor Name: Generic PnP Monitor
+       Monitor Model: LG ULTRAWIDE
+ Driver File Version: 31.00.0015.4617 (English)
+
+           Card name: AMD Radeon RX 6800
+        Manufacturer: Advanced Micro Devices, Inc.
+    Dedicated Memory: 16337 MB
+        Current Mode: 1920 x 1080 (32 bit) (60Hz)
+ Driver File Version: 32.00.21025.1024 (English)
+
+-------------
+Sound Devices
+-------------
+            Description: Headphones (Arctis 5 Game)
+
+------------------------
+Disk & DVD/CD-ROM Drives
+------------------------
+      Drive: C:
+ Free Space: 32.6 GB
+Total Space: 102.0 GB
+File System: NTFS
+      Model: Samsung SSD 850 EVO 500GB
+
+      Drive: D:
+ Free Space: 90.0 GB
+Total Space: 374.4 GB
+File System: NTFS
+      Model: WDC WD40EZRZ-00GXCB0
+
+--------------
+System Devices
+--------------
+     Name: PCI Express Root Port
+"""
+
+# functions
+def setUpModule() -> None:
+  driverTableUpdater.offline = True
+# end setUpModule()
+
+# classes
+class ParseLimitsTest(unittest.TestCase):
+  """
+  Every report is parsed from a file both whole and streaming, which have to agree
+  """
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def ParseBoth(self, reportText: str, limits: ParseLimits = None):
+    """
+    Write reportText to a file and return the whole and the streaming DXDiagFile.ToDict() of it
+    """
+    reportFileName = os.path.join(self.folder.name, "DxDiag.txt")
+    with open(reportFileName, "w", encoding="utf-8", newline="") as fh:
+      fh.write(reportText)
+    reports = []
+    for streaming in (False, True):
+      report = DXDiagFile(reportFileName, streaming=streaming, limits=limits).ToDict()
+      report.pop("metrics", None)
+      reports.append(report)
+    self.assertEqual(sorted(reports[0]["diagnostics"]), sorted(reports[1]["diagnostics"]))
+    reports[1]["diagnostics"] = reports[0]["diagnostics"]
+    self.assertEqual(reports[0], reports[1])
+    return reports[0]
+  # end ParseBoth()
+
+  def testCompleteReportHasNoDiagnostics(self) -> None:
+    report = self.ParseBoth(REPORT_TEXT)
+    self.assertEqual(report["diagnostics"], [])
+    self.assertEqual([cardData["cardName"] for cardData in report["videoDisplays"]],
+                     ["NVIDIA GeForce RTX 3080", "AMD Radeon RX 6800"])
+    self.assertEqual([driveDetails["driveLetter"] for driveDetails in report["drives"]], ["C", "D"])
+  # end testCompleteReportHasNoDiagnostics()
+
+  def testDriveCutAfterFreeSpace(self) -> None:
+    reportText = REPORT_TEXT[:REPORT_TEXT.index("Total Space: 374.4 GB")]
+    report = self.ParseBoth(reportText)
+    self.assertEqual(report["drives"][0]["model"], "Samsung SSD 850 EVO 500GB")
+    self.assertEqual(report["drives"][1], {"driveLetter": "D", "freeSpace": "90.0 GB", "totalSpace": "",
+                                           "fileSystem": "", "model": ""})
+    self.assertEqual(report["diagnostics"], [f"{SECTION_DRIVES}: the details of drive D are cut short"])
+  # end testDriveCutAfterFreeSpace()
+
+  def testDriveCutAfterLetter(self) -> None:
+    reportText = REPORT_TEXT[:REPORT_TEXT.index(" Free Space: 90.0 GB")]
+    report = self.ParseBoth(reportText)
+    self.assertEqual(len(report["drives"]), 2)
+    self.assertEqual(report["drives"][0]["totalSpace"], "102.0 GB")
+    self.assertEqual(report["drives"][1]["driveLetter"], "D")
+    self.assertEqual(report["drives"][1]["model"], "")
+    self.assertEqual(report["diagnostics"], [f"{SECTION_DRIVES}: the details of drive D are cut short"])
+  # end testDriveCutAfterLetter()
+
+  def testNoNewlines(self) -> None:
+    # the report runs on into a long stretch with no line breaks at all, as a corrupt upload can
+    reportText = REPORT_TEXT[:REPORT_TEXT.index("           Card name: AMD")] + "\x00garbage" * 50000
+    report = self.ParseBoth(reportText)
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits")
+    self.assertEqual([cardData["cardName"] for cardData in report["videoDisplays"]], ["NVIDIA GeForce RTX 3080"])
+    self.assertEqual(report["videoDisplays"][0]["VRAM"], 10067)
+    self.assertEqual(report["drives"], [])
+    self.assertEqual(report["diagnostics"],
+                     [f"{SECTION_DISPLAYDEVICES}: 1 lines over {MAX_LINE_CHARS} characters were cut short"])
+  # end testNoNewlines()
+
+  def testNoNewlinesAtAll(self) -> None:
+    report = self.ParseBoth("x" * 300000)
+    self.assertTrue(report["valid"])
+    self.assertEqual(report["videoDisplays"], [])
+    self.assertEqual(report["diagnostics"], [])
+  # end testNoNewlinesAtAll()
+
+  def testOverlongLineKeepsTheLinesAfterIt(self) -> None:
+    # a line long enough to fill the whole section budget on its own
+    longLine = "        Device Notes: " + "x" * (DefaultParseLimits().maxSectionLines * (MAX_LINE_CHARS + 2) + 1000) + "\n"
+    cardStart = REPORT_TEXT.index("           Card name: AMD")
+    reportText = REPORT_TEXT[:cardStart] + longLine + REPORT_TEXT[cardStart:]
+    report = self.ParseBoth(reportText)
+    self.assertEqual([cardData["cardName"] for cardData in report["videoDisplays"]],
+                     ["NVIDIA GeForce RTX 3080", "AMD Radeon RX 6800"])
+    self.assertEqual(report["videoDisplays"][1]["VRAM"], 16337)
+    self.assertEqual(len(report["drives"]), 2)
+    self.assertEqual(report["diagnostics"],
+                     [f"{SECTION_DISPLAYDEVICES}: 1 lines over {MAX_LINE_CHARS} characters were cut short"])
+  # end testOverlongLineKeepsTheLinesAfterIt()
+
+  def testOverlongLinesWithSmallLimit(self) -> None:
+    report = self.ParseBoth(REPORT_TEXT, ParseLimits(maxLineChars=40))
+    # lines are cut at 40 characters, indent included
+    self.assertEqual(report["systemInformation"]["osName"], "Windows 11 Ho")
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limit")
+    self.assertEqual(len(report["videoDisplays"]), 2)
+    self.assertEqual(report["diagnostics"], [
+      "System Information: 8 lines over 40 characters were cut short",
+      "DxDiag Notes: 1 lines over 40 characters were cut short",
+      f"{SECTION_DISPLAYDEVICES}: 7 lines over 40 characters were cut short",
+      "Sound Devices: 1 lines over 40 characters were cut short"
+    ])
+  # end testOverlongLinesWithSmallLimit()
+
+  def testReportOverMaxBytes(self) -> None:
+    maxBytes = len(REPORT_TEXT[:REPORT_TEXT.index("-------------\nSound Devices")].encode("utf-8"))
+    report = self.ParseBoth(REPORT_TEXT, ParseLimits(maxReportBytes=maxBytes))
+    self.assertTrue(report["valid"])
+    self.assertEqual(len(report["videoDisplays"]), 2)
+    self.assertEqual(report["soundDevices"], [])
+    self.assertEqual(report["drives"], [])
+    self.assertEqual(report["diagnostics"],
+                     [f"the report is over {maxBytes} bytes; only the first {maxBytes} were read"])
+  # end testReportOverMaxBytes()
+
+  def testReportOverMaxBytesFromBytes(self) -> None:
+    reportBytes = REPORT_TEXT.encode("utf-16")
+    dxDiag = DXDiagFile("x", reportBytes=reportBytes, limits=ParseLimits(maxReportBytes=1001))
+    # the limit falls in the middle of a UTF-16 character, which is dropped
+    self.assertEqual(dxDiag.systemInformation["machineName"], "DESKTOP-Limits")
+    self.assertEqual(dxDiag.videoDisplays, [])
+    self.assertEqual(dxDiag.diagnostics, ["the report is over 1001 bytes; only the first 1001 were read"])
+  # end testReportOverMaxBytesFromBytes()
+
+  def testUnreadableMemoryAndVRAM(self) -> None:
+    reportText = REPORT_TEXT.replace("Memory: 16384MB RAM", "Memory: lots of RAM")
+    reportText = reportText.replace("Dedicated Memory: 10067 MB", "Dedicated Memory: n/a MB")
+    report = self.ParseBoth(reportText)
+    self.assertEqual(report["systemInformation"]["memoryInMB"], 0)
+    self.assertEqual(report["systemInformation"]["cpuName"], "AMD Ryzen 7 5800X3D 8-Core Processor (16 CPUs), ~3.4GHz")
+    self.assertEqual([cardData["VRAM"] for cardData in report["videoDisplays"]], [0, 16337])
+    self.assertEqual(report["diagnostics"], [
+      "System Information: Memory 'lots of RAM' couldn't be read",
+      "Display Devices: Dedicated Memory 'n/a MB' couldn't be read"
+    ])
+  # end testUnreadableMemoryAndVRAM()
+
+  def testEnvironmentOverrides(self) -> None:
+    with mock.patch.dict(os.environ, {ENV_MAXREPORTBYTES: "5000", ENV_MAXLINECHARS: "50", ENV_MAXSECTIONLINES: "6"}):
+      self.assertEqual(DefaultParseLimits(), ParseLimits(5000, 50, 6))
+      report = self.ParseBoth(REPORT_TEXT)
+    self.assertEqual(report["systemInformation"]["machineName"], "DESKTOP-Limits")
+    # the first six lines of Display Devices hold only the first card's name, manufacturer and VRAM
+    self.assertEqual([cardData["cardName"] for cardData in report["videoDisplays"]], ["NVIDIA GeForce RTX 3080"])
+    self.assertEqual(report["videoDisplays"][0]["VRAM"], 10067)
+    self.assertEqual(report["videoDisplays"][0]["driverVersionRaw"], "Unknown")
+    self.assertIn(f"{SECTION_DISPLAYDEVICES}: over 6 lines; only the first 6 were read", report["diagnostics"])
+    self.assertIn("System Information: over 6 lines; only the first 6 were read", report["diagnostics"])
+  # end testEnvironmentOverrides()
+
+  def testBadEnvironmentValuesFallBack(self) -> None:
+    with mock.patch.dict(os.environ, {ENV_MAXREPORTBYTES: "lots", ENV_MAXLINECHARS: "-3", ENV_MAXSECTIONLINES: "0"}):
+      self.assertEqual(DefaultParseLimits(), ParseLimits())
+      report = self.ParseBoth(REPORT_TEXT)
+    self.assertEqual(report["diagnostics"], [])
+    self.assertEqual(len(report["drives"]), 2)
+  # end testBadEnvironmentValuesFallBack()
+# end class ParseLimitsTest
+
+class CountingReader(io.RawIOBase):
+  """
+  An endless binary stream of "x" that hands out at most shortRead bytes a call and records what it was asked for
+  """
+
+  def __init__(self, shortRead: int) -> None:
+    self.shortRead = shortRead
+    self.readSizes = []
+  # end __init__()
+
+  def readable(self) -> bool:
+    return True
+
+  def read(self, size: int = -1) -> bytes:
+    self.readSizes.append(size)
+    return b"x" * min(size, self.shortRead)
+  # end read()
+# end class CountingReader
+
+class ReadBoundsTest(unittest.TestCase):
+  """
+  Reads stop a byte past the report limit, whatever they read from
+  """
+
+  def setUp(self) -> None:
+    self.folder = tempfile.TemporaryDirectory()
+  # end setUp()
+
+  def tearDown(self) -> None:
+    self.folder.cleanup()
+  # end tearDown()
+
+  def testLimitedBytesFromEndlessStream(self) -> None:
+    maxBytes = READ_BLOCKSIZE * 3
+    for shortRead in (READ_BLOCKSIZE * 2, 1000):
+      with self.subTest(shortRead=shortRead):
+        endlessStream = CountingReader(shortRead)
+        self.assertEqual(len(ReadLimitedBytes(endlessStream, maxBytes)), maxBytes + 1)
+        self.assertLessEqual(max(endlessStream.readSizes), READ_BLOCKSIZE)
+        # the last read asks only for what is left
+        readSize = min(shortRead, READ_BLOCKSIZE)
+        self.assertEqual(endlessStream.readSizes[-1], (maxBytes + 1) % readSize or readSize)
+  # end testLimitedBytesFromEndlessStream()
+
+  def testLimitedBytesFromShortStream(self) -> None:
+    reportBytes = REPORT_TEXT.encode("utf-8")
+    self.assertEqual(ReadLimitedBytes(io.BytesIO(reportBytes), 1000000), reportBytes)
+    self.assertEqual(ReadLimitedBytes(io.BytesIO(reportBytes), len(reportBytes)), reportBytes)
+  # end testLimitedBytesFromShortStream()
+
+  def testReportTextIsCutAtLimit(self) -> None:
+    # "é" is two bytes in UTF-8, so a limit of one byte past one cuts the next in half
+    smallText = "caf\u00e9\u00e9 " * 10
+    largeText = smallText * (MMAP_THRESHOLD // len(smallText.encode("utf-8")) + 1)
+    maxBytes = len("caf\u00e9".encode("utf-8")) + 1
+    for fileText in (smallText, largeText):
+      with self.subTest(fileBytes=len(fileText.encode("utf-8"))):
+        reportFileName = os.path.join(self.folder.name, "DxDiag.txt")
+        with open(reportFileName, "w", encoding="utf-8", newline="") as fh:
+          fh.write(fileText)
+        self.assertEqual(ReadReportText(reportFileName, maxBytes=maxBytes), ("caf\u00e9", "utf-8"))
+        self.assertEqual(ReadReportText(reportFileName), (fileText, "utf-8"))
+  # end testReportTextIsCutAtLimit()
+# end class ReadBoundsTest
+
+if __name__ == "__main__":
+  unittest.main()